@@ -1,88 +1,400 @@
 import re
+import os
+import sys
+import mmap
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from nodos import *
+from peephole import Peephole
+from x86 import texto_lineas, lineas_x86
 import json
+from json.encoder import encode_basestring_ascii
+import hashlib
+import pickle
+import gc
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog
 from semantico import *
+from visitante import Visitante
 
 # === Analisis Lexico ===
 # Definir los patrones para los diferentes tipos de tokens
 token_patron = {
     "PREPROCESSOR": r'\#include\b',  
     "HEADER": r'<[a-zA-Z0-9_.]+>',  
-    "KEYWORD": r'\b(if|else|while|switch|case|return|print|break|for|int|float|void|double|char|const)\b',
-    "LIB_FUNCTION": r'\b(printf|scanf)\b',
+    "KEYWORD": r'\b(?:if|else|while|switch|case|return|print|break|for|int|float|void|double|char|const)\b',
+    "LIB_FUNCTION": r'\b(?:printf|scanf)\b',
     "IDENTIFIER": r'\b[a-zA-Z_][a-zA-Z0-9_]*\b',
-    "NUMBER": r'\b\d+(\.\d+)?f?\b',
-    "OPERATOR": r'[\+\-\*\/\=\<\>\!\_]',
+    "NUMBER": r'\b\d+(?:\.\d+)?f?\b',
+    "OPERATOR": r'==|!=|<=|>=|\+\+|--|\+=|-=|\*=|/=|&&|\|\||[\+\-\*\/\=\<\>\!\_]',
     "DELIMITER": r'[(),;{}]',
     "WHITESPACE": r'\s+',
     "STRING": r'"[^"]*"',  
 }
 
+# Codigo entero de cada tipo de token: su posicion en token_patron
+TIPOS_TOKEN = tuple(token_patron)
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_TOKEN)}
+PREPROCESSOR = CODIGO_TIPO["PREPROCESSOR"]
+HEADER = CODIGO_TIPO["HEADER"]
+KEYWORD = CODIGO_TIPO["KEYWORD"]
+LIB_FUNCTION = CODIGO_TIPO["LIB_FUNCTION"]
+IDENTIFIER = CODIGO_TIPO["IDENTIFIER"]
+NUMBER = CODIGO_TIPO["NUMBER"]
+OPERATOR = CODIGO_TIPO["OPERATOR"]
+DELIMITER = CODIGO_TIPO["DELIMITER"]
+WHITESPACE = CODIGO_TIPO["WHITESPACE"]
+STRING = CODIGO_TIPO["STRING"]
+
+# Archivos a partir de este tamano se lexean sobre un mmap en lugar de leerse a un str
+UMBRAL_MMAP = 64 * 1024 * 1024
+
+class FuenteMapeada:
+    """
+    Archivo fuente proyectado en memoria (mmap de solo lectura).
+    Los tokens obtenidos de self.buffer dejan de ser validos al cerrarla.
+    """
+    def __init__(self, ruta):
+        self.archivo = open(ruta, 'rb')
+        if os.fstat(self.archivo.fileno()).st_size > 0:
+            self.buffer = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.buffer = b''  # mmap no admite archivos vacios
+
+    def cerrar(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class IndiceLineas:
+    """
+    Tabla con el desplazamiento donde empieza cada linea de una fuente.
+    Se construye una vez por archivo y traduce desplazamientos a
+    (linea, columna), ambos desde 1, con busqueda binaria.
+    """
+    def __init__(self, fuente):
+        salto = '\n' if isinstance(fuente, str) else b'\n'
+        self.inicios = array('Q', [0])
+        pos = fuente.find(salto)
+        while pos != -1:
+            self.inicios.append(pos + 1)
+            pos = fuente.find(salto, pos + 1)
+
+    def posicion(self, desplazamiento):
+        linea = bisect_right(self.inicios, desplazamiento)
+        return linea, desplazamiento - self.inicios[linea - 1] + 1
+
+class FlujoTokens:
+    """
+    Flujo compacto de tokens como estructura de arreglos: los tipos se
+    guardan en un array('B') de codigos enteros y las posiciones en arreglos
+    de desplazamientos inicio/fin sobre la fuente (str, bytes o mmap).
+    El texto de cada token se corta de la fuente solo cuando se pide.
+    """
+    def __init__(self, fuente, tipos, inicios, fines, nombres=TIPOS_TOKEN, con_posiciones=True):
+        self.fuente = fuente
+        self.tipos = tipos
+        self.inicios = inicios
+        self.fines = fines
+        self.nombres = nombres
+        self.es_texto = isinstance(fuente, str)
+        self.con_posiciones = con_posiciones  # False si la fuente no es el archivo original
+        self.indice_lineas = None  # Se construye solo cuando se pide una posicion
+
+    @classmethod
+    def desde_tuplas(cls, tokens):
+        # Adapta una lista de tuplas (tipo, valor) concatenando los valores en una fuente
+        partes = []
+        tipos, inicios, fines = array('B'), array('Q'), array('Q')
+        pos = 0
+        for tipo, valor in tokens:
+            tipos.append(CODIGO_TIPO[tipo])
+            inicios.append(pos)
+            pos += len(valor)
+            fines.append(pos)
+            partes.append(valor)
+        return cls("".join(partes), tipos, inicios, fines, con_posiciones=False)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def valor(self, indice):
+        texto = self.fuente[self.inicios[indice]:self.fines[indice]]
+        return texto if self.es_texto else texto.decode('utf-8')
+
+    def __getitem__(self, indice):
+        return (self.nombres[self.tipos[indice]], self.valor(indice))
+
+    def posicion(self, indice):
+        # (linea, columna) del token; un indice fuera del flujo indica el final del archivo
+        if not self.con_posiciones:
+            return None
+        if self.indice_lineas is None:
+            self.indice_lineas = IndiceLineas(self.fuente)
+        desplazamiento = self.inicios[indice] if indice < len(self.tipos) else len(self.fuente)
+        return self.indice_lineas.posicion(desplazamiento)
+
+    def __iter__(self):
+        for indice in range(len(self.tipos)):
+            yield self[indice]
+
+class Lexer:
+    """
+    Analizador lexico reutilizable.
+    Compila los patrones una sola vez y clasifica cada coincidencia con
+    match.lastgroup en lugar de recorrer match.groupdict().
+    """
+    def __init__(self, patrones=None):
+        self.patrones = patrones if patrones is not None else token_patron
+        # Unir todos los patrones en un unico patron realizando grupos nombrados
+        patron_general = "|".join(f"(?P<{token}>{patron})" for token, patron in self.patrones.items())
+        # Con re.ASCII, \w, \d, \s y \b del texto significan lo mismo que en bytes: un caracter
+        # no ASCII nunca es de palabra, asi un str y su mmap dan los mismos tokens
+        self.patron_regex = re.compile(patron_general, re.ASCII)
+        # Version en bytes del mismo patron para lexear buffers (mmap)
+        self.patron_bytes = re.compile(patron_general.encode('utf-8'))
+        # Numero de grupo (match.lastindex) -> codigo del tipo de token
+        self.nombres = tuple(self.patrones)
+        self.codigo_grupo = {self.patron_regex.groupindex[tipo]: codigo for codigo, tipo in enumerate(self.nombres)}
+        self.codigo_espacio = self.nombres.index("WHITESPACE") if "WHITESPACE" in self.nombres else -1
+
+    def iter_tokens(self, texto):
+        # Generador: produce cada token (tipo, valor) a medida que se encuentra
+        for match in self.patron_regex.finditer(texto):
+            tipo = match.lastgroup
+            if tipo != "WHITESPACE":
+                yield (tipo, match.group())
+
+    def identificar_tokens(self, texto):
+        return list(self.iter_tokens(texto))
+
+    def flujo_tokens(self, fuente):
+        # Construye un FlujoTokens sobre un str o un buffer de bytes (mmap) sin copiar el texto
+        patron = self.patron_regex if isinstance(fuente, str) else self.patron_bytes
+        formato = 'I' if len(fuente) < 2 ** 32 else 'Q'
+        tipos, inicios, fines = array('B'), array(formato), array(formato)
+        codigo_grupo, espacio = self.codigo_grupo, self.codigo_espacio
+        agregar_tipo, agregar_inicio, agregar_fin = tipos.append, inicios.append, fines.append
+        for match in patron.finditer(fuente):
+            codigo = codigo_grupo[match.lastindex]
+            if codigo != espacio:
+                agregar_tipo(codigo)
+                agregar_inicio(match.start())
+                agregar_fin(match.end())
+        return FlujoTokens(fuente, tipos, inicios, fines, self.nombres)
+
+    def relexear(self, flujo, inicio, borrados, insertado):
+        """
+        Actualiza un FlujoTokens tras una edicion: en la posicion inicio se
+        borran 'borrados' caracteres y se inserta el texto 'insertado'.
+        Solo se vuelve a lexear la zona danada; en cuanto un token nuevo
+        coincide con uno viejo posterior a la edicion el resto se reutiliza
+        desplazado. Devuelve un FlujoTokens nuevo sobre la fuente editada.
+        """
+        fuente = flujo.fuente
+        if not flujo.es_texto and isinstance(insertado, str):
+            insertado = insertado.encode('utf-8')
+        fin_viejo = inicio + borrados
+        fin_nuevo = inicio + len(insertado)
+        delta = len(insertado) - borrados
+        nueva = fuente[:inicio] + insertado + fuente[fin_viejo:]
+        tipos, inicios, fines = flujo.tipos, flujo.inicios, flujo.fines
+        total = len(tipos)
+
+        # Primer token a relexear: el que empieza en o antes de la edicion
+        primero = bisect_right(inicios, inicio) - 1
+        # Una comilla suelta anterior (string sin cerrar) puede emparejarse con una comilla insertada
+        comilla = '"' if flujo.es_texto else b'"'
+        if comilla in insertado:
+            pos_comilla = fuente.rfind(comilla, 0, inicio)
+            indice = bisect_right(inicios, pos_comilla) - 1
+            if pos_comilla >= 0 and (indice < 0 or fines[indice] <= pos_comilla):
+                primero = min(primero, indice)
+        # Retroceder hasta un token precedido por espacio: salvo STRING (tratado arriba),
+        # ningun patron mira mas alla de un espacio, asi que lo anterior no cambia
+        while primero > 0 and not fuente[inicios[primero] - 1:inicios[primero]].isspace():
+            primero -= 1
+        primero = max(primero, 0)
+        desde = inicios[primero] if primero > 0 else 0
+
+        patron = self.patron_regex if flujo.es_texto else self.patron_bytes
+        formato = 'I' if len(nueva) < 2 ** 32 else 'Q'
+        nuevos_tipos, nuevos_inicios, nuevos_fines = array('B'), array(formato), array(formato)
+        reanudar = total  # Indice del primer token viejo que se reutiliza
+        for match in patron.finditer(nueva, desde):
+            codigo = self.codigo_grupo[match.lastindex]
+            if codigo == self.codigo_espacio:
+                continue
+            comienzo, final = match.span()
+            if comienzo > fin_nuevo:
+                # Resincronizar: mismo token que el flujo viejo en la posicion equivalente
+                indice = bisect_left(inicios, comienzo - delta, primero)
+                if indice < total and inicios[indice] == comienzo - delta and \
+                tipos[indice] == codigo and fines[indice] == final - delta:
+                    reanudar = indice
+                    break
+            nuevos_tipos.append(codigo)
+            nuevos_inicios.append(comienzo)
+            nuevos_fines.append(final)
+
+        # Empalmar: prefijo intacto + zona relexeada + sufijo desplazado en delta
+        if formato == inicios.typecode:
+            prefijo_inicios, prefijo_fines = inicios[:primero], fines[:primero]
+        else:
+            prefijo_inicios, prefijo_fines = array(formato, inicios[:primero]), array(formato, fines[:primero])
+        if delta == 0 and formato == inicios.typecode:
+            sufijo_inicios, sufijo_fines = inicios[reanudar:], fines[reanudar:]
+        else:
+            sufijo_inicios = array(formato, map(delta.__add__, inicios[reanudar:]))
+            sufijo_fines = array(formato, map(delta.__add__, fines[reanudar:]))
+        return FlujoTokens(nueva,
+                           tipos[:primero] + nuevos_tipos + tipos[reanudar:],
+                           prefijo_inicios + nuevos_inicios + sufijo_inicios,
+                           prefijo_fines + nuevos_fines + sufijo_fines,
+                           flujo.nombres)
+
+# Instancia compartida: el patron general se compila una sola vez por proceso
+lexer = Lexer()
+
+def iter_tokens(texto):
+    return lexer.iter_tokens(texto)
+
 def identificar_tokens(texto):
-    # Unir todos los patrones en un unico patron realizando grupos nombrados
-    patron_general = "|".join(f"(?P<{token}>{patron})" for token, patron in token_patron.items())
-    patron_regex = re.compile(patron_general)
-    tokens_encontrados = []
-    for match in patron_regex.finditer(texto):
-        for token, valor in match.groupdict().items():
-            if valor is not None and token != "WHITESPACE":
-                tokens_encontrados.append((token, valor))
-    return tokens_encontrados
+    return lexer.identificar_tokens(texto)
+
+def flujo_tokens(fuente):
+    return lexer.flujo_tokens(fuente)
+
+def relexear(flujo, inicio, borrados, insertado):
+    return lexer.relexear(flujo, inicio, borrados, insertado)
 
 # === Analizador Sintactico ===
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, recuperar=False):
+        # Acepta un FlujoTokens o, por compatibilidad, una lista de tuplas (tipo, valor)
+        if not isinstance(tokens, FlujoTokens):
+            tokens = FlujoTokens.desde_tuplas(tokens)
         self.tokens = tokens
+        self.tipos = tokens.tipos  # Codigos enteros de tipo, se comparan sin tocar el texto
+        self.n = len(tokens)
         self.pos = 0
         self.funciones = []
+        # Con recuperar=True los errores se acumulan en self.errores y parsear devuelve un arbol parcial
+        self.recuperar = recuperar
+        self.errores = []
+        # Hojas y expresiones iguales se comparten en lugar de repetirse en cada aparicion
+        self.fabrica = FabricaNodos()
 
     def obtener_token_actual(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return self.tokens[self.pos] if self.pos < self.n else None
+
+    def tipo_actual(self):
+        return self.tipos[self.pos] if self.pos < self.n else None
+
+    def valor_actual(self):
+        return self.tokens.valor(self.pos) if self.pos < self.n else None
+
+    def es(self, tipo, valor, desplazamiento=0):
+        # Compara primero el codigo de tipo; el texto solo se corta si el tipo coincide
+        pos = self.pos + desplazamiento
+        return pos < self.n and self.tipos[pos] == tipo and self.tokens.valor(pos) == valor
 
     def coincidir(self, tipo_esperado):
-        token_actual = self.obtener_token_actual()
-        if token_actual and token_actual[0] == tipo_esperado:
+        if self.pos < self.n and self.tipos[self.pos] == tipo_esperado:
+            token_actual = self.tokens[self.pos]
             self.pos += 1
             return token_actual
         else:
-            raise SyntaxError(f'Error sintactico: se esperaba {tipo_esperado}, pero se encontro: {token_actual}')
+            raise self.error(f'Error sintactico: se esperaba {TIPOS_TOKEN[tipo_esperado]}, pero se encontro: {self.obtener_token_actual()}')
+
+    def error(self, mensaje, indice=None):
+        # SyntaxError con la linea y columna del token; la posicion solo se calcula al fallar
+        posicion = self.tokens.posicion(self.pos if indice is None else indice)
+        if posicion is None:
+            return SyntaxError(mensaje)
+        error = SyntaxError(f'{mensaje} (linea {posicion[0]}, columna {posicion[1]})')
+        error.linea, error.columna = posicion
+        return error
+
+    def consumir(self, tipo_esperado):
+        # Igual que coincidir, pero sin construir el token cuando no se usa su valor
+        if self.pos < self.n and self.tipos[self.pos] == tipo_esperado:
+            self.pos += 1
+        else:
+            raise self.error(f'Error sintactico: se esperaba {TIPOS_TOKEN[tipo_esperado]}, pero se encontro: {self.obtener_token_actual()}')
 
     def parsear(self):
         # Punto de entrada del analizador sintactico: se espera una o mas funciones
-        funciones = []
-        while self.pos < len(self.tokens):
-            token_actual = self.obtener_token_actual()
+        funciones = list(self.iter_funciones())
+        self.verificar_main(funciones)
+        return NodoPrograma(funciones)  # Devolver un nodo Programa
+
+    def iter_funciones(self, por_funcion=False):
+        """
+        Produce cada NodoFuncion en cuanto termina de analizarse, sin verificar
+        main. Con por_funcion=True la fabrica se vacia al cerrar cada funcion:
+        los nodos solo se comparten dentro de ella y los de funciones ya
+        entregadas no quedan retenidos por el parser mientras dure el flujo.
+        """
+        while self.pos < self.n:
             # Saltar #include <stdio.h>
-            if token_actual and token_actual[0] == 'PREPROCESSOR':
+            if self.tipos[self.pos] == PREPROCESSOR:
                 self.pos += 1  # Consumir #include
-                self.coincidir('HEADER')  # Consumir <stdio.h>
+                self.consumir(HEADER)  # Consumir <stdio.h>
                 continue
-            funcion = self.funcion()
-            funciones.append(funcion)
+            inicio = self.pos
+            try:
+                funcion = self.funcion()
+            except SyntaxError as error:
+                if not self.recuperar:
+                    raise
+                self.errores.append(error)
+                self.sincronizar_funcion(inicio)
+                continue
+            finally:
+                if por_funcion:
+                    self.fabrica.vaciar()
+            yield funcion
 
-        # Verificar que exista al menos una funcion 'main'
+    def verificar_main(self, funciones):
         existe_main = any(funcion.nombre == 'main' for funcion in funciones)
+        self.verificar_nombres_main(existe_main, funciones[-1].nombre if funciones else None)
+
+    def verificar_nombres_main(self, existe_main, ultima):
+        # Verificar que exista al menos una funcion 'main'
         if not existe_main:
-            raise SyntaxError("Error sintactico: Debe existir una funcion 'main' en el codigo.")
+            self.reportar(SyntaxError("Error sintactico: Debe existir una funcion 'main' en el codigo."))
 
         # Verificar que la ultima funcion sea 'main'
-        if funciones[-1].nombre != 'main':
-            raise SyntaxError("Error sintactico: La funcion 'main' debe ser la ultima en el codigo.")
-
-        return NodoPrograma(funciones)  # Devolver un nodo Programa
+        elif ultima != 'main':
+            self.reportar(SyntaxError("Error sintactico: La funcion 'main' debe ser la ultima en el codigo."))
+
+    def reportar(self, error):
+        # Lanza el error, o lo acumula si el parser esta en modo recuperacion
+        if not self.recuperar:
+            raise error
+        self.errores.append(error)
     
     def llamada_funcion(self):
         """Procesa llamadas a funciones normales y de librería (printf/scanf)"""
-        if self.obtener_token_actual()[0] in ['IDENTIFIER', 'LIB_FUNCTION']:
-            nombre_funcion = self.coincidir(self.obtener_token_actual()[0])
+        tipo = self.tipo_actual()
+        if tipo == IDENTIFIER or tipo == LIB_FUNCTION:
+            nombre_funcion = self.coincidir(tipo)
         else:
-            raise SyntaxError(f"Se esperaba IDENTIFIER o LIB_FUNCTION, se encontro {self.obtener_token_actual()}")
+            raise self.error(f"Se esperaba IDENTIFIER o LIB_FUNCTION, se encontro {self.obtener_token_actual()}")
         
-        self.coincidir('DELIMITER')  # '('
+        self.consumir(DELIMITER)  # '('
         argumentos = self.argumentos()
-        self.coincidir('DELIMITER')  # ')'
+        self.consumir(DELIMITER)  # ')'
         
         return NodoLlamadaFuncion(nombre_funcion[1], argumentos)
     
@@ -91,45 +403,44 @@ class Parser:
         Procesa los argumentos de una llamada a funcion.
         """
         argumentos = []
-        while self.obtener_token_actual() and self.obtener_token_actual()[1] != ')':  # Mientras no se cierre el parentesis
+        while self.pos < self.n and not self.es(DELIMITER, ')'):  # Mientras no se cierre el parentesis
             argumentos.append(self.expresion_ing())  # Analizar la expresion
-            if self.obtener_token_actual() and self.obtener_token_actual()[1] == ',':
-                self.coincidir('DELIMITER')  # Consumir la coma
+            if self.es(DELIMITER, ','):
+                self.pos += 1  # Consumir la coma
         return argumentos
     
     def funcion(self):
         # Gramatica para una funcion: KEYWORD IDENTIFIER ( PARAMETROS ) { CUERPO }
-        tipo_retorno = self.coincidir('KEYWORD')  # Tipo de retorno (ej. int)
-        nombre_funcion = self.coincidir('IDENTIFIER')  # Nombre de la funcion
-        self.coincidir('DELIMITER')  # Se espera un '('
+        self.consumir(KEYWORD)  # Tipo de retorno (ej. int)
+        nombre_funcion = self.coincidir(IDENTIFIER)  # Nombre de la funcion
+        self.consumir(DELIMITER)  # Se espera un '('
         parametros = self.parametros()  # Analizar los parametros
-        self.coincidir('DELIMITER')  # Se espera un ')'
-        self.coincidir('DELIMITER')  # Se espera un '{'
+        self.consumir(DELIMITER)  # Se espera un ')'
+        self.consumir(DELIMITER)  # Se espera un '{'
         cuerpo = self.cuerpo()  # Analizar el cuerpo de la funcion
-        self.coincidir('DELIMITER')  # Se espera un '}'
+        self.consumir(DELIMITER)  # Se espera un '}'
         return NodoFuncion(nombre_funcion[1], parametros, cuerpo)
 
     def parametros(self):
         parametros = []
         # Reglas para parametros: KEYWORD IDENTIFIER (, KEYWORD IDENTIFIER)*
-        while self.obtener_token_actual() and self.obtener_token_actual()[1] != ')':  # Mientras no se cierre el parentesis
-            tipo = self.coincidir('KEYWORD')  # Tipo del parametro (ej. int)
-            nombre = self.coincidir('IDENTIFIER')  # Nombre del parametro (ej. a)
+        while self.pos < self.n and not self.es(DELIMITER, ')'):  # Mientras no se cierre el parentesis
+            tipo = self.coincidir(KEYWORD)  # Tipo del parametro (ej. int)
+            nombre = self.coincidir(IDENTIFIER)  # Nombre del parametro (ej. a)
             parametros.append(NodoParametro(tipo[1], nombre[1]))  # Guardar el tipo y nombre
-            if self.obtener_token_actual() and self.obtener_token_actual()[1] == ',':
-                self.coincidir('DELIMITER')  # Consumir la coma
+            if self.es(DELIMITER, ','):
+                self.pos += 1  # Consumir la coma
         return parametros
 
     def declaracion(self):
-        tipo = self.coincidir('KEYWORD')  # Tipo de dato (ej. 'int')
-        nombre = self.coincidir('IDENTIFIER')  # Nombre de la variable
+        tipo = self.coincidir(KEYWORD)  # Tipo de dato (ej. 'int')
+        nombre = self.coincidir(IDENTIFIER)  # Nombre de la variable
 
         # Manejar asignacion opcional
-        if self.obtener_token_actual() and self.obtener_token_actual()[1] == '=':
-            self.coincidir('OPERATOR')  # Consumir '='
+        if self.es(OPERATOR, '='):
+            self.pos += 1  # Consumir '='
             # Puede ser una expresion o una llamada a funcion
-            if self.obtener_token_actual()[0] == 'IDENTIFIER' and \
-            self.tokens[self.pos + 1][1] == '(':
+            if self.tipo_actual() == IDENTIFIER and self.es(DELIMITER, '(', 1):
                 expresion = self.llamada_funcion()
             else:
                 expresion = self.expresion_ing()
@@ -137,142 +448,209 @@ class Parser:
         else:
             nodo = NodoDeclaracion(tipo[1], nombre[1])
 
-        self.coincidir('DELIMITER')  # Consumir ';'
+        self.consumir(DELIMITER)  # Consumir ';'
         return nodo
 
     def asignacion(self):
         # Gramatica para el cuerpo: return IDENTIFIER OPERATOR IDENTIFIER;
-        tipo = self.coincidir('KEYWORD') # tipo
-        nombre = self.coincidir('IDENTIFIER') # Identificador <nombre de la variable>
-        self.coincidir('OPERATOR') # Operador ej. =
+        self.consumir(KEYWORD) # tipo
+        nombre = self.coincidir(IDENTIFIER) # Identificador <nombre de la variable>
+        self.consumir(OPERATOR) # Operador ej. =
         expresion = self.expresion_ing()
-        self.coincidir('DELIMITER') # ;
+        self.consumir(DELIMITER) # ;
         return NodoAsignacion(nombre, expresion)
     
     def incremento(self):
         # Gramatica para el cuerpo: return IDENTIFIER OPERATOR OPERATOR;
-        variable = self.coincidir('IDENTIFIER') # Identificador <nombre de la variable>
-        operador1 = self.coincidir('OPERATOR') # Operador ej. ++
-        operador2 = self.coincidir('OPERATOR') # Operador ej. ;
-        if operador1[1] + operador2[1] not in ['++','--']:
-            raise SyntaxError(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {operador1[1],operador2[1]}')
-        return NodoIncremento(variable[1], None, operador1[1] + operador2[1])
+        variable = self.coincidir(IDENTIFIER) # Identificador <nombre de la variable>
+        operador = self.coincidir(OPERATOR) # Operador ej. ++
+        if operador[1] not in ['++','--']:
+            raise self.error(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {operador[1]}', self.pos - 1)
+        return NodoIncremento(variable[1], None, operador[1])
 
         
 
     def retorno(self):
-        self.coincidir('KEYWORD') # return
+        self.consumir(KEYWORD) # return
         expresion = self.expresion_ing()
-        self.coincidir('DELIMITER') # ;
+        self.consumir(DELIMITER) # ;
         return NodoRetorno(expresion)
 
     def cuerpo(self):
-        instrucciones = []  
-        while self.obtener_token_actual() and self.obtener_token_actual()[1] != '}':
-            token_actual = self.obtener_token_actual()
+        instrucciones = []
+        agregar = instrucciones.append
+        tipos, valor, n = self.tipos, self.tokens.valor, self.n
+        sentencias = self.SENTENCIAS_KEYWORD
+        while self.pos < n:
+            # El token actual se lee una sola vez por sentencia
+            pos = self.pos
+            tipo = tipos[pos]
+
+            if tipo == DELIMITER:
+                texto = valor(pos)
+                if texto == '}':
+                    break
+                if texto == ';':
+                    self.pos = pos + 1
+                    continue
+
+            try:
+                if tipo == KEYWORD:
+                    manejador = sentencias.get(valor(pos))
+                    if manejador is None:
+                        raise self.error(f'Error sintactico: Keyword no reconocido: {self.obtener_token_actual()}')
+                    agregar(manejador(self))
+
+                elif tipo == IDENTIFIER:
+                    siguiente = pos + 1
+                    tipo_siguiente = tipos[siguiente] if siguiente < n else None
+                    if tipo_siguiente == DELIMITER and valor(siguiente) == '(':
+                        # Es una llamada a funcion
+                        nombre = self.obtener_token_actual()
+                        llamada = self.llamada_funcion()
+                        # Verificar si es una asignacion (ej: resultado = funcion())
+                        if self.es(OPERATOR, '='):
+                            self.pos += 1
+                            agregar(NodoAsignacion(nombre, llamada))
+                        else:
+                            agregar(llamada)
+                    elif tipo_siguiente == OPERATOR and valor(siguiente) == '=':
+                        # Es una asignacion simple
+                        nombre = self.tokens[pos]
+                        self.pos = siguiente + 1
+                        expresion = self.expresion_ing()
+                        self.consumir(DELIMITER)
+                        agregar(NodoAsignacion(nombre, expresion))
+                    else:
+                        raise self.error(f'Error sintactico: Identificador no seguido de asignacion o llamada: {self.obtener_token_actual()}')
 
-            if token_actual[0] == 'DELIMITER' and token_actual[1] == ';':
-                self.coincidir('DELIMITER')
-                continue
+                elif tipo == NUMBER or tipo == STRING:
+                    agregar(self.expresion_ing())
+                    self.consumir(DELIMITER)
+                    
+                elif tipo == LIB_FUNCTION:  
+                    agregar(self.llamada_funcion())
 
-            if token_actual[0] == 'KEYWORD':
-                if token_actual[1] == 'if':
-                    instrucciones.append(self.bucle_if())
-                elif token_actual[1] == 'const':
-                    instrucciones.append(self.declaracion_constante())  # Metodo para constante
-                elif token_actual[1] == 'print':
-                    instrucciones.append(self.printf_llamada())
-                elif token_actual[1] == 'return':
-                    instrucciones.append(self.retorno())
-                elif token_actual[1] == 'while':
-                    instrucciones.append(self.bucle_while())
-                elif token_actual[1] == 'for':
-                    instrucciones.append(self.bucle_for())
-                elif token_actual[1] in ['int', 'float', 'void', 'double', 'char']:
-                    # Es una declaracion (posiblemente con inicializacion)
-                    instrucciones.append(self.declaracion())
                 else:
-                    raise SyntaxError(f'Error sintactico: Keyword no reconocido: {token_actual}')
-
-            elif token_actual[0] == 'IDENTIFIER':
-                siguiente_token = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
-                if siguiente_token and siguiente_token[1] == '(':
-                    # Es una llamada a funcion
-                    llamada = self.llamada_funcion()
-                    # Verificar si es una asignacion (ej: resultado = funcion())
-                    if self.obtener_token_actual() and self.obtener_token_actual()[1] == '=':
-                        self.coincidir('OPERATOR')
-                        nombre = token_actual
-                        instrucciones.append(NodoAsignacion(nombre, llamada))
-                    else:
-                        instrucciones.append(llamada)
-                elif siguiente_token and siguiente_token[1] == '=':
-                    # Es una asignacion simple
-                    nombre = self.coincidir('IDENTIFIER')
-                    self.coincidir('OPERATOR')
-                    expresion = self.expresion_ing()
-                    self.coincidir('DELIMITER')
-                    instrucciones.append(NodoAsignacion(nombre, expresion))
-                else:
-                    raise SyntaxError(f'Error sintactico: Identificador no seguido de asignacion o llamada: {token_actual}')
+                    raise self.error(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {self.obtener_token_actual()}')
 
-            elif token_actual[0] in ['NUMBER', 'STRING']:
-                instrucciones.append(self.expresion_ing())
-                self.coincidir('DELIMITER')
-                
-            elif token_actual[0] == 'LIB_FUNCTION':  
-                instrucciones.append(self.llamada_funcion())
-
-            else:
-                raise SyntaxError(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {token_actual}')
+            except SyntaxError as error:
+                # Modo recuperacion: registrar el error, descartar la sentencia y seguir
+                if not self.recuperar:
+                    raise
+                self.errores.append(error)
+                self.sincronizar(pos)
 
         return instrucciones
 
+    def sincronizar(self, inicio):
+        """
+        Recuperacion en modo panico: descarta tokens desde el inicio de la
+        sentencia erronea hasta despues del ';' que la cierra o hasta el '}'
+        del bloque actual, que queda para quien lo abrio. Los bloques que se
+        abren por el camino se saltan enteros (junto con sus else).
+        """
+        tipos, valor, n = self.tipos, self.tokens.valor, self.n
+        pos = inicio
+        profundidad = 0
+        while pos < n:
+            if tipos[pos] == DELIMITER:
+                texto = valor(pos)
+                if texto == '{':
+                    profundidad += 1
+                elif texto == '}':
+                    if profundidad == 0:
+                        break
+                    profundidad -= 1
+                    if profundidad == 0:
+                        # Termino un bloque: la sentencia acaba aqui salvo que siga un else
+                        pos += 1
+                        if not (pos < n and tipos[pos] == KEYWORD and valor(pos) == 'else'):
+                            break
+                        continue
+                elif texto == ';' and profundidad == 0:
+                    pos += 1
+                    break
+            pos += 1
+        self.pos = pos
+
+    def sincronizar_funcion(self, inicio):
+        # Tras un error fuera de un cuerpo: saltar hasta la cabecera de la siguiente funcion
+        # (tipo IDENTIFIER '(' justo despues de un '}') o hasta un #include
+        tipos, valor, n = self.tipos, self.tokens.valor, self.n
+        pos = inicio + 1
+        while pos < n:
+            if tipos[pos] == PREPROCESSOR:
+                break
+            if (tipos[pos] == KEYWORD and pos + 2 < n and tipos[pos + 1] == IDENTIFIER
+                    and tipos[pos + 2] == DELIMITER and valor(pos + 2) == '('
+                    and tipos[pos - 1] == DELIMITER and valor(pos - 1) == '}'):
+                break
+            pos += 1
+        self.pos = pos
+
     def declaracion_constante(self):
-        self.coincidir('KEYWORD')  # Consumir 'const'
-        tipo = self.coincidir('KEYWORD')  # Tipo de dato (ej. 'float')
-        nombre = self.coincidir('IDENTIFIER')  # Nombre de la constante
+        self.consumir(KEYWORD)  # Consumir 'const'
+        tipo = self.coincidir(KEYWORD)  # Tipo de dato (ej. 'float')
+        nombre = self.coincidir(IDENTIFIER)  # Nombre de la constante
         
-        self.coincidir('OPERATOR')  # Consumir '='
+        self.consumir(OPERATOR)  # Consumir '='
         
         # Manejar el valor de la constante
-        if self.obtener_token_actual()[0] == 'NUMBER':
-            valor = self.coincidir('NUMBER')
-        elif self.obtener_token_actual()[0] == 'IDENTIFIER':
-            valor = self.coincidir('IDENTIFIER')
+        tipo_valor = self.tipo_actual()
+        if tipo_valor == NUMBER or tipo_valor == IDENTIFIER:
+            valor = self.coincidir(tipo_valor)
         else:
-            raise SyntaxError(f'Error sintactico: Valor no válido para constante {nombre}')
+            raise self.error(f'Error sintactico: Valor no válido para constante {nombre}')
         
-        self.coincidir('DELIMITER')  # Consumir ';'
+        self.consumir(DELIMITER)  # Consumir ';'
         
         return NodoConstante(tipo[1], nombre[1], valor)
     
+    # Precedencia de los operadores binarios (mayor se aplica antes); los demas quedan por debajo
+    PRECEDENCIA = {'*': 5, '/': 5, '+': 4, '-': 4, '<': 3, '>': 3, '<=': 3, '>=': 3,
+                   '==': 2, '!=': 2, '&&': 1, '||': 0}
+
     def expresion_ing(self):
-        izquierda = self.termino()  # Obtener el primer termino
-        while self.obtener_token_actual() and self.obtener_token_actual()[0] == 'OPERATOR':
-            operador = self.coincidir('OPERATOR')
-            derecha = self.termino()
-            izquierda = NodoOperacion(izquierda, operador[1], derecha)
-        return izquierda
+        # Precedence climbing iterativo: pilas explicitas de operandos y operadores, sin recursion
+        precedencia = self.PRECEDENCIA
+        tipos, n = self.tipos, self.n
+        crear = self.fabrica.crear
+        operandos = [self.termino()]  # Obtener el primer termino
+        operadores = []  # (precedencia, operador) pendientes de reducir
+        while self.pos < n and tipos[self.pos] == OPERATOR:
+            operador = self.tokens.valor(self.pos)
+            self.pos += 1
+            nivel = precedencia.get(operador, -1)
+            # Reducir los operadores de igual o mayor precedencia (asociatividad izquierda)
+            while operadores and operadores[-1][0] >= nivel:
+                derecha = operandos.pop()
+                operandos[-1] = crear(NodoOperacion, operandos[-1], operadores.pop()[1], derecha)
+            operadores.append((nivel, operador))
+            operandos.append(self.termino())
+        while operadores:
+            derecha = operandos.pop()
+            operandos[-1] = crear(NodoOperacion, operandos[-1], operadores.pop()[1], derecha)
+        return operandos[0]
 
     def termino(self):
-        token = self.obtener_token_actual()
+        tipo = self.tipo_actual()
         
         # Manejar números negativos
-        if token[0] == 'OPERATOR' and token[1] == '-':
-            self.coincidir('OPERATOR')  # Consumir el '-'
-            numero = self.coincidir('NUMBER')
+        if tipo == OPERATOR and self.valor_actual() == '-':
+            self.pos += 1  # Consumir el '-'
+            numero = self.coincidir(NUMBER)
             # Crear un nodo número con valor negativo
-            return NodoNumero(('NUMBER', '-' + numero[1]))
+            return self.fabrica.crear(NodoNumero, ('NUMBER', '-' + numero[1]))
         
-        if token[0] == 'NUMBER':
-            return NodoNumero(self.coincidir('NUMBER'))
-        elif token[0] == 'IDENTIFIER':
-            return NodoIdentificador(self.coincidir('IDENTIFIER'))
-        elif token[0] == 'STRING':
-            return NodoString(self.coincidir('STRING'))
+        if tipo == NUMBER:
+            return self.fabrica.crear(NodoNumero, self.coincidir(NUMBER))
+        elif tipo == IDENTIFIER:
+            return self.fabrica.crear(NodoIdentificador, self.coincidir(IDENTIFIER))
+        elif tipo == STRING:
+            return self.fabrica.crear(NodoString, self.coincidir(STRING))
         else:
-            raise SyntaxError(f'Error sintactico: Termino no valido {token}')
+            raise self.error(f'Error sintactico: Termino no valido {self.obtener_token_actual()}')
             
     def expresion(self):
         """
@@ -280,60 +658,60 @@ class Parser:
         - x + y * 2
         - "hola" + nombre
         """
-        if self.obtener_token_actual()[0] in ['IDENTIFIER', 'NUMBER', 'STRING']:
-            self.coincidir(self.obtener_token_actual()[0])  # Consumir identificador, numero o cadena
+        if self.tipo_actual() in (IDENTIFIER, NUMBER, STRING):
+            self.pos += 1  # Consumir identificador, numero o cadena
         else:
-            raise SyntaxError(f"Error sintactico: Se esperaba IDENTIFIER, NUMBER o STRING, pero se encontro {self.obtener_token_actual()}")
+            raise self.error(f"Error sintactico: Se esperaba IDENTIFIER, NUMBER o STRING, pero se encontro {self.obtener_token_actual()}")
 
-        while self.obtener_token_actual() and self.obtener_token_actual()[0] in ['OPERATOR']:
-            self.coincidir('OPERATOR')  # Consumir operador
-            if self.obtener_token_actual()[0] in ['IDENTIFIER', 'NUMBER', 'STRING']:
-                self.coincidir(self.obtener_token_actual()[0])  # Consumir identificador, numero o cadena
+        while self.tipo_actual() == OPERATOR:
+            self.pos += 1  # Consumir operador
+            if self.tipo_actual() in (IDENTIFIER, NUMBER, STRING):
+                self.pos += 1  # Consumir identificador, numero o cadena
             else:
-                raise SyntaxError(f"Error sintactico: Se esperaba IDENTIFIER, NUMBER o STRING despues de {self.obtener_token_anterior()}")
+                raise self.error(f"Error sintactico: Se esperaba IDENTIFIER, NUMBER o STRING despues de {self.tokens[self.pos - 1]}")
     
     def bucle_if(self):
         """
         Analiza la estructura de una sentencia if-else if-else.
         """
-        self.coincidir('KEYWORD')  # Se espera un if
-        self.coincidir('DELIMITER')  # Se espera un (
+        self.consumir(KEYWORD)  # Se espera un if
+        self.consumir(DELIMITER)  # Se espera un (
         
         condicion = self.expresion_logica()
         
-        self.coincidir('DELIMITER')  # Se espera un )
-        self.coincidir('DELIMITER')  # Se espera un {
+        self.consumir(DELIMITER)  # Se espera un )
+        self.consumir(DELIMITER)  # Se espera un {
         
         cuerpo_if = self.cuerpo()
         
-        self.coincidir('DELIMITER')  # Se espera un }
+        self.consumir(DELIMITER)  # Se espera un }
         
         cuerpo_else = None
         else_ifs = []
         
-        while self.obtener_token_actual() and self.obtener_token_actual()[1] == 'else':
-            self.coincidir('KEYWORD')  # Se espera un else
+        while self.es(KEYWORD, 'else'):
+            self.pos += 1  # Se espera un else
             
             # Verificar si es un else if
-            if self.obtener_token_actual() and self.obtener_token_actual()[1] == 'if':
-                self.coincidir('KEYWORD')  # Se espera un if
-                self.coincidir('DELIMITER')  # Se espera un (
+            if self.es(KEYWORD, 'if'):
+                self.pos += 1  # Se espera un if
+                self.consumir(DELIMITER)  # Se espera un (
                 
                 condicion_else_if = self.expresion_logica()
                 
-                self.coincidir('DELIMITER')  # Se espera un )
-                self.coincidir('DELIMITER')  # Se espera un {
+                self.consumir(DELIMITER)  # Se espera un )
+                self.consumir(DELIMITER)  # Se espera un {
                 
                 cuerpo_else_if = self.cuerpo()
                 
-                self.coincidir('DELIMITER')  # Se espera un }
+                self.consumir(DELIMITER)  # Se espera un }
                 
                 else_ifs.append((condicion_else_if, cuerpo_else_if))
             else:
                 # Es un else simple
-                self.coincidir('DELIMITER')  # Se espera un {
+                self.consumir(DELIMITER)  # Se espera un {
                 cuerpo_else = self.cuerpo()
-                self.coincidir('DELIMITER')  # Se espera un }
+                self.consumir(DELIMITER)  # Se espera un }
                 break  # No puede haber mas else o else if despues de un else
         
         return NodoIf(condicion, cuerpo_if, cuerpo_else, else_ifs)
@@ -349,45 +727,41 @@ class Parser:
         """
         # Manejar signo negativo para el operando izquierdo
         negativo_izq = False
-        if self.obtener_token_actual()[0] == 'OPERATOR' and self.obtener_token_actual()[1] == '-':
-            self.coincidir('OPERATOR')  # Consumir el '-'
+        if self.es(OPERATOR, '-'):
+            self.pos += 1  # Consumir el '-'
             negativo_izq = True
 
         # Obtener operando izquierdo
-        if self.obtener_token_actual()[0] == 'IDENTIFIER':
-            izquierda = NodoIdentificador(self.coincidir('IDENTIFIER'))
-        elif self.obtener_token_actual()[0] == 'NUMBER':
-            num = self.coincidir('NUMBER')
-            izquierda = NodoNumero(('NUMBER', f"-{num[1]}" if negativo_izq else num[1]))
+        tipo = self.tipo_actual()
+        if tipo == IDENTIFIER:
+            izquierda = self.fabrica.crear(NodoIdentificador, self.coincidir(IDENTIFIER))
+        elif tipo == NUMBER:
+            num = self.coincidir(NUMBER)
+            izquierda = self.fabrica.crear(NodoNumero, ('NUMBER', f"-{num[1]}" if negativo_izq else num[1]))
         else:
-            raise SyntaxError(
+            raise self.error(
                 f"Error sintáctico en expresión lógica: "
                 f"Se esperaba IDENTIFIER o NUMBER, pero se encontró {self.obtener_token_actual()}"
             )
 
-        # Obtener operador (simple o compuesto)
-        operador = self.coincidir('OPERATOR')[1]
-        
-        # Manejar operadores compuestos (==, !=, >=, <=)
-        if self.obtener_token_actual()[0] == 'OPERATOR':
-            posible_op_compuesto = operador + self.obtener_token_actual()[1]
-            if posible_op_compuesto in ['==', '!=', '>=', '<=']:
-                operador += self.coincidir('OPERATOR')[1]
+        # Obtener operador; el lexer ya entrega los compuestos (==, !=, >=, <=) como un solo token
+        operador = self.coincidir(OPERATOR)[1]
 
         # Manejar signo negativo para el operando derecho
         negativo_der = False
-        if self.obtener_token_actual()[0] == 'OPERATOR' and self.obtener_token_actual()[1] == '-':
-            self.coincidir('OPERATOR')
+        if self.es(OPERATOR, '-'):
+            self.pos += 1
             negativo_der = True
 
         # Obtener operando derecho
-        if self.obtener_token_actual()[0] == 'IDENTIFIER':
-            derecha = NodoIdentificador(self.coincidir('IDENTIFIER'))
-        elif self.obtener_token_actual()[0] == 'NUMBER':
-            num = self.coincidir('NUMBER')
-            derecha = NodoNumero(('NUMBER', f"-{num[1]}" if negativo_der else num[1]))
+        tipo = self.tipo_actual()
+        if tipo == IDENTIFIER:
+            derecha = self.fabrica.crear(NodoIdentificador, self.coincidir(IDENTIFIER))
+        elif tipo == NUMBER:
+            num = self.coincidir(NUMBER)
+            derecha = self.fabrica.crear(NodoNumero, ('NUMBER', f"-{num[1]}" if negativo_der else num[1]))
         else:
-            raise SyntaxError(
+            raise self.error(
                 f"Error sintáctico en expresión lógica: "
                 f"Se esperaba IDENTIFIER o NUMBER después del operador, pero se encontró {self.obtener_token_actual()}"
             )
@@ -395,12 +769,12 @@ class Parser:
         # Validar operador permitido
         operadores_permitidos = ['>', '<', '>=', '<=', '==', '!=']
         if operador not in operadores_permitidos:
-            raise SyntaxError(
+            raise self.error(
                 f"Error sintáctico: Operador de comparación no válido '{operador}'. "
                 f"Operadores permitidos: {', '.join(operadores_permitidos)}"
             )
 
-        return NodoComparacion(izquierda, operador, derecha)
+        return self.fabrica.crear(NodoComparacion, izquierda, operador, derecha)
 
     def printf_llamada(self):
         """
@@ -408,28 +782,28 @@ class Parser:
         printf("Mensaje", variable);
         printf(variable);
         """
-        self.coincidir('KEYWORD')  # Se espera un printf
-        self.coincidir('DELIMITER')  # Se espera (
+        self.consumir(KEYWORD)  # Se espera un printf
+        self.consumir(DELIMITER)  # Se espera (
 
         # Se espera una cadena o un identificador como primer argumento
-        token_actual = self.obtener_token_actual()
-        if token_actual[0] == 'STRING' or token_actual[0] == 'IDENTIFIER':
-            self.coincidir(token_actual[0])  # Se espera una cadena o un identificador
+        tipo = self.tipo_actual()
+        if tipo == STRING or tipo == IDENTIFIER:
+            self.pos += 1  # Se espera una cadena o un identificador
         else:
-            raise SyntaxError(f"Error sintactico: Se esperaba STRING o IDENTIFIER, pero se encontro {token_actual}")
+            raise self.error(f"Error sintactico: Se esperaba STRING o IDENTIFIER, pero se encontro {self.obtener_token_actual()}")
 
         # Puede haber mas argumentos separados por comas
-        while self.obtener_token_actual() and self.obtener_token_actual()[1] == ',':
-            self.coincidir('DELIMITER')  # Se espera un ,
+        while self.es(DELIMITER, ','):
+            self.pos += 1  # Se espera un ,
             self.expresion()  # Puede ser un identificador o numero
 
-        self.coincidir('DELIMITER')  # Se espera un )
-        self.coincidir('DELIMITER')  # Se espera un ;
+        self.consumir(DELIMITER)  # Se espera un )
+        self.consumir(DELIMITER)  # Se espera un ;
 
     def bucle_for(self):
         # Regla para bucle for: KEYWORD DELIMITER ASIGNACION DELIMITER EXPRESION_LOGICA DELIMITER INCREMENTO DELIMITER CUERPO DELIMITER
-        self.coincidir('KEYWORD')  # Se espera un for
-        self.coincidir('DELIMITER')  # Se espera un (
+        self.consumir(KEYWORD)  # Se espera un for
+        self.consumir(DELIMITER)  # Se espera un (
         
         inicializacion = self.asignacion()  # Por ejemplo, "int i = 0"
         
@@ -437,62 +811,428 @@ class Parser:
         
         condicion = self.expresion_logica()  # Por ejemplo, "i < 10"
         
-        self.coincidir('DELIMITER')  # Se espera un ;
+        self.consumir(DELIMITER)  # Se espera un ;
         
         incremento = self.incremento()  # Por ejemplo, "i++"
         
-        self.coincidir('DELIMITER')  # Se espera un )
-        self.coincidir('DELIMITER')  # Se espera un {
+        self.consumir(DELIMITER)  # Se espera un )
+        self.consumir(DELIMITER)  # Se espera un {
         
         cuerpo_for = self.cuerpo()  # Cuerpo del bucle
         
-        self.coincidir('DELIMITER')  # Se espera un }
+        self.consumir(DELIMITER)  # Se espera un }
 
         return NodoFor(inicializacion, condicion, incremento, cuerpo_for)
 
     def return_statement(self):
-        self.coincidir('KEYWORD')
+        self.consumir(KEYWORD)
         self.expresion()
-        self.coincidir('DELIMITER')
+        self.consumir(DELIMITER)
 
 
     def break_statement(self):
         """
         Maneja la sentencia break.
         """
-        self.coincidir('KEYWORD')  # Se espera un break
-        self.coincidir('DELIMITER')  # Se espera un ;
+        self.consumir(KEYWORD)  # Se espera un break
+        self.consumir(DELIMITER)  # Se espera un ;
 
     def operador_abreviado(self):
-        self.coincidir('IDENTIFIER')
-        operador_actual1 = self.obtener_token_actual()
-        self.coincidir('OPERATOR')
-        operador_actual2 = self.obtener_token_actual()
-        self.coincidir('OPERATOR')
-        if operador_actual1[1] + operador_actual2[1] not in ['++','--', '+=', '-=', '*=', '/=']:
-            raise SyntaxError(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {operador_actual1[1],operador_actual2[1]}')
-        self.coincidir('DELIMITER')
+        self.consumir(IDENTIFIER)
+        operador_actual = self.coincidir(OPERATOR)
+        if operador_actual[1] not in ['++','--', '+=', '-=', '*=', '/=']:
+            raise self.error(f'Error sintactico: se esperaba una declaracion valida, pero se encontro: {operador_actual[1]}', self.pos - 1)
+        self.consumir(DELIMITER)
 
     def bucle_while(self):
         # Regla para bucle while: KEYWORD DELIMITER EXPRESION_LOGICA DELIMITER DELIMITER CUERPO DELIMITER
-        self.coincidir('KEYWORD') # Se espera un while
-        self.coincidir('DELIMITER') # Se espera un (
+        self.consumir(KEYWORD) # Se espera un while
+        self.consumir(DELIMITER) # Se espera un (
 
         condicion = self.expresion_logica()
 
-        self.coincidir('DELIMITER') # Se espera un )
-        self.coincidir('DELIMITER') # Se espera un {
+        self.consumir(DELIMITER) # Se espera un )
+        self.consumir(DELIMITER) # Se espera un {
 
         cuerpo_while = self.cuerpo()
         
         #self.printf_llamada() 
         #self.increment()
         
-        self.coincidir('DELIMITER')# Se espera un }
+        self.consumir(DELIMITER)# Se espera un }
 
         return NodoWhile(condicion, cuerpo_while)
+
+    # Despacho de sentencias en cuerpo(): keyword -> metodo que la analiza
+    SENTENCIAS_KEYWORD = {
+        'if': bucle_if,
+        'const': declaracion_constante,
+        'print': printf_llamada,
+        'return': retorno,
+        'while': bucle_while,
+        'for': bucle_for,
+        # Declaraciones (posiblemente con inicializacion)
+        'int': declaracion,
+        'float': declaracion,
+        'void': declaracion,
+        'double': declaracion,
+        'char': declaracion,
+    }
     
-def seleccionar_archivo():
+class ParserIncremental:
+    """
+    Reanalisis sintactico por funcion. Guarda el tramo de tokens [inicio, fin)
+    de cada funcion de nivel superior y un hash de su contenido; tras una
+    edicion solo se vuelven a analizar las funciones afectadas y el resto de
+    los NodoFuncion se reutilizan tal cual en el nuevo NodoPrograma.
+    """
+    def __init__(self, tokens):
+        if not isinstance(tokens, FlujoTokens):
+            tokens = FlujoTokens.desde_tuplas(tokens)
+        self.cache = {}  # Hash del contenido de una funcion -> NodoFuncion ya analizado
+        self.reanalizadas = 0  # Funciones analizadas de verdad (no reutilizadas) en la ultima pasada
+        self.programa = self.parsear(tokens)
+
+    def parsear(self, tokens):
+        # Analisis de un flujo completo; las funciones cuyo contenido ya se conoce salen de la cache
+        self.tokens = tokens
+        self.parser = Parser(tokens)
+        self.reanalizadas = 0
+        self.inicios_tramo, self.fines_tramo = array('Q'), array('Q')
+        self.hashes, self.funciones = [], []
+        self.programa = None  # Sin arbol valido la proxima edicion vuelve a analizar todo
+        pos = 0
+        while pos < len(tokens):
+            pos = self.siguiente(pos, self.inicios_tramo, self.fines_tramo, self.hashes, self.funciones)
+        self.programa = self.armar_programa()
+        return self.programa
+
+    def editar(self, inicio, borrados, insertado):
+        """
+        Aplica una edicion de texto (los mismos argumentos que relexear) y
+        devuelve el NodoPrograma actualizado. Se analizan las funciones desde
+        la primera que toca la edicion hasta que una funcion vieja posterior
+        vuelve a quedar alineada; desde ahi se reutilizan todas.
+        """
+        viejo = self.tokens
+        nuevo = relexear(viejo, inicio, borrados, insertado)
+        if self.programa is None or '"' in (insertado if isinstance(insertado, str) else insertado.decode('utf-8')):
+            # Tras un error no hay tramos fiables, y una comilla insertada puede
+            # cerrar un string abierto antes de la edicion: se analiza todo
+            return self.parsear(nuevo)
+        self.tokens = nuevo
+        self.parser = Parser(nuevo)
+        self.reanalizadas = 0
+        self.programa = None
+        delta_tokens = len(nuevo) - len(viejo)
+        delta_texto = len(nuevo.fuente) - len(viejo.fuente)
+        fin_edicion = inicio + borrados
+
+        # Primera funcion afectada: la que contiene (o sigue a) el primer token que llega a la edicion
+        primera = bisect_right(self.fines_tramo, bisect_left(viejo.fines, inicio))
+        pos = self.fines_tramo[primera - 1] if primera else 0
+        inicios, fines, hashes, funciones = array('Q'), array('Q'), [], []
+        reanudar = n_viejas = len(self.funciones)
+        j = primera
+        while pos < len(nuevo):
+            # Resincronizar con la primera funcion vieja que empieza entera detras de la edicion
+            while j < n_viejas and self.inicios_tramo[j] + delta_tokens < pos:
+                j += 1
+            if j < n_viejas and self.inicios_tramo[j] + delta_tokens == pos:
+                viejo_pos = self.inicios_tramo[j]
+                if (viejo.inicios[viejo_pos] >= fin_edicion
+                        and nuevo.inicios[pos] == viejo.inicios[viejo_pos] + delta_texto
+                        and nuevo.fines[pos] == viejo.fines[viejo_pos] + delta_texto
+                        and nuevo.tipos[pos] == viejo.tipos[viejo_pos]):
+                    reanudar = j
+                    break
+            pos = self.siguiente(pos, inicios, fines, hashes, funciones)
+
+        # Empalmar: funciones previas + reanalizadas + posteriores con sus tramos desplazados
+        self.inicios_tramo = (self.inicios_tramo[:primera] + inicios
+                              + array('Q', map(delta_tokens.__add__, self.inicios_tramo[reanudar:])))
+        self.fines_tramo = (self.fines_tramo[:primera] + fines
+                            + array('Q', map(delta_tokens.__add__, self.fines_tramo[reanudar:])))
+        self.hashes[primera:reanudar] = hashes
+        self.funciones[primera:reanudar] = funciones
+        self.programa = self.armar_programa()
+        return self.programa
+
+    def siguiente(self, pos, inicios, fines, hashes, funciones):
+        # Analiza lo que empieza en pos (un #include o una funcion) y devuelve la posicion siguiente
+        parser = self.parser
+        parser.pos = pos
+        if parser.tipos[pos] == PREPROCESSOR:
+            parser.pos += 1  # Consumir #include
+            parser.consumir(HEADER)  # Consumir <stdio.h>
+            return parser.pos
+        fin = self.fin_funcion(pos)
+        clave = self.hash_tramo(pos, fin)
+        funcion = self.cache.get(clave)
+        if funcion is None:
+            funcion = parser.funcion()
+            self.reanalizadas += 1
+            if parser.pos != fin:
+                # Las llaves no delimitan la funcion como la gramatica: manda el parser
+                fin = parser.pos
+                clave = self.hash_tramo(pos, fin)
+            self.cache[clave] = funcion
+        inicios.append(pos)
+        fines.append(fin)
+        hashes.append(clave)
+        funciones.append(funcion)
+        return fin
+
+    def fin_funcion(self, pos):
+        # Indice siguiente a la llave que cierra el primer bloque abierto desde pos
+        tipos, valor, n = self.tokens.tipos, self.tokens.valor, len(self.tokens)
+        profundidad = 0
+        while pos < n:
+            if tipos[pos] == DELIMITER:
+                texto = valor(pos)
+                if texto == '{':
+                    profundidad += 1
+                elif texto == '}':
+                    profundidad -= 1
+                    if profundidad == 0:
+                        return pos + 1
+            pos += 1
+        return n
+
+    def hash_tramo(self, inicio, fin):
+        # Hash de los tipos y textos de los tokens: los espacios no cuentan como cambio
+        tokens = self.tokens
+        resumen = hashlib.blake2b(tokens.tipos[inicio:fin].tobytes(), digest_size=16)
+        resumen.update('\0'.join(map(tokens.valor, range(inicio, fin))).encode('utf-8'))
+        return resumen.digest()
+
+    def armar_programa(self):
+        # La cache conserva solo las funciones actuales (mas algo de holgura para deshacer cambios)
+        if len(self.cache) > 2 * len(self.funciones) + 64:
+            self.cache = dict(zip(self.hashes, self.funciones))
+        self.parser.verificar_main(self.funciones)
+        return NodoPrograma(list(self.funciones))
+
+# === Analisis sintactico en paralelo ===
+MINIMO_PARALELO = 50000  # Por debajo de estos tokens no compensa arrancar procesos
+
+def procesos_disponibles():
+    # CPUs que este proceso puede usar (os.process_cpu_count existe desde Python 3.13)
+    return getattr(os, 'process_cpu_count', os.cpu_count)() or 1
+
+def dividir_funciones(tokens):
+    """
+    Tramos [inicio, fin) de las funciones de nivel superior, hallados solo
+    emparejando llaves: cada tramo termina en la llave que cierra su primer
+    bloque. Los #include <...> entre funciones se validan y se saltan.
+    """
+    tipos, inicios, fuente, n = tokens.tipos, tokens.inicios, tokens.fuente, len(tokens)
+    llave_abre, llave_cierra = ('{', '}') if tokens.es_texto else (ord('{'), ord('}'))
+    delimitadores = re.compile(re.escape(bytes([DELIMITER])))
+    codigos = tipos.tobytes()
+    tramos = []
+    pos = 0
+    while pos < n:
+        if tipos[pos] == PREPROCESSOR:
+            if pos + 1 >= n or tipos[pos + 1] != HEADER:
+                raise Parser(tokens).error(f'Error sintactico: se esperaba HEADER, pero se encontro: {tokens[pos + 1] if pos + 1 < n else None}', pos + 1)
+            pos += 2
+            continue
+        # Saltar de delimitador en delimitador hasta cerrar el primer bloque
+        fin = n
+        profundidad = 0
+        for coincidencia in delimitadores.finditer(codigos, pos):
+            caracter = fuente[inicios[coincidencia.start()]]
+            if caracter == llave_abre:
+                profundidad += 1
+            elif caracter == llave_cierra:
+                profundidad -= 1
+                if profundidad == 0:
+                    fin = coincidencia.start() + 1
+                    break
+        tramos.append((pos, fin))
+        pos = fin
+    return tramos
+
+def parsear_lote(fuente, tipos, inicios, fines):
+    # Tarea de cada proceso: analizar un lote de funciones consecutivas ya recortado
+    parser = Parser(FlujoTokens(fuente, tipos, inicios, fines, con_posiciones=False))
+    funciones = []
+    while parser.pos < parser.n:
+        funciones.append(parser.funcion())
+    return funciones
+
+def parsear_en_paralelo(tokens, procesos=None):
+    """
+    Analiza las funciones de nivel superior en un ProcessPoolExecutor y arma
+    el NodoPrograma en el orden del codigo fuente, con las mismas
+    verificaciones sobre main que Parser.parsear. Si algun lote falla se
+    vuelve a analizar en serie para dar el error exacto con su posicion.
+    """
+    if not isinstance(tokens, FlujoTokens):
+        tokens = FlujoTokens.desde_tuplas(tokens)
+    procesos = procesos or procesos_disponibles()
+    if procesos == 1 or len(tokens) < MINIMO_PARALELO:
+        return Parser(tokens).parsear()
+
+    # Lotes de funciones consecutivas: unos cuantos por proceso para repartir la carga
+    tramos = dividir_funciones(tokens)
+    por_lote = max(1, len(tramos) // (procesos * 4))
+    lotes = []
+    for i in range(0, len(tramos), por_lote):
+        inicio, fin = tramos[i][0], tramos[min(i + por_lote, len(tramos)) - 1][1]
+        # Cada lote viaja con su trozo de fuente y sus arrays rebasados a ese trozo
+        base = tokens.inicios[inicio]
+        desplazar = (-base).__add__
+        lotes.append((tokens.fuente[base:tokens.fines[fin - 1]],
+                      tokens.tipos[inicio:fin],
+                      array(tokens.inicios.typecode, map(desplazar, tokens.inicios[inicio:fin])),
+                      array(tokens.fines.typecode, map(desplazar, tokens.fines[inicio:fin]))))
+
+    recolector = gc.isenabled()
+    gc.disable()  # Los resultados llegan como miles de nodos recien deserializados
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            funciones = [funcion for lote in ejecutor.map(parsear_lote, *zip(*lotes)) for funcion in lote]
+    except SyntaxError:
+        return Parser(tokens).parsear()
+    finally:
+        if recolector:
+            gc.enable()
+
+    Parser(tokens).verificar_main(funciones)
+    return NodoPrograma(funciones)
+
+# === Cache del AST en disco ===
+DIRECTORIO_CACHE = ".cache_ast"
+LIMITE_CACHE = 64 * 1024 * 1024  # Bytes en disco a partir de los cuales se desalojan entradas
+
+MODULOS_BACKEND = ("ir.py", "x86.py", "peephole.py")
+
+def huella_compilador(modulos=()):
+    # Version del compilador: el texto de los modulos que definen tokens, parser y nodos, y los modulos dados
+    resumen = hashlib.blake2b(digest_size=16)
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    for nombre in ("analizador.py", "nodos.py", *modulos):
+        with open(os.path.join(carpeta, nombre), 'rb') as archivo:
+            resumen.update(archivo.read())
+    return resumen.digest()
+
+class CacheAST:
+    """
+    Cache persistente de arboles sintacticos. La clave es el hash del codigo
+    fuente junto con la huella del compilador, asi cualquier cambio en el
+    lexer, el parser o los nodos invalida las entradas viejas. Cada entrada
+    es un NodoPrograma serializado con pickle; al pasar del limite se borran
+    las menos usadas (LRU por fecha de modificacion, renovada en cada acierto).
+    En el mismo directorio se guarda el ensamblador de cada funcion de la
+    ultima compilacion (CacheCodigo), con la huella del backend en el nombre.
+    """
+    def __init__(self, directorio=DIRECTORIO_CACHE, limite=LIMITE_CACHE):
+        self.directorio = directorio
+        self.limite = limite
+        self.huella = huella_compilador()
+
+    def ruta(self, fuente):
+        # Acepta str, bytes o el buffer de una FuenteMapeada
+        resumen = hashlib.blake2b(self.huella, digest_size=20)
+        resumen.update(fuente.encode('utf-8') if isinstance(fuente, str) else fuente)
+        return os.path.join(self.directorio, resumen.hexdigest() + '.ast')
+
+    def cargar(self, fuente):
+        # NodoPrograma guardado para esta fuente, o None si no esta en la cache
+        ruta = self.ruta(fuente)
+        recolector = gc.isenabled()
+        gc.disable()  # Crear miles de nodos seguidos dispararia el recolector una y otra vez
+        try:
+            with open(ruta, 'rb') as archivo:
+                programa = pickle.load(archivo)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Entrada corrupta o escrita por otra version de Python: se descarta
+            self.borrar(ruta)
+            return None
+        finally:
+            if recolector:
+                gc.enable()
+        self.tocar(ruta)
+        return programa
+
+    def ruta_codigo(self):
+        return os.path.join(self.directorio, huella_compilador(MODULOS_BACKEND).hex() + '.codigo')
+
+    def cargar_codigo(self):
+        # CacheCodigo con el ensamblador de la ultima compilacion con este backend (vacia si no hay)
+        cache_codigo = CacheCodigo()
+        ruta = self.ruta_codigo()
+        try:
+            with open(ruta, 'rb') as archivo:
+                cache_codigo.codigos = pickle.load(archivo)
+        except FileNotFoundError:
+            return cache_codigo
+        except Exception:
+            # Entrada corrupta o escrita por otra version de Python: se descarta
+            self.borrar(ruta)
+            return cache_codigo
+        self.tocar(ruta)
+        return cache_codigo
+
+    def guardar_codigo(self, cache_codigo):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self.ruta_codigo()
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'wb') as archivo:
+            pickle.dump(cache_codigo.codigos, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        self.desalojar()
+
+    def guardar(self, fuente, programa):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self.ruta(fuente)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        try:
+            with open(temporal, 'wb') as archivo:
+                pickle.dump(programa, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            # Arbol demasiado profundo para pickle: no se guarda
+            self.borrar(temporal)
+            return
+        os.replace(temporal, ruta)  # Nunca queda una entrada escrita a medias
+        self.desalojar()
+
+    def desalojar(self):
+        # Borrar las entradas menos usadas hasta quedar dentro del limite
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(('.ast', '.codigo')):
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue  # Otro proceso la borro mientras tanto
+                entradas.append((estado.st_mtime_ns, estado.st_size, ruta))
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.limite:
+                break
+            self.borrar(ruta)
+            total -= tamano
+
+    def tocar(self, ruta):
+        # Marcar como usada recientemente; si otro proceso la desalojo despues de leerla, lo leido sigue valiendo
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+
+    def borrar(self, ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+def seleccionar_ruta():
     root = tk.Tk()
     root.withdraw()  
     
@@ -506,81 +1246,111 @@ def seleccionar_archivo():
         if not archivo.lower().endswith('.txt'):
             print("Error: Solo se admite archivo con extension .txt")
             return None
-        try:
-            with open(archivo, 'r', encoding='utf-8') as file:
-                codigo_fuente = file.read()
-            return codigo_fuente
-        except Exception as e:
-            print(f"Error al leer el archivo: {e}")
-            return None
+        return archivo
     else:
         print("No se selecciono ningun archivo")
         return None
 
-# === Codigo en Uso ===
-codigo_fuente = seleccionar_archivo()
-
-# Analisis lexico
-tokens = identificar_tokens(codigo_fuente)
-print("Tokens encontrados:")
-for tipo, valor in tokens:
-    print(f'{tipo}: {valor}')
+def leer_archivo(archivo):
+    try:
+        with open(archivo, 'r', encoding='utf-8') as file:
+            codigo_fuente = file.read()
+        return codigo_fuente
+    except Exception as e:
+        print(f"Error al leer el archivo: {e}")
+        return None
 
-# Analisis Sintactico
-try:
-    print('\nIniciando analisis sintactico...')
-    parser = Parser(tokens)
-    arbol_ast = parser.parsear()
-    print('Analisis sintactico completado sin errores')
+def seleccionar_archivo():
+    archivo = seleccionar_ruta()
+    return leer_archivo(archivo) if archivo else None
+
+class ImpresorAST(Visitante):
+    # Convierte el AST en diccionarios listos para json.dumps; los tipos sin metodo dan {}
+    # Los hijos pasan por hijo(): aqui se convierten enseguida, EscritorJSON los deja para despues
+    def visitar(self, nodo):
+        # Postorden con una pila explicita en las operaciones y comparaciones: una expresion
+        # de miles de terminos no consume marcos de Python
+        resultados = []
+        pendientes = [(nodo, False)]  # (nodo, operandos ya convertidos)
+        while pendientes:
+            actual, listo = pendientes.pop()
+            if not isinstance(actual, NodoAST) or not actual.binaria:
+                resultados.append(super().visitar(actual))
+            elif listo:
+                derecha = resultados.pop()
+                resultados.append(self.binaria(actual, resultados.pop(), derecha))
+            else:
+                pendientes += [(actual, True), (actual.derecha, False), (actual.izquierda, False)]
+        return resultados[0]
+
+    def hijo(self, nodo):
+        return self.visitar(nodo)
+
+    def binaria(self, nodo, izquierda, derecha):
+        # Diccionario de una operacion o una comparacion a partir de sus operandos ya convertidos
+        if type(nodo) is NodoComparacion:
+            return {
+                "Comparacion": {
+                    "Izquierda": izquierda,
+                    "Operador": nodo.operador,
+                    "Derecha": derecha
+                }
+            }
+        return {
+            "Operacion": nodo.operador,
+            "Izquierda": izquierda,
+            "Derecha": derecha
+        }
 
-except SyntaxError as e:
-    print(e)
-    
-def imprimir_ast(nodo):
-    if isinstance(nodo, NodoPrograma):
+    def visitar_NodoPrograma(self, nodo):
         return {
-            "Programa": [imprimir_ast(f) for f in nodo.funciones] 
+            "Programa": [self.hijo(f) for f in nodo.funciones] 
         }
-    elif isinstance(nodo, NodoFuncion):
+
+    def visitar_NodoFuncion(self, nodo):
         return {
             "Funcion": nodo.nombre,
-            "Parametros": [imprimir_ast(p) for p in nodo.parametros],
-            "Cuerpo": [imprimir_ast(c) for c in nodo.cuerpo]
+            "Parametros": [self.hijo(p) for p in nodo.parametros],
+            "Cuerpo": [self.hijo(c) for c in nodo.cuerpo]
         }
-    elif isinstance(nodo, NodoParametro):
+
+    def visitar_NodoParametro(self, nodo):
         return {
             "Parametro": nodo.nombre,
             "Tipo": nodo.tipo
         }
-    elif isinstance(nodo, NodoAsignacion):
+
+    def visitar_NodoAsignacion(self, nodo):
         return {
             "Asignacion": nodo.nombre,
-            "Expresion": imprimir_ast(nodo.expresion)
-        }
-    elif isinstance(nodo, NodoOperacion):
-        return {
-            "Operacion": nodo.operador,
-            "Izquierda": imprimir_ast(nodo.izquierda),
-            "Derecha": imprimir_ast(nodo.derecha)
+            "Expresion": self.hijo(nodo.expresion)
         }
-    elif isinstance(nodo, NodoRetorno):
+
+    def visitar_NodoOperacion(self, nodo):
+        return self.binaria(nodo, self.hijo(nodo.izquierda), self.hijo(nodo.derecha))
+
+    def visitar_NodoRetorno(self, nodo):
         return {
-            "Retorno": imprimir_ast(nodo.expresion)
+            "Retorno": self.hijo(nodo.expresion)
         }
-    elif isinstance(nodo, NodoIdentificador):
+
+    def visitar_NodoIdentificador(self, nodo):
         return {
             "Identificador": nodo.nombre
         }
-    elif isinstance(nodo, NodoNumero):
+
+    def visitar_NodoNumero(self, nodo):
         return {
             "Numero": nodo.valor
         }
-    elif isinstance(nodo, NodoLlamadaFuncion):
+
+    def visitar_NodoLlamadaFuncion(self, nodo):
         return {
             "LlamadaFuncion": nodo.nombre,
-            "Argumentos": [imprimir_ast(arg) for arg in nodo.argumentos]
+            "Argumentos": [self.hijo(arg) for arg in nodo.argumentos]
         }
-    elif isinstance(nodo, NodoConstante):  # Nuevo caso para constantes
+
+    def visitar_NodoConstante(self, nodo):
         return {
             "Constante": {
                 "Nombre": nodo.nombre,
@@ -588,66 +1358,141 @@ def imprimir_ast(nodo):
                 "Valor": nodo.valor[1] if isinstance(nodo.valor, tuple) else nodo.valor
             }
         }
-    elif isinstance(nodo, NodoWhile):
+
+    def visitar_NodoWhile(self, nodo):
         return {
             "While": {
-                "Condicion": imprimir_ast(nodo.condicion),
-                "Cuerpo": [imprimir_ast(c) for c in nodo.cuerpo]
+                "Condicion": self.hijo(nodo.condicion),
+                "Cuerpo": [self.hijo(c) for c in nodo.cuerpo]
             }
         }
-    elif isinstance(nodo, NodoFor):
+
+    def visitar_NodoFor(self, nodo):
         return {
             "For": {
-                "Inicializacion": imprimir_ast(nodo.inicializacion),
-                "Condicion": imprimir_ast(nodo.condicion),
-                "Incremento": imprimir_ast(nodo.incremento),
-                "Cuerpo": [imprimir_ast(c) for c in nodo.cuerpo]
+                "Inicializacion": self.hijo(nodo.inicializacion),
+                "Condicion": self.hijo(nodo.condicion),
+                "Incremento": self.hijo(nodo.incremento),
+                "Cuerpo": [self.hijo(c) for c in nodo.cuerpo]
             }
         }
-    elif isinstance(nodo, NodoIf):
+
+    def visitar_NodoIf(self, nodo):
         return {
             "If": {
-                "Condicion": imprimir_ast(nodo.condicion),
-                "CuerpoIf": [imprimir_ast(c) for c in nodo.cuerpo_if],
+                "Condicion": self.hijo(nodo.condicion),
+                "CuerpoIf": [self.hijo(c) for c in nodo.cuerpo_if],
                 "ElseIfs": [
                     {
-                        "Condicion": imprimir_ast(cond),
-                        "Cuerpo": [imprimir_ast(c) for c in cuerpo]
+                        "Condicion": self.hijo(cond),
+                        "Cuerpo": [self.hijo(c) for c in cuerpo]
                     } for cond, cuerpo in nodo.else_ifs
                 ] if nodo.else_ifs else None,
-                "CuerpoElse": [imprimir_ast(c) for c in nodo.cuerpo_else] if nodo.cuerpo_else else None
+                "CuerpoElse": [self.hijo(c) for c in nodo.cuerpo_else] if nodo.cuerpo_else else None
             }
         }
-    elif isinstance(nodo, NodoIncremento):
+
+    def visitar_NodoIncremento(self, nodo):
         return {
             "Incremento": {
                 "Variable": nodo.variable,
                 "Tipo": nodo.tipo,
-                "Valor": imprimir_ast(nodo.valor) if nodo.valor else None
+                "Valor": self.hijo(nodo.valor) if nodo.valor else None
             }
         }
-    elif isinstance(nodo, NodoComparacion):
-        return {
-            "Comparacion": {
-                "Izquierda": imprimir_ast(nodo.izquierda),
-                "Operador": nodo.operador,
-                "Derecha": imprimir_ast(nodo.derecha)
-            }
-        }
-    return {}
 
-def guardar_archivo(codigo_ensamblador, nombre_archivo="programa.s"):
+    def visitar_NodoComparacion(self, nodo):
+        return self.binaria(nodo, self.hijo(nodo.izquierda), self.hijo(nodo.derecha))
+
+    def visitar_otro(self, nodo):
+        return {}
+
+impresor_ast = ImpresorAST()
+
+def imprimir_ast(nodo):
+    return impresor_ast.visitar(nodo)
+
+class EscritorJSON(ImpresorAST):
     """
-    Guarda el codigo ensamblador en un archivo .s en la misma carpeta,
-    agregando automaticamente las secciones .data y .text con las declaraciones
-    basicas, usando _main para compatibilidad con MinGW en Windows.
-    
-    Args:
-        codigo_ensamblador (str): El codigo ensamblador generado.
-        nombre_archivo (str): Nombre del archivo de salida (por defecto "programa.s").
+    Escribe en un stream el mismo JSON que json.dumps(imprimir_ast(nodo), indent=...)
+    sin construir el arbol de diccionarios: cada nodo se convierte en un
+    diccionario de un solo nivel cuyos hijos siguen siendo nodos, y esos
+    hijos se escriben al llegar a ellos. En memoria solo quedan los nodos
+    del camino actual y un buffer de tamano fijo.
     """
-    # Encabezado con las declaraciones basicas para MinGW
-    encabezado = """
+    LIMITE_BUFFER = 4096  # Fragmentos acumulados antes de escribir en el stream
+    visitar = Visitante.visitar  # Un nodo por vez: sus hijos los recorre valor() con su propia pila
+
+    def __init__(self, salida, indent=1):
+        self.salida = salida
+        self.indent = ' ' * indent if isinstance(indent, int) else indent
+        self.partes = []
+
+    def hijo(self, nodo):
+        # Los nodos se escriben al llegar a ellos; lo demas (None) se convierte como en imprimir_ast
+        return nodo if isinstance(nodo, NodoAST) else self.visitar(nodo)
+
+    def escribir(self, nodo):
+        self.valor(nodo, 0)
+        self.vaciar()
+
+    def emitir(self, texto):
+        self.partes.append(texto)
+        if len(self.partes) >= self.LIMITE_BUFFER:
+            self.vaciar()
+
+    def vaciar(self):
+        self.salida.write(''.join(self.partes))
+        self.partes.clear()
+
+    def valor(self, valor, nivel):
+        # Mismas reglas de sangria y separadores que json con indent. Sin recursion: cada
+        # diccionario o lista abierto es un marco [elementos pendientes, cierre, nivel, separador]
+        marcos = []
+        while True:
+            if isinstance(valor, NodoAST):
+                valor = self.visitar(valor)
+            if isinstance(valor, dict) and valor:
+                self.emitir('{')
+                marcos.append([iter(valor.items()), '}', nivel, '\n' + self.indent * (nivel + 1)])
+            elif isinstance(valor, (list, tuple)) and valor:
+                self.emitir('[')
+                marcos.append([iter(valor), ']', nivel, '\n' + self.indent * (nivel + 1)])
+            elif isinstance(valor, dict):
+                self.emitir('{}')
+            elif isinstance(valor, (list, tuple)):
+                self.emitir('[]')
+            elif isinstance(valor, str):
+                self.emitir(encode_basestring_ascii(valor))  # El codificador de cadenas que usa json.dumps
+            else:
+                self.emitir(json.dumps(valor))
+
+            # Siguiente elemento del marco mas interno que no se haya terminado
+            while marcos:
+                marco = marcos[-1]
+                for elemento in marco[0]:
+                    break
+                else:
+                    marcos.pop()
+                    self.emitir('\n' + self.indent * marco[2] + marco[1])
+                    continue
+                self.emitir(marco[3])
+                if marco[3][0] == '\n':
+                    marco[3] = ',' + marco[3]  # Los demas elementos van tras una coma
+                if marco[1] == '}':
+                    clave, elemento = elemento
+                    self.emitir(encode_basestring_ascii(clave) + ': ')
+                valor, nivel = elemento, marco[2] + 1
+                break
+            else:
+                return
+
+def volcar_ast(nodo, salida, indent=1):
+    # Version en flujo de salida.write(json.dumps(imprimir_ast(nodo), indent=indent))
+    EscritorJSON(salida, indent).escribir(nodo)
+
+# Encabezado con las declaraciones basicas para MinGW
+ENCABEZADO_MINGW = """
     section .data
         ; Variables enteras (32 bits)
         x          dd 0       ; Define 'x' como entero de 32 bits
@@ -672,47 +1517,240 @@ def guardar_archivo(codigo_ensamblador, nombre_archivo="programa.s"):
 
     """
 
+def adaptar_mingw(codigo):
     # Reemplazar 'main' por '_main' y 'condicional' por '_condicional' en el código generado
-    codigo_adaptado = codigo_ensamblador.replace('main:', '_main:')
+    codigo_adaptado = codigo.replace('main:', '_main:')
     codigo_adaptado = codigo_adaptado.replace('condicional:', '_condicional:')
     codigo_adaptado = codigo_adaptado.replace('call condicional', 'call _condicional')
     codigo_adaptado = codigo_adaptado.replace('calcular_circunferencia:', 'calcular_circunferencia')
     codigo_adaptado = codigo_adaptado.replace('call calcular_circunferencia', 'call _calcular_circunferencia')
+    return codigo_adaptado
+
+def guardar_archivo(codigo_ensamblador, nombre_archivo="programa.s"):
+    """
+    Guarda el codigo ensamblador en un archivo .s en la misma carpeta,
+    agregando automaticamente las secciones .data y .text con las declaraciones
+    basicas, usando _main para compatibilidad con MinGW en Windows.
+    
+    Args:
+        codigo_ensamblador (str): El codigo ensamblador generado.
+        nombre_archivo (str): Nombre del archivo de salida (por defecto "programa.s").
+    """
+    codigo_adaptado = adaptar_mingw(codigo_ensamblador)
 
     try:
         with open(nombre_archivo, "w") as archivo:
             # Escribir el encabezado primero
-            archivo.write(encabezado)
+            archivo.write(ENCABEZADO_MINGW)
             # Luego el código ensamblador adaptado
             archivo.write(codigo_adaptado)
         print(f"Codigo ensamblador guardado en '{nombre_archivo}' (adaptado para MinGW)")
     except Exception as e:
         print(f"Error al guardar el archivo: {e}")
 
-parser = Parser(tokens)
-arbol_ast = parser.parsear()    
-print(json.dumps(imprimir_ast(arbol_ast), indent=1))
-
-
-# nodo_exp = NodoOperacion(NodoNumero(5), '+', NodoNumero(8))
-# print("Expresion original:", nodo_exp)
-
-# exp_opt = nodo_exp.optimizar()
-# print("Expresion optimizada:", exp_opt)
-
-# codigo_python = arbol_ast.traducir()
-# print(codigo_python)
-
-codigo_asm = arbol_ast.generar_codigo()
-print(codigo_asm)
+def generar_ensamblador(programa, cache_codigo, peephole, mostrar_ir=None):
+    """
+    Ensamblador del programa a traves de cache_codigo (CacheCodigo). Solo las
+    funciones que no estan en la cache se bajan a la representacion
+    intermedia y pasan por el backend x86 y el peephole; mostrar_ir, si se
+    da, recibe la FuncionIR de cada una de ellas.
+    """
+    def generar(funcion):
+        funcion_ir = funcion.generar_ir()
+        if mostrar_ir is not None:
+            mostrar_ir(funcion_ir)
+        return texto_lineas(peephole.optimizar(lineas_x86(funcion_ir)))
+    return cache_codigo.generar_codigo(programa, generar)
+
+# === Compilacion en flujo ===
+CAPACIDAD_COLA = 8  # Funciones en vuelo entre dos etapas
+FIN_FLUJO = None  # Centinela que cierra cada cola
+
+def etapa_flujo(procesar, entrada, salida, errores):
+    # Hilo de una etapa: procesa cada elemento y lo pasa a la siguiente cola.
+    # Tras un error sigue vaciando la entrada para que las etapas previas no se bloqueen.
+    while True:
+        elemento = entrada.get()
+        if elemento is FIN_FLUJO:
+            break
+        if errores:
+            continue
+        try:
+            elemento = procesar(elemento)
+        except Exception as error:
+            errores.append(error)
+            continue
+        if salida is not None:
+            salida.put(elemento)
+    if salida is not None:
+        salida.put(FIN_FLUJO)
+
+def compilar_en_flujo(tokens, nombre_archivo="programa.s", capacidad=CAPACIDAD_COLA, peephole=None):
+    """
+    Compila funcion a funcion: el parser produce cada NodoFuncion y este pasa
+    por el analisis semantico, generar_codigo y la escritura del archivo, cada
+    etapa en su hilo y unidas por colas acotadas. Asi solo viven en memoria
+    unas pocas funciones a la vez, sea cual sea el tamano del archivo.
+    El archivo se escribe en uno temporal y solo se reemplaza si no hubo
+    errores sintacticos. Con un Peephole, el codigo de cada funcion pasa por
+    el antes de escribirse. Devuelve el AnalizadorSemantico y su primer error
+    (o None), igual que el recorrido del programa completo.
+    """
+    parser = Parser(tokens)
+    analizador_semantico = AnalizadorSemantico()
+    errores_semanticos = []
+    errores = []
+
+    def analizar(funcion):
+        # Como con el programa completo: tras el primer error semantico no se analiza mas
+        if not errores_semanticos:
+            try:
+                analizador_semantico.analizar(funcion)
+            except RecursionError:
+                raise  # No es un error del programa: compilar_en_flujo la vuelve a lanzar
+            except Exception as error:
+                errores_semanticos.append(error)
+        return funcion
+
+    def generar(funcion):
+        if peephole is None:
+            return funcion.generar_codigo() + "\n\n"
+        return texto_lineas(peephole.optimizar(funcion.generar_lineas())) + "\n\n"
+
+    temporal = f'{nombre_archivo}.{os.getpid()}.tmp'
+    with open(temporal, "w") as archivo:
+        archivo.write(ENCABEZADO_MINGW)
+        colas = [queue.Queue(capacidad) for _ in range(3)]
+        etapas = [(analizar, colas[0], colas[1]),
+                  (generar, colas[1], colas[2]),
+                  (lambda codigo: archivo.write(adaptar_mingw(codigo)), colas[2], None)]
+        hilos = [threading.Thread(target=etapa_flujo, args=(procesar, entrada, salida, errores), daemon=True)
+                 for procesar, entrada, salida in etapas]
+        for hilo in hilos:
+            hilo.start()
+
+        # Etapa 1, en este hilo: el parser entrega las funciones de una en una
+        existe_main = False
+        ultima = None
+        try:
+            for funcion in parser.iter_funciones(por_funcion=True):
+                existe_main = existe_main or funcion.nombre == 'main'
+                ultima = funcion.nombre
+                colas[0].put(funcion)
+            # Las mismas verificaciones sobre main, recordando solo dos datos
+            parser.verificar_nombres_main(existe_main, ultima)
+        except SyntaxError as error:
+            errores.append(error)
+        finally:
+            colas[0].put(FIN_FLUJO)
+            for hilo in hilos:
+                hilo.join()
+
+    if errores:
+        os.remove(temporal)
+        raise errores[0]
+    os.replace(temporal, nombre_archivo)
+    return analizador_semantico, errores_semanticos[0] if errores_semanticos else None
 
-print("Codigo ensamblador generado:\n", codigo_asm)
-guardar_archivo(codigo_asm)
+# === Codigo en Uso ===
+if __name__ == "__main__":
+    ruta = seleccionar_ruta()
+
+    if ruta and os.path.getsize(ruta) >= UMBRAL_MMAP:
+        # Archivo grande: se lexea sobre el mmap sin copiar el texto a un str y se compila
+        # funcion a funcion, sin listar tokens, AST ni ensamblador, para que la memoria no crezca
+        # El mmap y su archivo se cierran en cuanto termina la compilacion
+        with FuenteMapeada(ruta) as fuente:
+            tokens = flujo_tokens(fuente.buffer)
+            peephole = Peephole()
+            try:
+                analizador_semantico, error_semantico = compilar_en_flujo(tokens, peephole=peephole)
+            except SyntaxError:
+                # Una pasada en modo recuperacion para informar todos los errores juntos
+                parser = Parser(tokens, recuperar=True)
+                parser.parsear()
+                for e in parser.errores:
+                    print(e)
+                raise SystemExit(1)
+        print(peephole.informe())
+        print("Codigo ensamblador guardado en 'programa.s' (adaptado para MinGW)")
+        if error_semantico is None:
+            print("\nTabla de simbolos:")
+            print(analizador_semantico.tabla_simbolos)
+        else:
+            print(f"\nError semantico: {error_semantico}")
+    else:
+        codigo_fuente = leer_archivo(ruta) if ruta else None
 
-analizador_semantico = AnalizadorSemantico()
-try:
-    analizador_semantico.analizar(arbol_ast)
-    print("\nTabla de simbolos:")
-    print(analizador_semantico.tabla_simbolos)
-except Exception as e:
-    print(f"\nError semantico: {e}")
\ No newline at end of file
+        # Si la fuente no cambio desde la ultima compilacion, el AST sale de la cache
+        cache_ast = CacheAST()
+        arbol_ast = cache_ast.cargar(codigo_fuente) if codigo_fuente is not None else None
+        if arbol_ast is not None:
+            print('AST cargado desde la cache: se omite el analisis lexico y sintactico')
+        else:
+            # Analisis lexico
+            tokens = flujo_tokens(codigo_fuente)
+            print("Tokens encontrados:")
+            for tipo, valor in tokens:
+                print(f'{tipo}: {valor}')
+
+            # Analisis Sintactico
+            print('\nIniciando analisis sintactico...')
+            try:
+                # A partir de MINIMO_PARALELO tokens las funciones se analizan en varios procesos
+                arbol_ast = parsear_en_paralelo(tokens)
+            except SyntaxError:
+                # Todos los errores de una sola pasada; sin arbol completo no se genera codigo
+                parser = Parser(tokens, recuperar=True)
+                parser.parsear()
+                for e in parser.errores:
+                    print(e)
+                raise SystemExit(1)
+            print('Analisis sintactico completado sin errores')
+            cache_ast.guardar(codigo_fuente, arbol_ast)
+
+        volcar_ast(arbol_ast, sys.stdout)
+        print()
+
+
+        # nodo_exp = NodoOperacion(NodoNumero(5), '+', NodoNumero(8))
+        # print("Expresion original:", nodo_exp)
+
+        # exp_opt = nodo_exp.optimizar()
+        # print("Expresion optimizada:", exp_opt)
+
+        # codigo_python = arbol_ast.traducir()
+        # print(codigo_python)
+
+        # Representacion intermedia, backend x86 y optimizacion peephole funcion a funcion.
+        # Las funciones cuyo AST no cambio desde la compilacion anterior salen de la cache
+        # sin volver a bajarse: solo se muestra la representacion intermedia de las demas
+        peephole = Peephole()
+        cache_codigo = cache_ast.cargar_codigo()
+        textos_ir = []
+        codigo_asm = generar_ensamblador(arbol_ast, cache_codigo, peephole,
+                                         lambda funcion_ir: textos_ir.append(funcion_ir.a_texto()))
+        cache_ast.guardar_codigo(cache_codigo)
+        if textos_ir:
+            print("Representacion intermedia:")
+            print("\n\n".join(textos_ir))
+            print()
+        print(codigo_asm)
+
+        print("Codigo ensamblador generado:\n", codigo_asm)
+        if cache_codigo.regeneradas:
+            # Con todas las funciones en la cache el peephole no llego a correr: no hay nada que informar
+            print(peephole.informe())
+        print(f"Codigo generado para {cache_codigo.regeneradas} de {len(arbol_ast.funciones)} funciones; "
+              f"el resto sale de la cache")
+        guardar_archivo(codigo_asm)
+
+        analizador_semantico = AnalizadorSemantico()
+        try:
+            analizador_semantico.analizar(arbol_ast)
+            print("\nTabla de simbolos:")
+            print(analizador_semantico.tabla_simbolos)
+        except RecursionError:
+            raise
+        except Exception as e:
+            print(f"\nError semantico: {e}")
@@ -0,0 +1,188 @@
+"""
+AST plano en arena: en lugar de un grafo de objetos, los nodos viven en
+arrays paralelos y se referencian por indice entero.
+
+    tipos[i]          codigo de la clase del nodo i (o LISTA / TUPLA)
+    inicio[i]         posicion de su primer campo en 'campos'; inicio[i + 1] marca el final
+    campos[k]         indice de un nodo hijo (>= 0), NINGUNO (-1) para None,
+                      o -2 - c para la constante c de 'constantes'
+
+Los nodos van en postorden: cada hijo tiene un indice menor que su padre y
+la raiz es la ultima entrada. Un nodo compartido (las expresiones internadas
+por FabricaNodos) se guarda una sola vez y todos sus padres apuntan a la
+misma entrada, asi que la arena es un grafo aciclico, no un arbol. Las
+constantes (nombres, operadores, tuplas de token como ('NUMBER', '5'))
+tambien se guardan una sola vez, distinguiendo su tipo ademas de su valor.
+Los campos de cada clase siguen el orden fijado en FORMATO_NODOS.
+"""
+from array import array
+import nodos
+from nodos import *
+
+# Formato de cada clase de nodo en la arena: su codigo de tipo y el orden de sus campos (sin la
+# huella de las expresiones, que se deriva de sus campos y no ocupa sitio). Es parte del formato
+# de los archivos guardados, asi que no depende del orden de nodos.py ni del de los __slots__:
+# una clase nueva toma el siguiente codigo libre y ningun codigo existente se reordena ni se reutiliza
+FORMATO_NODOS = (
+    ('NodoFuncion', ('nombre', 'parametros', 'cuerpo')),
+    ('NodoParametro', ('tipo', 'nombre')),
+    ('NodoAsignacion', ('nombre', 'expresion')),
+    ('NodoOperacion', ('izquierda', 'operador', 'derecha')),
+    ('NodoRetorno', ('expresion',)),
+    ('NodoIdentificador', ('nombre',)),
+    ('NodoNumero', ('valor',)),
+    ('NodoLlamadaFuncion', ('nombre', 'argumentos')),
+    ('NodoPrograma', ('funciones',)),
+    ('NodoString', ('valor',)),
+    ('NodoDeclaracion', ('tipo', 'nombre')),
+    ('NodoWhile', ('condicion', 'cuerpo')),
+    ('NodoFor', ('inicializacion', 'condicion', 'incremento', 'cuerpo')),
+    ('NodoIf', ('condicion', 'cuerpo_if', 'cuerpo_else', 'else_ifs')),
+    ('NodoIncremento', ('variable', 'valor', 'tipo')),
+    ('NodoComparacion', ('izquierda', 'operador', 'derecha')),
+    ('NodoConstante', ('tipo', 'nombre', 'valor')),
+)
+TIPOS_NODO = tuple(getattr(nodos, nombre) for nombre, _ in FORMATO_NODOS)
+CODIGO_NODO = {clase: codigo for codigo, clase in enumerate(TIPOS_NODO)}
+CAMPOS_NODO = tuple(campos for _, campos in FORMATO_NODOS)
+CON_HUELLA = tuple('huella' in clase.__slots__ for clase in TIPOS_NODO)
+# Listas de nodos (cuerpos, argumentos) y tuplas con nodos (los else if) tambien son entradas de la
+# arena, con codigos fijos al final del rango de un byte
+LISTA = 0xFE
+TUPLA = 0xFF
+
+def comprobar_formato():
+    # Un cambio en nodos.py que no se refleje en FORMATO_NODOS leeria mal los archivos ya guardados
+    for clase in vars(nodos).values():
+        if isinstance(clase, type) and issubclass(clase, NodoAST) and clase is not NodoAST:
+            if clase not in CODIGO_NODO:
+                raise TypeError(f"{clase.__name__} no tiene codigo en FORMATO_NODOS")
+            campos = tuple(campo for campo in clase.__slots__ if campo != 'huella')
+            if campos != CAMPOS_NODO[CODIGO_NODO[clase]]:
+                raise TypeError(f"Los campos de {clase.__name__} no coinciden con FORMATO_NODOS")
+
+comprobar_formato()
+NINGUNO = -1
+
+class ArenaAST:
+    def __init__(self, tipos, inicio, campos, constantes):
+        self.tipos = tipos
+        self.inicio = inicio
+        self.campos = campos
+        self.constantes = constantes
+
+    @classmethod
+    def desde_nodos(cls, raiz):
+        # Aplana un arbol de Nodo* en postorden, con una pila explicita (sin limite de recursion)
+        tipos, inicio, campos = array('B'), array('I'), array('i')
+        constantes, codigo_constante = [], {}
+        indices = {}  # id() de cada nodo, lista o tupla ya guardada -> su indice
+
+        def es_estructura(valor):
+            return isinstance(valor, (NodoAST, list)) or \
+                (isinstance(valor, tuple) and any(isinstance(v, (NodoAST, list)) for v in valor))
+
+        def codificar(valor):
+            # Codigo de un campo que no es estructura: None o una constante compartida
+            if valor is None:
+                return NINGUNO
+            clave = (type(valor), valor)  # 1, 1.0 y True son claves iguales en un dict
+            codigo = codigo_constante.get(clave)
+            if codigo is None:
+                codigo = codigo_constante[clave] = -2 - len(constantes)
+                constantes.append(valor)
+            return codigo
+
+        def hijos_de(valor):
+            if isinstance(valor, NodoAST):
+                tipo = CODIGO_NODO[type(valor)]
+                return tipo, [getattr(valor, campo) for campo in CAMPOS_NODO[tipo]]
+            return (LISTA if isinstance(valor, list) else TUPLA), valor
+
+        pendientes = [(raiz, False)]  # (valor, hijos ya guardados)
+        while pendientes:
+            valor, listo = pendientes.pop()
+            if id(valor) in indices:
+                continue  # Compartido: ya se guardo al encontrarlo por otro padre
+            tipo, hijos = hijos_de(valor)
+            if not listo:
+                pendientes.append((valor, True))
+                # En orden inverso para que los hijos reciban indices crecientes de izquierda a derecha
+                pendientes.extend((hijo, False) for hijo in reversed(hijos)
+                                  if es_estructura(hijo) and id(hijo) not in indices)
+                continue
+            indices[id(valor)] = len(tipos)
+            tipos.append(tipo)
+            inicio.append(len(campos))
+            campos.extend([indices[id(hijo)] if es_estructura(hijo) else codificar(hijo) for hijo in hijos])
+        inicio.append(len(campos))
+        return cls(tipos, inicio, campos, constantes)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def hijos(self, indice):
+        # Codigos de los campos del nodo indice
+        return self.campos[self.inicio[indice]:self.inicio[indice + 1]]
+
+    def valor(self, codigo):
+        # Constante o None de un codigo de campo negativo
+        return None if codigo == NINGUNO else self.constantes[-2 - codigo]
+
+    def campo(self, indice, nombre):
+        # Codigo del campo 'nombre' del nodo indice (indice de nodo si es >= 0)
+        return self.campos[self.inicio[indice] + CAMPOS_NODO[self.tipos[indice]].index(nombre)]
+
+    def raiz(self):
+        return len(self.tipos) - 1
+
+    def recorrer(self, raiz=None):
+        # Indices de los nodos del subarbol en preorden, sin recursion; un nodo compartido sale en cada uso
+        pendientes = [self.raiz() if raiz is None else raiz]
+        while pendientes:
+            indice = pendientes.pop()
+            yield indice
+            pendientes.extend(codigo for codigo in reversed(self.hijos(indice)) if codigo >= 0)
+
+    def contar_tipos(self):
+        # Nodos por clase: un recorrido lineal de un solo array
+        conteo = [0] * (TUPLA + 1)
+        for tipo in self.tipos:
+            conteo[tipo] += 1
+        nombres = {LISTA: 'lista', TUPLA: 'tupla'}
+        return {(nombres[tipo] if tipo in nombres else TIPOS_NODO[tipo].__name__): total
+                for tipo, total in enumerate(conteo) if total}
+
+    def a_nodos(self, raiz=None, fabrica=None):
+        """
+        Reconstruye los Nodo*. Los hijos siempre tienen indice menor que su
+        padre, asi que basta recorrer la arena de adelante hacia atras; una
+        entrada compartida da un mismo objeto para todos sus padres. Con una
+        FabricaNodos las expresiones se vuelven a internar.
+        """
+        tipos, inicio, campos, constantes = self.tipos, self.inicio, self.campos, self.constantes
+        if raiz is None or raiz == self.raiz():
+            indices = range(len(tipos))
+        else:
+            indices = sorted(set(self.recorrer(raiz)))
+        objetos = {}
+        for indice in indices:
+            valores = [objetos[codigo] if codigo >= 0 else
+                       (None if codigo == NINGUNO else constantes[-2 - codigo])
+                       for codigo in campos[inicio[indice]:inicio[indice + 1]]]
+            tipo = tipos[indice]
+            if tipo == LISTA:
+                objetos[indice] = valores
+            elif tipo == TUPLA:
+                objetos[indice] = tuple(valores)
+            else:
+                clase = TIPOS_NODO[tipo]
+                if CON_HUELLA[tipo]:
+                    # El constructor recalcula la huella
+                    objetos[indice] = fabrica.crear(clase, *valores) if fabrica else clase(*valores)
+                    continue
+                nodo = clase.__new__(clase)
+                for nombre, valor in zip(CAMPOS_NODO[tipo], valores):
+                    setattr(nodo, nombre, valor)
+                objetos[indice] = nodo
+        return objetos[indices[-1]]
@@ -0,0 +1,203 @@
+"""
+Formato binario compacto del AST, con un indice de funciones al principio
+para poder cargar una sola funcion sin decodificar el resto del archivo.
+
+    cabecera   MAGIA (6 bytes) y numero de funciones (uint32)
+    indice     por funcion: desplazamiento y longitud de su bloque (uint64, uint32)
+    nombres    longitud (uint32) y las constantes con los nombres de funcion
+    bloques    la ArenaAST de cada funcion
+
+Cada bloque empieza con el numero de entradas, de campos y los bytes de
+constantes (3 x uint32); siguen los arrays tipos, inicio y campos tal cual
+(en little-endian) y la lista de constantes. Todos los enteros del formato
+son little-endian.
+
+Las constantes no usan marshal, cuyo formato cambia entre versiones de
+Python: cada una es una etiqueta de un byte seguida de su valor,
+
+    N F T      None, False, True
+    i          entero: longitud (uint32) y sus digitos decimales en ASCII
+    f          real: double IEEE 754
+    s          str: longitud (uint32) y el texto en UTF-8
+    t          tupla: numero de elementos (uint32) y cada elemento
+
+precedidas por su numero (uint32). Los codigos de tipo de los nodos son los
+fijados en arena.FORMATO_NODOS.
+"""
+import sys
+import mmap
+import struct
+from array import array
+from arena import ArenaAST
+from nodos import NodoPrograma, FabricaNodos
+
+MAGIA = b'ASTB\x00\x03'  # Version 3: codigos de nodo fijos y constantes sin marshal
+CABECERA = struct.Struct('<6sI')
+ENTRADA_INDICE = struct.Struct('<QI')
+LONGITUD = struct.Struct('<I')
+CABECERA_BLOQUE = struct.Struct('<III')
+TAMANO_INICIO = array('I').itemsize
+TAMANO_CAMPO = array('i').itemsize
+REAL = struct.Struct('<d')
+NULO, FALSO, VERDADERO, ENTERO, FLOTANTE, TEXTO, TUPLA = b'NFTifst'
+
+def a_bytes(arreglo):
+    if sys.byteorder == 'big':
+        arreglo = array(arreglo.typecode, arreglo)
+        arreglo.byteswap()
+    return arreglo.tobytes()
+
+def desde_bytes(tipo, datos):
+    arreglo = array(tipo, datos)
+    if sys.byteorder == 'big':
+        arreglo.byteswap()
+    return arreglo
+
+def codificar_constantes(valores):
+    # Las tuplas se escriben en preorden con una pila explicita: su numero de elementos y luego cada uno
+    partes = [LONGITUD.pack(len(valores))]
+    pendientes = list(reversed(valores))
+    while pendientes:
+        valor = pendientes.pop()
+        if valor is None:
+            partes.append(bytes((NULO,)))
+        elif isinstance(valor, bool):
+            partes.append(bytes((VERDADERO if valor else FALSO,)))
+        elif isinstance(valor, int):
+            digitos = str(valor).encode('ascii')
+            partes += [bytes((ENTERO,)), LONGITUD.pack(len(digitos)), digitos]
+        elif isinstance(valor, float):
+            partes += [bytes((FLOTANTE,)), REAL.pack(valor)]
+        elif isinstance(valor, str):
+            texto = valor.encode('utf-8', 'surrogatepass')
+            partes += [bytes((TEXTO,)), LONGITUD.pack(len(texto)), texto]
+        elif isinstance(valor, tuple):
+            partes += [bytes((TUPLA,)), LONGITUD.pack(len(valor))]
+            pendientes.extend(reversed(valor))
+        else:
+            raise TypeError(f"No se puede guardar la constante {valor!r}")
+    return b''.join(partes)
+
+def decodificar_constantes(datos):
+    # Lista de constantes; cada tupla abierta es un marco (elementos leidos, elementos que tiene)
+    total, = LONGITUD.unpack_from(datos)
+    pos = LONGITUD.size
+    marcos = [([], total)]
+    while True:
+        elementos, total = marcos[-1]
+        if len(elementos) == total:
+            marcos.pop()
+            if not marcos:
+                return elementos
+            marcos[-1][0].append(tuple(elementos))
+            continue
+        etiqueta = datos[pos]
+        pos += 1
+        if etiqueta == NULO:
+            elementos.append(None)
+        elif etiqueta in (FALSO, VERDADERO):
+            elementos.append(etiqueta == VERDADERO)
+        elif etiqueta == FLOTANTE:
+            elementos.append(REAL.unpack_from(datos, pos)[0])
+            pos += REAL.size
+        elif etiqueta in (ENTERO, TEXTO):
+            longitud, = LONGITUD.unpack_from(datos, pos)
+            pos += LONGITUD.size
+            texto = bytes(datos[pos:pos + longitud])
+            pos += longitud
+            elementos.append(int(texto) if etiqueta == ENTERO else texto.decode('utf-8', 'surrogatepass'))
+        elif etiqueta == TUPLA:
+            total, = LONGITUD.unpack_from(datos, pos)
+            pos += LONGITUD.size
+            marcos.append(([], total))
+        else:
+            raise ValueError(f"Etiqueta de constante desconocida: {etiqueta}")
+
+def codificar_funcion(funcion):
+    # Bloque de una funcion: su arena con sus constantes
+    arena = ArenaAST.desde_nodos(funcion)
+    constantes = codificar_constantes(arena.constantes)
+    return b''.join((CABECERA_BLOQUE.pack(len(arena.tipos), len(arena.campos), len(constantes)),
+                     arena.tipos.tobytes(), a_bytes(arena.inicio), a_bytes(arena.campos), constantes))
+
+def decodificar_funcion(datos, fabrica=None):
+    n_entradas, n_campos, n_constantes = CABECERA_BLOQUE.unpack_from(datos)
+    pos = CABECERA_BLOQUE.size
+    tipos = array('B', datos[pos:pos + n_entradas])
+    pos += n_entradas
+    fin = pos + (n_entradas + 1) * TAMANO_INICIO
+    inicio = desde_bytes('I', datos[pos:fin])
+    pos, fin = fin, fin + n_campos * TAMANO_CAMPO
+    campos = desde_bytes('i', datos[pos:fin])
+    constantes = decodificar_constantes(datos[fin:fin + n_constantes])
+    return ArenaAST(tipos, inicio, campos, constantes).a_nodos(fabrica=fabrica)
+
+def escribir_ast(programa, ruta):
+    """
+    Guarda el programa en formato binario. Los bloques se escriben uno a
+    uno y el indice se completa al final, asi nunca esta todo el archivo
+    en memoria.
+    """
+    funciones = programa.funciones
+    nombres = codificar_constantes([funcion.nombre for funcion in funciones])
+    with open(ruta, 'wb') as archivo:
+        archivo.write(CABECERA.pack(MAGIA, len(funciones)))
+        archivo.write(bytes(ENTRADA_INDICE.size * len(funciones)))  # Se reescribe al final
+        archivo.write(LONGITUD.pack(len(nombres)))
+        archivo.write(nombres)
+        indice = []
+        for funcion in funciones:
+            bloque = codificar_funcion(funcion)
+            indice.append(ENTRADA_INDICE.pack(archivo.tell(), len(bloque)))
+            archivo.write(bloque)
+        archivo.seek(CABECERA.size)
+        archivo.write(b''.join(indice))
+
+class LectorAST:
+    """
+    Lector perezoso de un AST binario: proyecta el archivo en memoria (mmap)
+    y solo lee la cabecera y el indice; cada funcion se decodifica cuando se
+    pide. Las expresiones de las funciones cargadas comparten una FabricaNodos.
+    """
+    def __init__(self, ruta):
+        self.archivo = open(ruta, 'rb')
+        self.mapa = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, n_funciones = CABECERA.unpack_from(self.mapa)
+        if magia != MAGIA:
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un AST binario")
+        fin_indice = CABECERA.size + ENTRADA_INDICE.size * n_funciones
+        self.indice = list(ENTRADA_INDICE.iter_unpack(self.mapa[CABECERA.size:fin_indice]))
+        self.inicio_nombres = fin_indice
+        self.posiciones = None  # nombre -> posicion, se arma la primera vez que se busca por nombre
+        self.fabrica = FabricaNodos()
+
+    def __len__(self):
+        return len(self.indice)
+
+    def nombres(self):
+        longitud, = LONGITUD.unpack_from(self.mapa, self.inicio_nombres)
+        inicio = self.inicio_nombres + LONGITUD.size
+        return tuple(decodificar_constantes(self.mapa[inicio:inicio + longitud]))
+
+    def funcion(self, clave):
+        # NodoFuncion por posicion o por nombre; solo se leen los bytes de su bloque
+        if isinstance(clave, str):
+            if self.posiciones is None:
+                self.posiciones = {nombre: posicion for posicion, nombre in enumerate(self.nombres())}
+            clave = self.posiciones[clave]
+        desplazamiento, longitud = self.indice[clave]
+        return decodificar_funcion(self.mapa[desplazamiento:desplazamiento + longitud], self.fabrica)
+
+    def programa(self):
+        return NodoPrograma([self.funcion(posicion) for posicion in range(len(self.indice))])
+
+    def cerrar(self):
+        self.mapa.close()
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
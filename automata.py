@@ -0,0 +1,357 @@
+"""
+Analizador lexico dirigido por tabla.
+Compila los patrones de token_patron en un automata finito determinista
+(DFA) y lexea la entrada en un solo ciclo, sin probar las alternativas
+una por una. Las palabras reservadas (KEYWORD, LIB_FUNCTION) no forman
+parte del automata: se reconocen como IDENTIFIER y se reclasifican con
+una busqueda en un diccionario.
+"""
+import re
+from array import array
+from analizador import token_patron, FlujoTokens
+
+# Caracter representativo de los simbolos no ASCII: Lexer compila el texto con re.ASCII,
+# asi que ninguna expresion de token_patron distingue un caracter no ASCII de otro
+REPRESENTANTE_UNICODE = '\u00e9'
+
+# Patron de una lista de palabras fijas, por ejemplo \b(?:if|else|while)\b
+PATRON_PALABRAS = re.compile(r'\\b\((?:\?:)?([A-Za-z0-9_]+(?:\|[A-Za-z0-9_]+)*)\)\\b')
+
+class ParserRegex:
+    """
+    Analiza el subconjunto de la sintaxis de re usado por token_patron:
+    alternativas, grupos, clases de caracteres, escapes, *, + y ?, y \\b.
+    Cada conjunto de caracteres se resuelve con el propio modulo re, asi que
+    su significado coincide con el del lexer basado en expresiones regulares.
+    """
+    def __init__(self, patron, conjunto):
+        self.patron = patron
+        self.pos = 0
+        self.conjunto = conjunto  # texto de una clase -> frozenset de simbolos
+
+    def parsear(self):
+        nodo = self.alternativa()
+        if self.pos != len(self.patron):
+            raise ValueError(f"Expresion no soportada en el DFA: {self.patron!r}")
+        return nodo
+
+    def siguiente(self):
+        return self.patron[self.pos] if self.pos < len(self.patron) else None
+
+    def alternativa(self):
+        ramas = [self.secuencia()]
+        while self.siguiente() == '|':
+            self.pos += 1
+            ramas.append(self.secuencia())
+        return ('alt', ramas) if len(ramas) > 1 else ramas[0]
+
+    def secuencia(self):
+        elementos = []
+        while self.siguiente() not in (None, '|', ')'):
+            elementos.append(self.cuantificado())
+        return ('concat', elementos)
+
+    def cuantificado(self):
+        nodo = self.atomo()
+        while self.siguiente() in ('*', '+', '?'):
+            nodo = (self.siguiente(), nodo)
+            self.pos += 1
+        return nodo
+
+    def atomo(self):
+        caracter = self.siguiente()
+        if caracter == '(':
+            self.pos += 1
+            if self.patron.startswith('?:', self.pos):
+                self.pos += 2
+            elif self.patron.startswith('?P<', self.pos):
+                self.pos = self.patron.index('>', self.pos) + 1
+            nodo = self.alternativa()
+            if self.siguiente() != ')':
+                raise ValueError(f"Parentesis sin cerrar en {self.patron!r}")
+            self.pos += 1
+            return nodo
+        if caracter == '[':
+            fin = self.pos + 1
+            if self.patron.startswith('^', fin):
+                fin += 1
+            if self.patron.startswith(']', fin):
+                fin += 1
+            while self.patron[fin] != ']':
+                fin += 2 if self.patron[fin] == '\\' else 1
+            texto = self.patron[self.pos:fin + 1]
+            self.pos = fin + 1
+            return ('conjunto', self.conjunto(texto))
+        if caracter == '\\':
+            escape = self.patron[self.pos + 1]
+            self.pos += 2
+            if escape == 'b':
+                return ('limite',)
+            return ('conjunto', self.conjunto('\\' + escape))
+        if caracter in ('^', '$', '{', ')'):
+            raise ValueError(f"Expresion no soportada en el DFA: {self.patron!r}")
+        self.pos += 1
+        return ('conjunto', self.conjunto('.' if caracter == '.' else re.escape(caracter)))
+
+class NFA:
+    # Automata no determinista de Thompson; 'limites' son transiciones \b sin consumir
+    def __init__(self):
+        self.vacias = []
+        self.limites = []
+        self.transiciones = []
+
+    def nuevo_estado(self):
+        self.vacias.append([])
+        self.limites.append([])
+        self.transiciones.append([])
+        return len(self.vacias) - 1
+
+    def construir(self, nodo):
+        # Devuelve (inicio, fin) del fragmento que reconoce el nodo
+        inicio, fin = self.nuevo_estado(), self.nuevo_estado()
+        clase = nodo[0]
+        if clase == 'conjunto':
+            self.transiciones[inicio].append((nodo[1], fin))
+        elif clase == 'limite':
+            self.limites[inicio].append(fin)
+        elif clase == 'concat':
+            actual = inicio
+            for elemento in nodo[1]:
+                a, b = self.construir(elemento)
+                self.vacias[actual].append(a)
+                actual = b
+            self.vacias[actual].append(fin)
+        elif clase == 'alt':
+            for rama in nodo[1]:
+                a, b = self.construir(rama)
+                self.vacias[inicio].append(a)
+                self.vacias[b].append(fin)
+        else:
+            a, b = self.construir(nodo[1])
+            self.vacias[inicio].append(a)
+            self.vacias[b].append(fin)
+            if clase in ('*', '?'):
+                self.vacias[inicio].append(fin)
+            if clase in ('*', '+'):
+                self.vacias[b].append(a)
+        return inicio, fin
+
+class TablaDFA:
+    """
+    Automata determinista en tablas planas indexadas por estado * n_clases + clase.
+    Un estado recuerda si el caracter anterior era de palabra, para decidir los \\b.
+    - transiciones: estado siguiente o -1 si no hay transicion
+    - aceptacion: tipo aceptado antes de leer esa clase (-1 si ninguno)
+    - aceptacion_fin: tipo aceptado al llegar al final de la entrada
+    """
+    def __init__(self, nfa, inicio, finales, clases_palabra):
+        self.n_clases = len(clases_palabra)
+        self.transiciones = array('i')
+        self.aceptacion = array('i')
+        self.aceptacion_fin = array('i')
+        numeros = {}
+        pendientes = []
+
+        def numero(clave):
+            if clave not in numeros:
+                numeros[clave] = len(numeros)
+                pendientes.append(clave)
+            return numeros[clave]
+
+        def clausura(estados, anterior, siguiente):
+            # \b se cumple cuando exactamente uno de los dos caracteres es de palabra
+            vistos = set(estados)
+            pila = list(estados)
+            while pila:
+                estado = pila.pop()
+                destinos = nfa.vacias[estado] + nfa.limites[estado] if anterior != siguiente else nfa.vacias[estado]
+                for destino in destinos:
+                    if destino not in vistos:
+                        vistos.add(destino)
+                        pila.append(destino)
+            return vistos
+
+        def aceptado(estados):
+            tipos = [finales[estado] for estado in estados if estado in finales]
+            return min(tipos) if tipos else -1
+
+        self.inicio_no_palabra = numero((frozenset([inicio]), False))
+        self.inicio_palabra = numero((frozenset([inicio]), True))
+        while pendientes:
+            clave = pendientes.pop(0)  # Los numeros de estado siguen el orden de descubrimiento
+            estados, anterior = clave
+            for clase, es_palabra in enumerate(clases_palabra):
+                alcanzados = clausura(estados, anterior, es_palabra)
+                self.aceptacion.append(aceptado(alcanzados))
+                siguientes = frozenset(destino for estado in alcanzados
+                                       for simbolos, destino in nfa.transiciones[estado] if clase in simbolos)
+                self.transiciones.append(numero((siguientes, es_palabra)) if siguientes else -1)
+            self.aceptacion_fin.append(aceptado(clausura(estados, anterior, False)))
+        self.n_estados = len(numeros)
+
+        # Vista enlazada para el ciclo de lexeo: cada fila contiene directamente las filas
+        # destino (None si no hay transicion), seguidas de su fila de aceptacion y la del final
+        n = self.n_clases
+        self.filas = [[None] * n for _ in range(self.n_estados)]
+        for estado, fila in enumerate(self.filas):
+            for clase in range(n):
+                destino = self.transiciones[estado * n + clase]
+                fila[clase] = self.filas[destino] if destino >= 0 else None
+            fila.append(list(self.aceptacion[estado * n:(estado + 1) * n]))
+            fila.append(self.aceptacion_fin[estado])
+
+class LexerDFA:
+    """
+    Analizador lexico generado a partir de token_patron. Produce el mismo
+    flujo de tokens que Lexer: la coincidencia mas larga gana y, a igual
+    longitud, el patron que aparece primero.
+    """
+    def __init__(self, patrones=None):
+        self.patrones = patrones if patrones is not None else token_patron
+        self.nombres = tuple(self.patrones)
+        self.codigo_espacio = self.nombres.index("WHITESPACE") if "WHITESPACE" in self.nombres else -1
+        self.automatas = {}  # Uno para str y otro para bytes: un caracter no ASCII es un simbolo o varios bytes
+
+    def automata(self, modo_bytes):
+        if modo_bytes not in self.automatas:
+            self.automatas[modo_bytes] = self.generar(modo_bytes)
+        return self.automatas[modo_bytes]
+
+    def generar(self, modo_bytes):
+        # Simbolos: cada byte en modo bytes; ASCII y un simbolo para todo lo demas en modo str
+        if modo_bytes:
+            representantes = [bytes([i]) for i in range(256)]
+        else:
+            representantes = [chr(i) for i in range(128)] + [REPRESENTANTE_UNICODE]
+        conjuntos = {}
+
+        def conjunto(texto):
+            if texto not in conjuntos:
+                regex = re.compile(texto.encode('latin-1')) if modo_bytes else re.compile(texto, re.ASCII)
+                conjuntos[texto] = frozenset(i for i, r in enumerate(representantes) if regex.fullmatch(r))
+            return conjuntos[texto]
+
+        # Las listas de palabras fijas se resuelven con un diccionario despues del DFA
+        palabras = {}
+        nfa = NFA()
+        inicio = nfa.nuevo_estado()
+        finales = {}
+        for codigo, (tipo, patron) in enumerate(self.patrones.items()):
+            lista = PATRON_PALABRAS.fullmatch(patron)
+            if lista:
+                for palabra in lista.group(1).split('|'):
+                    palabras.setdefault(palabra, codigo)
+                continue
+            a, b = nfa.construir(ParserRegex(patron, conjunto).parsear())
+            nfa.vacias[inicio].append(a)
+            finales[b] = codigo
+        palabra = conjunto(r'\w')
+
+        # Clases de equivalencia: simbolos que ningun conjunto distingue
+        todos = list(conjuntos.values())
+        firmas = {}
+        clase_de = []
+        for simbolo in range(len(representantes)):
+            firma = tuple(simbolo in c for c in todos) + (simbolo in palabra,)
+            clase_de.append(firmas.setdefault(firma, len(firmas)))
+        clases_palabra = [firma[-1] for firma in firmas]
+        for estado, transiciones in enumerate(nfa.transiciones):
+            nfa.transiciones[estado] = [(frozenset(clase_de[s] for s in simbolos), destino)
+                                        for simbolos, destino in transiciones]
+        tabla = TablaDFA(nfa, inicio, finales, clases_palabra)
+        tabla.es_palabra = bytes(clases_palabra)
+
+        if modo_bytes:
+            tabla.traduccion = bytes(clase_de)
+        else:
+            tabla.traduccion = TraduccionUnicode(clase_de)
+
+        # Una palabra fija solo reemplaza al tipo del DFA si su patron aparece antes
+        tabla.reservadas = {}
+        for texto, codigo in palabras.items():
+            clases = bytes(clase_de[ord(c)] for c in texto)
+            reconocido = next(self.escanear(clases, tabla), None)
+            if reconocido and reconocido[1:] == (0, len(texto)) and codigo < reconocido[0]:
+                clave = texto.encode('latin-1') if modo_bytes else texto
+                tabla.reservadas.setdefault(reconocido[0], {})[clave] = codigo
+        return tabla
+
+    def clases(self, fuente, tabla):
+        # Traduce la entrada a un byte de clase por caracter en una sola pasada en C
+        if isinstance(fuente, str):
+            return fuente.translate(tabla.traduccion).encode('latin-1')
+        clases = bytearray(len(fuente))
+        for inicio in range(0, len(fuente), 1 << 24):
+            bloque = fuente[inicio:inicio + (1 << 24)]
+            clases[inicio:inicio + len(bloque)] = bytes(bloque).translate(tabla.traduccion)
+        return clases
+
+    def escanear(self, clases, tabla):
+        # Ciclo unico: se avanza mientras haya transicion y se acepta donde el automata se detiene
+        n_clases, es_palabra = tabla.n_clases, tabla.es_palabra
+        fila_palabra = tabla.filas[tabla.inicio_palabra]
+        fila_no_palabra = tabla.filas[tabla.inicio_no_palabra]
+        n = len(clases)
+        i = 0
+        while i < n:
+            fila = fila_palabra if i and es_palabra[clases[i - 1]] else fila_no_palabra
+            j = i
+            while j < n:
+                siguiente = fila[clases[j]]
+                if siguiente is None:
+                    break
+                fila = siguiente
+                j += 1
+            tipo = fila[n_clases][clases[j]] if j < n else fila[n_clases + 1]
+            if tipo < 0:
+                # Caso raro (ej. '1.5x'): retroceder a la ultima posicion que si aceptaba
+                inicial = tabla.inicio_palabra if i and es_palabra[clases[i - 1]] else tabla.inicio_no_palabra
+                j, tipo = self.ultima_aceptacion(clases, tabla, inicial, i, j)
+                if tipo < 0:
+                    i += 1  # Como finditer: el caracter que no inicia ningun token se ignora
+                    continue
+            yield tipo, i, j
+            i = j
+
+    def ultima_aceptacion(self, clases, tabla, estado, i, fin):
+        ultimo, tipo = i, -1
+        for j in range(i, fin):
+            indice = estado * tabla.n_clases + clases[j]
+            if tabla.aceptacion[indice] >= 0:
+                ultimo, tipo = j, tabla.aceptacion[indice]
+            estado = tabla.transiciones[indice]
+        return ultimo, tipo
+
+    def flujo_tokens(self, fuente):
+        tabla = self.automata(not isinstance(fuente, str))
+        formato = 'I' if len(fuente) < 2 ** 32 else 'Q'
+        tipos, inicios, fines = array('B'), array(formato), array(formato)
+        espacio, reservadas = self.codigo_espacio, tabla.reservadas
+        for tipo, inicio, fin in self.escanear(self.clases(fuente, tabla), tabla):
+            if tipo == espacio:
+                continue
+            if tipo in reservadas:
+                tipo = reservadas[tipo].get(fuente[inicio:fin], tipo)
+            tipos.append(tipo)
+            inicios.append(inicio)
+            fines.append(fin)
+        return FlujoTokens(fuente, tipos, inicios, fines, self.nombres)
+
+    def identificar_tokens(self, texto):
+        return list(self.flujo_tokens(texto))
+
+class TraduccionUnicode(dict):
+    # Tabla para str.translate: ASCII precalculado, cualquier otro caracter va a la clase del representante
+    def __init__(self, clase_de):
+        super().__init__((i, chr(clase_de[i])) for i in range(128))
+        self.otro = chr(clase_de[128])
+
+    def __missing__(self, codigo):
+        self[codigo] = self.otro
+        return self.otro
+
+# Instancia compartida: cada automata se genera la primera vez que se usa
+lexer_dfa = LexerDFA()
+
+def flujo_tokens_dfa(fuente):
+    return lexer_dfa.flujo_tokens(fuente)
@@ -0,0 +1,299 @@
+"""
+Representacion intermedia de tres direcciones entre el AST y el
+ensamblador. Cada funcion es un grafo de flujo de control explicito: una
+lista de BloqueBasico en el orden en que se escriben, cada uno con sus
+instrucciones y un terminador (saltar, ramificar o retornar) que fija sus
+sucesores.
+
+    t2 = t1 + x          InstruccionIR('+', t2, (t1, Variable('x')))
+    x = t2               InstruccionIR('copiar', Variable('x'), (t2,))
+    ramificar t3 B1 B2   InstruccionIR('ramificar', None, (t3, B1, B2))
+
+Los operandos son Temporales (registros virtuales, sin limite), Variables
+y Constantes. El primer operando de una operacion siempre es un Temporal;
+el segundo puede ser tambien una variable o un entero. Un Temporal se
+define y se usa dentro de un mismo bloque. Los nodos del AST se bajan a
+esta forma con ConstructorIR y cada backend (x86.py) la traduce a su
+ensamblador sin conocer los nodos.
+"""
+from itertools import count
+
+TERMINADORES = ('saltar', 'ramificar', 'retornar')
+
+class Temporal:
+    __slots__ = ('numero',)
+    def __init__(self, numero):
+        self.numero = numero
+
+    def __str__(self):
+        return f"t{self.numero}"
+
+class Variable:
+    __slots__ = ('nombre',)
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __str__(self):
+        return self.nombre
+
+class Constante:
+    __slots__ = ('valor', 'tipo')
+    def __init__(self, valor, tipo):
+        self.valor = valor  # Texto del literal, como en el fuente
+        self.tipo = tipo  # 'entero', 'flotante' o 'cadena'
+
+    def __str__(self):
+        return self.valor
+
+def tipo_numero(literal):
+    return 'flotante' if '.' in literal or 'f' in literal.lower() else 'entero'
+
+class InstruccionIR:
+    """
+    operacion es 'copiar', un operador ('+', '-', '*', '/', '>', '<',
+    '>=', '<=', '==', '!='), 'llamar' (operandos: nombre y numero de
+    argumentos, pasados antes con 'param'), 'apilar' / 'desapilar' (un
+    valor espera en la pila), 'declarar' / 'constante' (datos, sin
+    codigo) o un terminador.
+    """
+    __slots__ = ('operacion', 'destino', 'operandos', 'comentario')
+    def __init__(self, operacion, destino, operandos, comentario=None):
+        self.operacion = operacion
+        self.destino = destino
+        self.operandos = operandos
+        self.comentario = comentario
+
+    def a_texto(self):
+        operacion, destino, operandos = self.operacion, self.destino, self.operandos
+        if operacion == 'copiar':
+            return f"{destino} = {operandos[0]}"
+        if operacion == 'llamar':
+            llamada = f"llamar {operandos[0]}, {operandos[1]}"
+            return f"{destino} = {llamada}" if destino is not None else llamada
+        if operacion == 'desapilar':
+            return f"{destino} = desapilar"
+        if operacion == 'saltar':
+            return f"saltar {operandos[0].etiqueta()}"
+        if operacion == 'ramificar':
+            condicion, verdadero, falso = operandos
+            return f"ramificar {condicion} {verdadero.etiqueta()} {falso.etiqueta()}"
+        if destino is None:
+            return " ".join([operacion] + [str(operando) for operando in operandos])
+        return f"{destino} = {operandos[0]} {operacion} {operandos[1]}"
+
+class BloqueBasico:
+    __slots__ = ('numero', 'nombre', 'comentario', 'instrucciones', 'terminador', 'predecesores')
+    def __init__(self, numero, nombre=None, comentario=None):
+        self.numero = numero
+        self.nombre = nombre  # Etiqueta del bloque; los que no la llevan se nombran B<numero>
+        self.comentario = comentario
+        self.instrucciones = []
+        self.terminador = None
+        self.predecesores = []
+
+    def etiqueta(self):
+        return self.nombre if self.nombre is not None else f"B{self.numero}"
+
+    def sucesores(self):
+        if self.terminador is None or self.terminador.operacion == 'retornar':
+            return ()
+        if self.terminador.operacion == 'saltar':
+            return self.terminador.operandos
+        return self.terminador.operandos[1:]
+
+class FuncionIR:
+    def __init__(self, nombre):
+        self.nombre = nombre  # None para el codigo de un nodo suelto, sin prologo ni epilogo
+        self.bloques = []  # En el orden en que se escriben; el primero es la entrada
+
+    def enlazar(self):
+        # Completa los predecesores a partir de los terminadores
+        for bloque in self.bloques:
+            bloque.predecesores = []
+        for bloque in self.bloques:
+            for sucesor in bloque.sucesores():
+                sucesor.predecesores.append(bloque)
+
+    def alcanzables(self):
+        # Bloques a los que se llega desde la entrada, en el orden de la funcion
+        vistos = set()
+        pendientes = [self.bloques[0]] if self.bloques else []
+        while pendientes:
+            bloque = pendientes.pop()
+            if bloque.numero in vistos:
+                continue
+            vistos.add(bloque.numero)
+            pendientes.extend(bloque.sucesores())
+        return [bloque for bloque in self.bloques if bloque.numero in vistos]
+
+    def a_texto(self):
+        lineas = [f"funcion {self.nombre}"]
+        for bloque in self.bloques:
+            predecesores = ", ".join(p.etiqueta() for p in bloque.predecesores)
+            lineas.append(f"  {bloque.etiqueta()}:" + (f"  ; desde {predecesores}" if predecesores else ""))
+            lineas.extend(f"    {instruccion.a_texto()}" for instruccion in bloque.instrucciones)
+            if bloque.terminador is not None:
+                lineas.append(f"    {bloque.terminador.a_texto()}")
+        return "\n".join(lineas)
+
+class ProgramaIR:
+    def __init__(self, funciones):
+        self.funciones = funciones
+
+    def a_texto(self):
+        return "\n\n".join(funcion.a_texto() for funcion in self.funciones)
+
+class ConstructorIR:
+    """
+    Baja el AST a tres direcciones. Los nodos llaman a sus metodos: las
+    sentencias con a_ir(constructor), las expresiones a traves de
+    evaluar(), que recorre el arbol con una pila explicita en el orden de
+    Sethi-Ullman (primero el hijo que necesita mas registros). Si el
+    segundo hijo necesita todos los registros del backend, el primer valor
+    espera en la pila (apilar / desapilar).
+    """
+    def __init__(self, registros=4):
+        self.registros = registros  # Registros del backend para temporales
+        self.necesidades = {}  # Expresion -> registros que necesita (numeracion de Sethi-Ullman)
+        self.funciones = []
+        self.funcion = None
+        self.bloque = None
+        self.temporales = count()
+        self.bloques = count()
+        self.etiquetas = count()
+
+    def abrir_funcion(self, nombre):
+        self.funcion = FuncionIR(nombre)
+        self.temporales = count()
+        self.bloques = count()
+        self.etiquetas = count()  # Numeros de etiqueta; cada funcion vuelve a empezar desde 0
+        self.empezar(self.nuevo_bloque(nombre))
+
+    def cerrar_funcion(self):
+        # Una funcion que llega al final sin return retorna sin valor
+        if self.bloque.terminador is None:
+            self.retornar(None)
+        funcion = self.funcion
+        funcion.enlazar()
+        self.funciones.append(funcion)
+        self.funcion = self.bloque = None
+        return funcion
+
+    def nuevo_bloque(self, nombre=None, comentario=None):
+        return BloqueBasico(next(self.bloques), nombre, comentario)
+
+    def empezar(self, bloque):
+        # Los bloques quedan en la funcion en el orden en que se empiezan
+        self.funcion.bloques.append(bloque)
+        self.bloque = bloque
+
+    def numero_etiqueta(self):
+        return next(self.etiquetas)
+
+    def temporal(self):
+        return Temporal(next(self.temporales))
+
+    def emitir(self, operacion, destino, *operandos, comentario=None):
+        bloque = self.bloque
+        if bloque.terminador is not None:
+            # Codigo tras un return o un salto: va a un bloque nuevo, al que no llega ningun salto
+            bloque = self.nuevo_bloque()
+            self.empezar(bloque)
+        bloque.instrucciones.append(InstruccionIR(operacion, destino, operandos, comentario))
+
+    def terminar(self, operacion, *operandos, comentario=None):
+        if self.bloque.terminador is not None:
+            self.empezar(self.nuevo_bloque())
+        self.bloque.terminador = InstruccionIR(operacion, None, operandos, comentario)
+
+    def saltar(self, destino, comentario=None):
+        self.terminar('saltar', destino, comentario=comentario)
+
+    def ramificar(self, condicion, verdadero, falso, comentario=None):
+        self.terminar('ramificar', condicion, verdadero, falso, comentario=comentario)
+
+    def retornar(self, valor, comentario=None):
+        self.terminar('retornar', *(() if valor is None else (valor,)), comentario=comentario)
+
+    def sentencias(self, nodos):
+        for nodo in nodos:
+            nodo.a_ir(self)
+
+    def necesidad(self, nodo):
+        # Registros para evaluar la expresion; un operando derecho directo no ocupa ninguno. Sin recursion
+        necesidades = self.necesidades
+        if nodo in necesidades:
+            return necesidades[nodo]
+        pendientes = [nodo]
+        while pendientes:
+            actual = pendientes[-1]
+            if actual in necesidades:
+                pendientes.pop()
+                continue
+            if not actual.binaria:
+                necesidades[actual] = 1
+                pendientes.pop()
+                continue
+            izquierda, derecha = actual.izquierda, actual.derecha
+            faltan = [hijo for hijo in (izquierda, derecha) if hijo not in necesidades]
+            if faltan:
+                pendientes.extend(faltan)
+                continue
+            pendientes.pop()
+            n_izquierda = necesidades[izquierda]
+            n_derecha = 0 if derecha.operando() is not None else necesidades[derecha]
+            necesidades[actual] = n_izquierda + 1 if n_izquierda == n_derecha else max(n_izquierda, n_derecha)
+        return necesidades[nodo]
+
+    def combinar(self, nodo, izquierda, derecha):
+        # Operaciones y comparaciones: una instruccion con el operador del nodo
+        destino = self.temporal()
+        self.emitir(nodo.operador, destino, izquierda, derecha)
+        return destino
+
+    def evaluar(self, nodo):
+        """
+        Emite el calculo de una expresion y devuelve el Temporal con su
+        valor. Las hojas (y las llamadas) se cargan con su cargar() y cada
+        operacion combina los valores de sus hijos. Recorrido con pila
+        explicita, sin limite de profundidad.
+        """
+        if not nodo.binaria:
+            return nodo.cargar(self)
+        necesidad = self.necesidad
+        valores = []
+        pendientes = [(nodo, 0, False, False)]  # (nodo, paso, derecha primero, primer valor en la pila)
+        while pendientes:
+            actual, paso, derecha_primero, en_pila = pendientes.pop()
+            if not actual.binaria:
+                valores.append(actual.cargar(self))
+            elif paso == 0:
+                izquierda, derecha = actual.izquierda, actual.derecha
+                if derecha.operando() is not None:
+                    # Operando derecho directo: solo la izquierda ocupa un registro
+                    pendientes.append((actual, 3, False, False))
+                    pendientes.append((izquierda, 0, False, False))
+                else:
+                    derecha_primero = necesidad(derecha) > necesidad(izquierda)
+                    pendientes.append((actual, 1, derecha_primero, False))
+                    pendientes.append((derecha if derecha_primero else izquierda, 0, False, False))
+            elif paso == 1:
+                segundo = actual.izquierda if derecha_primero else actual.derecha
+                en_pila = necesidad(segundo) >= self.registros
+                if en_pila:
+                    # El segundo hijo necesita todos los registros: el primer valor espera en la pila
+                    self.emitir('apilar', None, valores[-1])
+                pendientes.append((actual, 2, derecha_primero, en_pila))
+                pendientes.append((segundo, 0, False, False))
+            elif paso == 2:
+                segundo = valores.pop()
+                primero = valores.pop()
+                if en_pila:
+                    primero = self.temporal()
+                    self.emitir('desapilar', primero)
+                if derecha_primero:
+                    primero, segundo = segundo, primero
+                valores.append(self.combinar(actual, primero, segundo))
+            else:
+                valores.append(self.combinar(actual, valores.pop(), actual.derecha.operando()))
+        return valores[0]
@@ -1,13 +1,49 @@
+import gc
+from hashlib import blake2b
+from visitante import Visitante
+from ir import ConstructorIR, ProgramaIR, Variable, Constante, tipo_numero
+from x86 import REGISTROS, texto_x86, lineas_x86
+
+def huella_hoja(clase, valor):
+    # Huella estable entre ejecuciones (no depende de id() ni de PYTHONHASHSEED) de una hoja
+    return int.from_bytes(blake2b(repr((clase, valor)).encode(), digest_size=8).digest(), 'little')
+
+def huella_operador(operador):
+    # Entero fijo por operador; hash() de un str cambia en cada ejecucion
+    return int.from_bytes(operador.encode(), 'little')
+
 class NodoAST:
-    # Clase base para todos los nodos del AST
-    pass
+    # Clase base para todos los nodos del AST; con __slots__ ningun nodo lleva __dict__ propio
+    __slots__ = ()
+    binaria = False  # Operaciones y comparaciones: ConstructorIR.evaluar combina los valores de izquierda y derecha
 
     def traducir(self):
         raise NotImplementedError("Metodo traducir () no implementado en este nodo")
+    def generar_ir(self):
+        # Representacion intermedia del nodo, como cuerpo de una funcion sin nombre (sin prologo ni epilogo)
+        constructor = ConstructorIR(len(REGISTROS))
+        constructor.abrir_funcion(None)
+        self.a_ir(constructor)
+        return constructor.cerrar_funcion()
     def generar_codigo(self):
-        raise NotImplementedError("Metodo generar_codigo () no implementado en este nodo")
+        # Texto del codigo ensamblador del nodo: AST -> representacion intermedia -> x86
+        return texto_x86(self.generar_ir())
+    def generar_lineas(self):
+        # El mismo codigo como lista de Etiqueta, Instruccion y texto, para pases como el peephole
+        return lineas_x86(self.generar_ir())
+    def a_ir(self, constructor):
+        # Una expresion usada como sentencia solo se calcula
+        constructor.evaluar(self)
+    def operando(self):
+        # Operando directo de una instruccion (Variable o Constante entera), si lo es
+        return None
+    def cargar(self, constructor):
+        # Deja el valor de una hoja en un Temporal nuevo y lo devuelve
+        raise NotImplementedError("Metodo cargar () no implementado en este nodo")
+
 
 class NodoFuncion(NodoAST):
+    __slots__ = ('nombre', 'parametros', 'cuerpo')
     def __init__(self, nombre, parametros, cuerpo):
         self.nombre = nombre
         self.parametros = parametros
@@ -18,31 +54,27 @@ class NodoFuncion(NodoAST):
         cuerpo = "\n    ".join(c.traducir() for c in self.cuerpo)
         return f"def {self.nombre}({params}):\n    {cuerpo}"
     
-    def generar_codigo(self):
-        codigo = f'{self.nombre}:\n'
-        codigo += "    push ebp\n"
-        codigo += "    mov ebp, esp\n"
-        codigo += "\n".join(c.generar_codigo() for c in self.cuerpo)
-        codigo += "\n    mov esp, ebp\n"
-        codigo += "    pop ebp\n"
-        codigo += "    ret\n"
-        return codigo
+    def generar_ir(self):
+        return self.a_ir(ConstructorIR(len(REGISTROS)))
+
+    def a_ir(self, constructor):
+        # Etiquetas locales (.L0_start) numeradas dentro de la funcion: el texto no depende del resto del programa
+        constructor.abrir_funcion(self.nombre)
+        constructor.sentencias(self.cuerpo)
+        return constructor.cerrar_funcion()
 
 class NodoParametro(NodoAST):
     # Nodo que representa un parametro de funcion
+    __slots__ = ('tipo', 'nombre')
     def __init__(self, tipo, nombre):
         self.tipo = tipo
         self.nombre = nombre
         
     def traducir(self):
         return self.nombre[1]
-    
-    def generar_codigo(self):
-        codigo = f'{self.nombre[1]}:\n'
-        codigo += "\n".join(c.generar_codigo() for c in self.cuerpo)
-        return codigo
 
 class NodoAsignacion(NodoAST):
+    __slots__ = ('nombre', 'expresion')
     def __init__(self, nombre, expresion):
         self.nombre = nombre 
         self.expresion = expresion
@@ -50,166 +82,89 @@ class NodoAsignacion(NodoAST):
     def traducir(self):
         return f"{self.nombre[1]} = {self.expresion.traducir()}"
     
-    def generar_codigo(self):
-        codigo = self.expresion.generar_codigo()
-        codigo += f"\n    mov [{self.nombre[1]}], eax ; asignar a {self.nombre[1]}"
-        return codigo
+    def a_ir(self, constructor):
+        valor = constructor.evaluar(self.expresion)
+        constructor.emitir('copiar', Variable(self.nombre[1]), valor, comentario=f'asignar a {self.nombre[1]}')
         
 class NodoOperacion(NodoAST):
     # Nodo que representa una operacion aritmetica
+    __slots__ = ('izquierda', 'operador', 'derecha', 'huella')
+    binaria = True
     def __init__(self, izquierda, operador, derecha):
         self.izquierda = izquierda
         self.operador = operador
         self.derecha = derecha
+        # hash() de una tupla de enteros es estable entre ejecuciones
+        self.huella = hash((1, izquierda.huella, huella_operador(operador), derecha.huella))
+
+    def __hash__(self):
+        return self.huella
         
     def traducir(self):
         return f"{self.izquierda.traducir()} {self.operador[1]} {self.derecha.traducir()}"
 
-    def generar_codigo(self):
-        codigo = []
-        codigo.append(self.izquierda.generar_codigo())#cargar el operando izquierdo
-        codigo.append('    push eax; guardar en la pila')#guardar en la pila
-
-        codigo.append(self.derecha.generar_codigo())#cargar el operando derecho
-        codigo.append('    pop ebx; recuperar el primer operando')# ebx = opoerando 1 y eax= operando 2
-
-        if self.operador == '+':
-            codigo.append('    add eax, ebx ; eax = eax + ebx')
-
-        elif self.operador == '-':
-            codigo.append('    sub ebx, eax; ebx = ebx - eax')
-            codigo.append('    mov eax, ebx; eax = ebx')
-
-        elif self.operador == '*':
-            pass
-        
-        elif self.operador == '/':
-            pass 
-
-        return '\n'.join(codigo)
-
     def optimizar(self):
-        if isinstance(self.izquierda, NodoOperacion):
-            izquierda = self.izquierda.optimizar()
-        else:
-            izquierda = self.izquierda
-        if isinstance(self.derecha, NodoOperacion):
-            derecha = self.derecha.optimizar()
-        else:
-            derecha = self.derecha
-        
-        # Si ambos operandos son numeros, evaluamos la operacion
-        if isinstance(izquierda, NodoNumero) and isinstance(derecha, NodoNumero):
-            if self.operador == '+':
-                return NodoNumero(izquierda.valor + derecha.valor)
-            elif self.operador == '-':
-                return NodoNumero(izquierda.valor - derecha.valor)
-            elif self.operador == '*':
-                return NodoNumero(izquierda.valor * derecha.valor)
-            elif self.operador == '/' and derecha.valor != 0:
-                return NodoNumero(izquierda.valor / derecha.valor)
-            
-        # Simplificacion algebraica
-        if self.operador in ['+', '*', '-', '/']:
-            # Normalizar el orden de los operandos (numeros a la derecha)
-            if isinstance(izquierda, NodoNumero) and not isinstance(derecha, NodoNumero):
-                izquierda, derecha = derecha, izquierda
-
-            # Multiplicacion por 1
-            if self.operador == '*' and isinstance(derecha, NodoNumero) and derecha.valor == 1:
-                return izquierda
-            if self.operador == '*' and isinstance(izquierda, NodoNumero) and izquierda.valor == 1:
-                return derecha
-
-            # Suma con 0
-            if self.operador == '+' and isinstance(derecha, NodoNumero) and derecha.valor == 0:
-                return izquierda
-            if self.operador == '+' and isinstance(izquierda, NodoNumero) and izquierda.valor == 0:
-                return derecha
-
-            # Multiplicacion por 0
-            if self.operador == '*' and isinstance(derecha, NodoNumero) and derecha.valor == 0:
-                return NodoNumero(0)
-            if self.operador == '*' and isinstance(izquierda, NodoNumero) and izquierda.valor == 0:
-                return NodoNumero(0)
-
-            # Suma con negativo
-            if self.operador == '+' and isinstance(derecha, NodoOperacion) and derecha.operador == '-' and isinstance(derecha.derecha, NodoNumero):
-                return NodoOperacion(izquierda, '-', derecha.derecha)
-
-            # Multiplicacion con negativo
-            if self.operador == '*' and isinstance(derecha, NodoOperacion) and derecha.operador == '-' and isinstance(derecha.derecha, NodoNumero):
-                return NodoOperacion(NodoOperacion(izquierda, '*', derecha.derecha), '-', NodoNumero(0))
-
-            # Resta con 0
-            if self.operador == '-' and isinstance(derecha, NodoNumero) and derecha.valor == 0:
-                return izquierda
-
-            # Resta de un numero negativo
-            if self.operador == '-' and isinstance(derecha, NodoOperacion) and derecha.operador == '-' and isinstance(derecha.derecha, NodoNumero):
-                return NodoOperacion(izquierda, '+', derecha.derecha)
-
-            # Resta de si mismo
-            if self.operador == '-' and isinstance(izquierda, NodoIdentificador) and isinstance(derecha, NodoIdentificador):
-                if izquierda.nombre == derecha.nombre:
-                    return NodoNumero(0)
-
-            # Division por 1
-            if self.operador == '/' and isinstance(derecha, NodoNumero) and derecha.valor == 1:
-                return izquierda
-
-            # Division de si mismo
-            if self.operador == '/' and isinstance(izquierda, NodoIdentificador) and isinstance(derecha, NodoIdentificador):
-                if izquierda.nombre == derecha.nombre:
-                    return NodoNumero(1)
-
-            # Division de 0 por un numero
-            if self.operador == '/' and isinstance(izquierda, NodoNumero) and izquierda.valor == 0:
-                return NodoNumero(0)
-
-            # Division por 0 (error)
-            if self.operador == '/' and isinstance(derecha, NodoNumero) and derecha.valor == 0:
-                raise ValueError("Error: División por cero.")
-                
-        # Si no se puede optimizar mas devolvemos la misma operacion
-        return NodoOperacion(izquierda, self.operador, derecha)
+        return optimizador.visitar(self)
 
 class NodoRetorno(NodoAST):
     # Nodo que representa la sentencia return
+    __slots__ = ('expresion',)
     def __init__(self, expresion):
         self.expresion = expresion
         
     def traducir(self):
         return f"return {self.expresion.traducir()}"
     
-    def generar_codigo(self):
-        return self.expresion.generar_codigo() + '\n    ret ; retorno desde la subrutina'
+    def a_ir(self, constructor):
+        constructor.retornar(constructor.evaluar(self.expresion), comentario='retorno desde la subrutina')
 
 class NodoIdentificador(NodoAST):
+    __slots__ = ('nombre', 'huella')
     def __init__(self, nombre):
         self.nombre = nombre
+        self.huella = huella_hoja('NodoIdentificador', nombre)
+
+    def __hash__(self):
+        return self.huella
         
     def traducir(self):
         return self.nombre[1]
 
-    def generar_codigo(self):
-        return f"    mov eax, [{self.nombre[1]}] ; cargar variable {self.nombre[1]}"
+    def operando(self):
+        return Variable(self.nombre[1])
+
+    def cargar(self, constructor):
+        temporal = constructor.temporal()
+        constructor.emitir('copiar', temporal, Variable(self.nombre[1]), comentario=f"cargar variable {self.nombre[1]}")
+        return temporal
 
 class NodoNumero(NodoAST):
+    __slots__ = ('valor', 'huella')
     def __init__(self, valor):
         self.valor = valor
+        self.huella = huella_hoja('NodoNumero', valor)
+
+    def __hash__(self):
+        return self.huella
         
     def traducir(self):
         return str(self.valor[1])
         
-    def generar_codigo(self):
-        if '.' in self.valor[1] or 'f' in self.valor[1].lower():  # Es flotante
-            return f"    movss xmm0, [{self.valor[1]}] ; cargar flotante {self.valor[1]}"
-        else:  # Es entero
-            return f"    mov eax, {self.valor[1]} ; cargar entero {self.valor[1]}"
+    def es_flotante(self):
+        return tipo_numero(self.valor[1]) == 'flotante'
+
+    def operando(self):
+        return None if self.es_flotante() else Constante(self.valor[1], 'entero')
+
+    def cargar(self, constructor):
+        temporal = constructor.temporal()
+        tipo = tipo_numero(self.valor[1])
+        constructor.emitir('copiar', temporal, Constante(self.valor[1], tipo), comentario=f"cargar {tipo} {self.valor[1]}")
+        return temporal
       
 class NodoLlamadaFuncion(NodoAST):
     # Nodo que representa una llamada a funcion
+    __slots__ = ('nombre', 'argumentos')
     def __init__(self, nombre, argumentos):
         self.nombre = nombre
         self.argumentos = argumentos
@@ -218,52 +173,67 @@ class NodoLlamadaFuncion(NodoAST):
         params = ",".join(p.traducir() for p in self.argumentos)
         return f"{self.nombre}({params})"
     
-    def generar_codigo(self):
-        codigo = []
-        if self.nombre in ['printf', 'scanf']:
-            # Argumentos en orden inverso (excepto el primero para printf)
-            for arg in reversed(self.argumentos):
-                codigo.append(arg.generar_codigo())
-                codigo.append("    push eax")
-            
-            # Llamada a la función
-            codigo.append(f"    call _{self.nombre}")
-            
-            # Limpiar la pila
-            if self.argumentos:
-                codigo.append(f"    add esp, {4 * len(self.argumentos)}")
-        else:
-            ...
-        return "\n".join(codigo)
+    def llamar(self, constructor, destino):
+        # Argumentos en orden inverso; el backend limpia la pila despues de la llamada
+        for arg in reversed(self.argumentos):
+            constructor.emitir('param', None, constructor.evaluar(arg))
+        constructor.emitir('llamar', destino, self.nombre, len(self.argumentos))
+
+    def a_ir(self, constructor):
+        self.llamar(constructor, None)
+
+    def cargar(self, constructor):
+        # El valor de la llamada como hoja de una expresion
+        temporal = constructor.temporal()
+        self.llamar(constructor, temporal)
+        return temporal
         
 class NodoPrograma(NodoAST):
     """
     Nodo que representa un programa completo.
     Contiene una lista de funciones.
     """
+    __slots__ = ('funciones',)
     def __init__(self, funciones):
         self.funciones = funciones
         
     def traducir(self):
         return self.funciones
     
-    def generar_codigo(self):
-        codigo = ""
+    def generar_ir(self):
+        constructor = ConstructorIR(len(REGISTROS))
+        recolector = gc.isenabled()
+        gc.disable()  # Crear miles de instrucciones y bloques seguidos dispararia el recolector una y otra vez
+        try:
+            self.a_ir(constructor)
+        finally:
+            if recolector:
+                gc.enable()
+        return ProgramaIR(constructor.funciones)
+
+    def a_ir(self, constructor):
         for funcion in self.funciones:
-            codigo += funcion.generar_codigo() + "\n\n"
-        return codigo
+            funcion.a_ir(constructor)
     
 class NodoString(NodoAST):
+    __slots__ = ('valor', 'huella')
     def __init__(self, valor):
         self.valor = valor
+        self.huella = huella_hoja('NodoString', valor)
+
+    def __hash__(self):
+        return self.huella
         
     def traducir(self):
         return self.valor[1]
         
-    def generar_codigo(self):
-        return f'    mov eax, {self.valor[1]} ; cargar string'
+    def cargar(self, constructor):
+        temporal = constructor.temporal()
+        constructor.emitir('copiar', temporal, Constante(self.valor[1], 'cadena'), comentario='cargar string')
+        return temporal
     
 class NodoDeclaracion(NodoAST):
+    __slots__ = ('tipo', 'nombre')
     def __init__(self, tipo, nombre):
         self.tipo = tipo
         self.nombre = nombre
@@ -271,9 +241,10 @@ class NodoDeclaracion(NodoAST):
     def traducir(self):
         return f"{self.tipo} {self.nombre};"
         
-    def generar_codigo(self):
-        return f"; Declaracion de variable: {self.tipo} {self.nombre}"
+    def a_ir(self, constructor):
+        constructor.emitir('declarar', None, self.tipo, self.nombre)
 class NodoWhile(NodoAST):
+    __slots__ = ('condicion', 'cuerpo')
     def __init__(self, condicion, cuerpo):
         self.condicion = condicion
         self.cuerpo = cuerpo
@@ -282,24 +253,25 @@ class NodoWhile(NodoAST):
         codigo = f"while {self.condicion.traducir()}:\n    " + "\n    ".join(c.traducir() for c in self.cuerpo)
         return codigo
     
-    def generar_codigo(self):
-        label_start = f"L{id(self)}_start"
-        label_end = f"L{id(self)}_end"
-        
-        codigo = []
-        codigo.append(f"{label_start}: ; inicio de bucle while")
-        codigo.append(self.condicion.generar_codigo())
-        codigo.append("    cmp eax, 0 ; comparar la condicion de bucle while")
-        codigo.append(f"    je {label_end} ; terninar el bucle si la condicion es falsa")
-        
-        for instruccion in self.cuerpo:
-            codigo.append(instruccion.generar_codigo())
-        codigo.append(f"    jmp {label_start} ; volvar al inicio del bucle while")
-        
-        codigo.append(f"{label_end}: ; fin de bucle while")
-        return "\n".join(codigo)
+    def a_ir(self, constructor):
+        etiqueta = constructor.numero_etiqueta()
+        inicio = constructor.nuevo_bloque(f".L{etiqueta}_start", "inicio de bucle while")
+        cuerpo = constructor.nuevo_bloque()
+        fin = constructor.nuevo_bloque(f".L{etiqueta}_end", "fin de bucle while")
+
+        constructor.saltar(inicio)
+        constructor.empezar(inicio)
+        condicion = constructor.evaluar(self.condicion)
+        constructor.ramificar(condicion, cuerpo, fin, comentario="terninar el bucle si la condicion es falsa")
+
+        constructor.empezar(cuerpo)
+        constructor.sentencias(self.cuerpo)
+        constructor.saltar(inicio, comentario="volvar al inicio del bucle while")
+
+        constructor.empezar(fin)
     
 class NodoFor(NodoAST):
+    __slots__ = ('inicializacion', 'condicion', 'incremento', 'cuerpo')
     def __init__(self, inicializacion, condicion, incremento, cuerpo):
         self.inicializacion = inicializacion
         self.condicion = condicion
@@ -312,30 +284,31 @@ class NodoFor(NodoAST):
                  f"\n    {self.incremento.traducir()}"
         return codigo
 
-    def generar_codigo(self):
-        label_start = f"L{id(self)}_start"
-        label_end = f"L{id(self)}_end"
+    def a_ir(self, constructor):
+        etiqueta = constructor.numero_etiqueta()
+        inicio = constructor.nuevo_bloque(f".L{etiqueta}_start", "inicio del bucle for")
+        cuerpo = constructor.nuevo_bloque()
+        fin = constructor.nuevo_bloque(f".L{etiqueta}_end", "fin del bucle for")
 
-        codigo = []
-        codigo.append(self.inicializacion.generar_codigo())  # codigo de inicialización
+        self.inicializacion.a_ir(constructor)  # codigo de inicialización
 
-        codigo.append(f"{label_start}: ; inicio del bucle for")
-        codigo.append(self.condicion.generar_codigo())
-        codigo.append("    cmp eax, 0 ; comparar la condicion del for")
-        codigo.append(f"    je {label_end} ; salir del bucle si la condicion es falsa")
+        constructor.saltar(inicio)
+        constructor.empezar(inicio)
+        condicion = constructor.evaluar(self.condicion)
+        constructor.ramificar(condicion, cuerpo, fin, comentario="salir del bucle si la condicion es falsa")
 
-        for instruccion in self.cuerpo:
-            codigo.append(instruccion.generar_codigo())
+        constructor.empezar(cuerpo)
+        constructor.sentencias(self.cuerpo)
 
-        codigo.append(self.incremento.generar_codigo())  # codigo del incremento
-        codigo.append(f"    jmp {label_start} ; volver al inicio del bucle for")
+        self.incremento.a_ir(constructor)  # codigo del incremento
+        constructor.saltar(inicio, comentario="volver al inicio del bucle for")
 
-        codigo.append(f"{label_end}: ; fin del bucle for")
-        return "\n".join(codigo)
+        constructor.empezar(fin)
 
 
            
 class NodoIf(NodoAST):
+    __slots__ = ('condicion', 'cuerpo_if', 'cuerpo_else', 'else_ifs')
     def __init__(self, condicion, cuerpo_if, cuerpo_else=None, else_ifs=None):
         self.condicion = condicion
         self.cuerpo_if = cuerpo_if
@@ -353,44 +326,44 @@ class NodoIf(NodoAST):
             
         return codigo
     
-    def generar_codigo(self):
-        codigo = []
+    def a_ir(self, constructor):
         # Generar codigo para la condicion principal
-        codigo.append(self.condicion.generar_codigo())
-        
-        label_end = f"L{id(self)}_end"
-        label_next = f"L{id(self)}_next"
-        
-        codigo.append(f"    cmp eax, 0")
-        codigo.append(f"    je {label_next}")
-        
+        condicion = constructor.evaluar(self.condicion)
+
+        etiqueta = constructor.numero_etiqueta()
+        fin = constructor.nuevo_bloque(f".L{etiqueta}_end")
+        # Sin else if ni else, una condicion falsa va directo al final
+        siguiente = constructor.nuevo_bloque(f".L{etiqueta}_next") if self.else_ifs or self.cuerpo_else else fin
+
         # Codigo para el cuerpo if
-        for instruccion in self.cuerpo_if:
-            codigo.append(instruccion.generar_codigo())
-        codigo.append(f"    jmp {label_end}")
-        
+        cuerpo = constructor.nuevo_bloque()
+        constructor.ramificar(condicion, cuerpo, siguiente)
+        constructor.empezar(cuerpo)
+        constructor.sentencias(self.cuerpo_if)
+        constructor.saltar(fin)
+
         # Codigo para los else if
-        for i, (cond, cuerpo) in enumerate(self.else_ifs):
-            codigo.append(f"{label_next}:")
-            label_next = f"L{id(self)}_next_{i}"
-            
-            codigo.append(cond.generar_codigo())
-            codigo.append(f"    cmp eax, 0")
-            codigo.append(f"    je {label_next}")
-            
-            for instruccion in cuerpo:
-                codigo.append(instruccion.generar_codigo())
-            codigo.append(f"    jmp {label_end}")
-        
+        for i, (cond, cuerpo_else_if) in enumerate(self.else_ifs):
+            constructor.empezar(siguiente)
+            ultimo = i == len(self.else_ifs) - 1 and not self.cuerpo_else
+            siguiente = fin if ultimo else constructor.nuevo_bloque(f".L{etiqueta}_next_{i}")
+
+            condicion = constructor.evaluar(cond)
+            cuerpo = constructor.nuevo_bloque()
+            constructor.ramificar(condicion, cuerpo, siguiente)
+            constructor.empezar(cuerpo)
+            constructor.sentencias(cuerpo_else_if)
+            constructor.saltar(fin)
+
         # Codigo para el else (si existe)
         if self.cuerpo_else:
-            codigo.append(f"{label_next}:")
-            for instruccion in self.cuerpo_else:
-                codigo.append(instruccion.generar_codigo())
-        
-        codigo.append(f"{label_end}:")
-        return "\n".join(codigo)
+            constructor.empezar(siguiente)
+            constructor.sentencias(self.cuerpo_else)
+            constructor.saltar(fin)
+
+        constructor.empezar(fin)
 class NodoIncremento(NodoAST):
+    __slots__ = ('variable', 'valor', 'tipo')
     def __init__(self, variable, valor=None, tipo="++"):
         self.variable = variable
         self.valor = valor
@@ -404,55 +377,36 @@ class NodoIncremento(NodoAST):
         else:
             return f"{self.variable} = {self.valor.traducir()}"
 
-    def generar_codigo(self):
-        if self.tipo == "++":
-            return f"    mov eax, [{self.variable}]\n    add eax, 1\n    mov [{self.variable}], eax  ; {self.variable}++"
-        elif self.tipo == "--":
-            return f"    mov eax, [{self.variable}]\n    sub eax, 1\n    mov [{self.variable}], eax  ; {self.variable}--"
+    def a_ir(self, constructor):
+        variable = Variable(self.variable)
+        if self.tipo in ("++", "--"):
+            valor = constructor.temporal()
+            constructor.emitir('copiar', valor, variable)
+            resultado = constructor.temporal()
+            constructor.emitir('+' if self.tipo == "++" else '-', resultado, valor, Constante('1', 'entero'))
+            constructor.emitir('copiar', variable, resultado, comentario=f"{self.variable}{self.tipo}")
         else:  # Asignacion normal
-            return f"    mov eax, {self.valor.generar_codigo()}  ; Cargar el valor en eax\n    mov [{self.variable}], eax  ; Asignar el valor a {self.variable}"
+            valor = constructor.evaluar(self.valor)
+            constructor.emitir('copiar', variable, valor, comentario=f"Asignar el valor a {self.variable}")
 
 
 class NodoComparacion(NodoAST):
+    __slots__ = ('izquierda', 'operador', 'derecha', 'huella')
+    binaria = True
     def __init__(self, izquierda, operador, derecha):
         self.izquierda = izquierda
         self.operador = operador
         self.derecha = derecha
+        self.huella = hash((2, izquierda.huella, huella_operador(operador), derecha.huella))
+
+    def __hash__(self):
+        return self.huella
         
     def traducir(self):
         return f"{self.izquierda.traducir()} {self.operador} {self.derecha.traducir()}"
     
-    def generar_codigo(self):
-        codigo = []
-        # Cargar operando izquierdo
-        codigo.append(self.izquierda.generar_codigo())
-        codigo.append("    push eax")
-        
-        # Cargar operando derecho
-        codigo.append(self.derecha.generar_codigo())
-        codigo.append("    pop ebx")
-        
-        # Comparacion
-        codigo.append("    cmp ebx, eax")
-        
-        # Configurar eax segun la comparacion
-        if self.operador == '>':
-            codigo.append("    setg al")
-        elif self.operador == '<':
-            codigo.append("    setl al")
-        elif self.operador == '>=':
-            codigo.append("    setge al")
-        elif self.operador == '<=':
-            codigo.append("    setle al")
-        elif self.operador == '==':
-            codigo.append("    sete al")
-        elif self.operador == '!=':
-            codigo.append("    setne al")
-            
-        codigo.append("    movzx eax, al")
-        return "\n".join(codigo)
-    
 class NodoConstante(NodoAST):
+    __slots__ = ('tipo', 'nombre', 'valor')
     def __init__(self, tipo, nombre, valor):
         self.tipo = tipo
         self.nombre = nombre
@@ -461,6 +415,218 @@ class NodoConstante(NodoAST):
     def traducir(self):
         return f"const {self.tipo} {self.nombre} = {self.valor[1]};"
         
-    def generar_codigo(self):
-        return f"    {self.nombre} dd {self.valor[1]} ; constante {self.tipo}"
-    
\ No newline at end of file
+    def a_ir(self, constructor):
+        constructor.emitir('constante', None, self.tipo, self.nombre, self.valor[1])
+    
+
+class FabricaNodos:
+    """
+    Internado (hash-consing) de hojas y expresiones puras. Identificadores,
+    numeros, strings, operaciones y comparaciones estructuralmente iguales
+    se construyen una sola vez y se comparten; ningun pase modifica un nodo
+    despues de crearlo, asi que compartirlos es seguro. Como los hijos ya
+    vienen internados, la clave de una operacion compara a sus hijos por
+    identidad, y su hash es la huella estable del nodo.
+    """
+    def __init__(self):
+        self.internados = {}  # (clase, *campos) -> nodo compartido
+
+    def crear(self, clase, *campos):
+        clave = (clase, *campos)
+        nodo = self.internados.get(clave)
+        if nodo is None:
+            nodo = self.internados[clave] = clase(*campos)
+        return nodo
+
+    def vaciar(self):
+        # Olvida los nodos internados; los ya entregados siguen siendo validos
+        self.internados.clear()
+
+CAMPOS_HUELLA = {}  # Clase de nodo -> campos a recorrer en orden inverso; () si el nodo ya tiene huella propia
+
+def huella_estructural(nodo):
+    """
+    Huella estable (blake2b) de un subarbol completo: clase y campos de cada
+    nodo en preorden, con la longitud de cada lista o tupla. Las expresiones
+    internadas aportan su propia huella sin volver a recorrerlas, y las
+    tuplas de token se toman enteras.
+    """
+    partes = []
+    pendientes = [nodo]
+    while pendientes:
+        valor = pendientes.pop()
+        clase = type(valor)
+        if clase is tuple and (not valor or type(valor[0]) is str):
+            partes.append(valor)  # Token ('IDENTIFIER', 'x')
+            continue
+        campos = CAMPOS_HUELLA.get(clase)
+        if campos is None:
+            if isinstance(valor, NodoAST):
+                campos = CAMPOS_HUELLA[clase] = () if 'huella' in clase.__slots__ else tuple(reversed(clase.__slots__))
+            elif clase is list or clase is tuple:
+                partes.append(len(valor))
+                pendientes.extend(reversed(valor))
+                continue
+            else:
+                partes.append(valor)
+                continue
+        partes.append(clase.__name__)
+        if campos:
+            pendientes.extend([getattr(valor, campo) for campo in campos])
+        else:
+            partes.append(valor.huella)
+    return blake2b(repr(partes).encode(), digest_size=16).digest()
+
+class CacheCodigo:
+    """
+    Ensamblador de cada funcion indexado por la huella estructural de su
+    NodoFuncion. Como las etiquetas son locales a cada funcion, su texto no
+    depende del resto del programa y se reutiliza tal cual: al volver a
+    compilar solo se genera el codigo de las funciones cuyo AST cambio.
+    Las funciones que siguen siendo el mismo objeto (ParserIncremental las
+    reutiliza) ni siquiera se vuelven a recorrer para calcular la huella.
+    Solo codigos se guarda entre ejecuciones (CacheAST.guardar_codigo).
+    """
+    def __init__(self):
+        self.codigos = {}  # huella -> codigo de la funcion
+        self.huellas = {}  # id(funcion) -> (funcion, huella) de la ultima compilacion
+        self.regeneradas = 0  # Funciones generadas de verdad en la ultima compilacion
+
+    def huella(self, funcion):
+        conocida = self.huellas.get(id(funcion))
+        if conocida is not None and conocida[0] is funcion:
+            return conocida[1]
+        return huella_estructural(funcion)
+
+    def generar_codigo(self, programa, generar=None):
+        """
+        Mismo texto que programa.generar_codigo(); se descartan las funciones
+        que ya no estan. generar(funcion) da el codigo de una funcion que no
+        esta en la cache (por omision funcion.generar_codigo()).
+        """
+        generar = generar or NodoFuncion.generar_codigo
+        codigos, huellas, partes = {}, {}, []
+        self.regeneradas = 0
+        for funcion in programa.funciones:
+            huella = self.huella(funcion)
+            codigo = codigos.get(huella) or self.codigos.get(huella)
+            if codigo is None:
+                codigo = generar(funcion)
+                self.regeneradas += 1
+            codigos[huella] = codigo
+            huellas[id(funcion)] = (funcion, huella)
+            partes.append(codigo)
+            partes.append("\n\n")
+        self.codigos, self.huellas = codigos, huellas
+        return ''.join(partes)
+
+class Optimizador(Visitante):
+    """
+    Plegado de constantes y simplificacion algebraica de expresiones.
+    Solo las operaciones se reescriben: cualquier otro nodo se devuelve tal cual.
+    Los literales son tokens ('NUMBER', texto); solo se pliegan los enteros,
+    con la division de C (truncada hacia cero).
+    """
+    def visitar(self, nodo):
+        # Postorden con una pila explicita: una expresion de miles de terminos no consume marcos de Python
+        resultados = []
+        pendientes = [(nodo, False)]  # (nodo, operandos ya optimizados)
+        while pendientes:
+            actual, listo = pendientes.pop()
+            if type(actual) is not NodoOperacion:
+                resultados.append(super().visitar(actual))
+            elif listo:
+                derecha = resultados.pop()
+                resultados.append(self.plegar(actual, resultados.pop(), derecha))
+            else:
+                pendientes += [(actual, True), (actual.derecha, False), (actual.izquierda, False)]
+        return resultados[0]
+
+    def visitar_otro(self, nodo):
+        return nodo
+
+    def plegar(self, nodo, izquierda, derecha):
+        # Reescribe nodo a partir de sus operandos ya optimizados
+        operador = nodo.operador
+        a, b = entero_literal(izquierda), entero_literal(derecha)
+
+        # Si ambos operandos son enteros, evaluamos la operacion
+        if a is not None and b is not None:
+            if operador == '+':
+                return numero(a + b)
+            elif operador == '-':
+                return numero(a - b)
+            elif operador == '*':
+                return numero(a * b)
+            elif operador == '/' and b != 0:
+                cociente = abs(a) // abs(b)
+                return numero(cociente if (a < 0) == (b < 0) else -cociente)
+
+        if operador in ('+', '*'):
+            # Normalizar el orden de los operandos (numeros a la derecha); solo en operaciones conmutativas
+            if a is not None and b is None:
+                izquierda, derecha, a, b = derecha, izquierda, b, a
+
+            # Multiplicacion por 1
+            if operador == '*' and b == 1:
+                return izquierda
+
+            # Suma con 0
+            if operador == '+' and b == 0:
+                return izquierda
+
+            # Multiplicacion por 0
+            if operador == '*' and b == 0:
+                return numero(0)
+
+            # Suma con negativo: x + -n es x - n
+            if operador == '+' and b is not None and b < 0:
+                return NodoOperacion(izquierda, '-', numero(-b))
+
+        elif operador in ('-', '/'):
+            # Resta con 0
+            if operador == '-' and b == 0:
+                return izquierda
+
+            # Resta de un numero negativo: x - -n es x + n
+            if operador == '-' and b is not None and b < 0:
+                return NodoOperacion(izquierda, '+', numero(-b))
+
+            # Resta de si mismo
+            if operador == '-' and isinstance(izquierda, NodoIdentificador) and isinstance(derecha, NodoIdentificador):
+                if izquierda.nombre == derecha.nombre:
+                    return numero(0)
+
+            # Division por 1
+            if operador == '/' and b == 1:
+                return izquierda
+
+            # Division de si mismo
+            if operador == '/' and isinstance(izquierda, NodoIdentificador) and isinstance(derecha, NodoIdentificador):
+                if izquierda.nombre == derecha.nombre:
+                    return numero(1)
+
+            # Division por 0 (error)
+            if operador == '/' and b == 0:
+                raise ValueError("Error: División por cero.")
+
+            # Division de 0 por un numero
+            if operador == '/' and a == 0:
+                return numero(0)
+
+        # Si no se puede optimizar mas devolvemos la misma operacion
+        if izquierda is nodo.izquierda and derecha is nodo.derecha:
+            return nodo
+        return NodoOperacion(izquierda, operador, derecha)
+
+def entero_literal(nodo):
+    # Valor de un literal entero, o None si el nodo no es un literal entero
+    if type(nodo) is NodoNumero and tipo_numero(nodo.valor[1]) == 'entero':
+        return int(nodo.valor[1])
+    return None
+
+def numero(valor):
+    # Literal entero con la misma forma de token que produce el parser
+    return NodoNumero(('NUMBER', str(valor)))
+
+optimizador = Optimizador()
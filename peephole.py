@@ -0,0 +1,163 @@
+"""
+Optimizacion peephole sobre el codigo ya generado. Trabaja con la lista
+de lineas resueltas de generar_lineas() (Etiqueta, Instruccion o texto tal
+cual), no con el texto: cada regla mira una ventana de lineas consecutivas
+y devuelve las lineas que la reemplazan, o None si no se aplica.
+
+Las reglas son funciones registradas con @regla(tamano, *disparadores) en
+REGLAS; un Peephole puede recibir otra lista. Los disparadores son las
+operaciones (o Etiqueta) de la ultima linea de la ventana, o de la
+penultima con posicion=-2: solo esas lineas prueban la regla. La ventana
+se desliza sobre la salida ya optimizada, asi que un reemplazo se vuelve
+a revisar junto con las lineas anteriores y las reglas se encadenan.
+
+Las reglas solo ven lineas seguidas, no el destino de los saltos. Se
+apoyan en que el backend nunca lee al principio de un bloque las banderas
+que deja el anterior: todo setcc o salto condicional sigue a su propio cmp.
+"""
+from x86 import Instruccion, Etiqueta
+
+REGLAS = []
+
+def regla(tamano, *disparadores, posicion=-1):
+    # Registra una regla que mira ventanas de 'tamano' lineas con uno de los disparadores en la linea 'posicion' (-1 o -2)
+    def registrar(funcion):
+        funcion.tamano = tamano
+        funcion.disparadores = disparadores
+        funcion.posicion = posicion
+        REGLAS.append(funcion)
+        return funcion
+    return registrar
+
+def es_memoria(operando):
+    return operando.startswith('[')
+
+def son_instrucciones(ventana, *operaciones):
+    # La ventana son instrucciones con esas operaciones, en orden; ninguna etiqueta en medio
+    return all(type(linea) is Instruccion and linea.operacion == operacion
+               for linea, operacion in zip(ventana, operaciones))
+
+def lee_banderas(linea):
+    # Saltos condicionales, setcc y las instrucciones que usan el acarreo dependen de las banderas
+    if type(linea) is not Instruccion:
+        return False
+    operacion = linea.operacion
+    return (operacion[0] == 'j' and operacion != 'jmp') or operacion.startswith(('set', 'cmov')) or \
+        operacion in ('adc', 'sbb', 'pushf', 'pushfd', 'lahf')
+
+def contar_instrucciones(lineas):
+    return sum(1 for linea in lineas if type(linea) is Instruccion)
+
+@regla(2, 'pop')
+def push_seguido_de_pop(ventana):
+    # push X / pop Y  ->  mov Y, X (nada si X es Y)
+    if not son_instrucciones(ventana, 'push', 'pop'):
+        return None
+    origen, = ventana[0].operandos
+    destino, = ventana[1].operandos
+    if origen == destino:
+        return []
+    if es_memoria(origen) and es_memoria(destino):
+        return None  # x86 no tiene mov de memoria a memoria
+    return [Instruccion('mov', (destino, origen), ventana[1].comentario)]
+
+@regla(2, 'mov')
+def recarga_tras_guardar(ventana):
+    # mov [v], R / mov S, [v]  ->  mov [v], R (y mov S, R si S no es R)
+    if not son_instrucciones(ventana, 'mov', 'mov'):
+        return None
+    guardar, recargar = ventana
+    variable, valor = guardar.operandos
+    destino, origen = recargar.operandos
+    if not es_memoria(variable) or origen != variable or es_memoria(destino):
+        return None
+    if destino == valor:
+        return [guardar]
+    return [guardar, Instruccion('mov', (destino, valor), recargar.comentario)]
+
+@regla(2, Etiqueta)
+def salto_a_siguiente(ventana):
+    # jmp L / L:  ->  L:
+    salto, etiqueta = ventana
+    if son_instrucciones((salto,), 'jmp') and type(etiqueta) is Etiqueta and salto.operandos == (etiqueta.nombre,):
+        return [etiqueta]
+    return None
+
+# Salto con las banderas del cmp original segun si se salta con el resultado en 0 (je) o en 1 (jne)
+SALTO_FALSO = {'setg': 'jle', 'setl': 'jge', 'setge': 'jl', 'setle': 'jg', 'sete': 'jne', 'setne': 'je'}
+SALTO_VERDADERO = {'setg': 'jg', 'setl': 'jl', 'setge': 'jge', 'setle': 'jle', 'sete': 'je', 'setne': 'jne'}
+
+@regla(5, 'je', 'jne', posicion=-2)
+def cmp_tras_movzx(ventana):
+    """
+    setcc al / movzx eax, al / cmp eax, 0 / je L  ->  setcc al / movzx eax, al / jncc L
+    setcc y movzx no tocan las banderas, asi que el salto puede usar las
+    del cmp que calculo la condicion. eax conserva su valor, pero las
+    banderas despues del salto ya no son las de 'cmp eax, 0': la linea que
+    sigue al salto (la ultima de la ventana) no puede leerlas.
+    """
+    asignar, extender, comparar, saltar, siguiente = ventana
+    if not (type(asignar) is Instruccion and asignar.operacion in SALTO_FALSO and
+            son_instrucciones((extender, comparar), 'movzx', 'cmp') and
+            type(saltar) is Instruccion and saltar.operacion in ('je', 'jne')):
+        return None
+    registro, byte = extender.operandos
+    if byte != asignar.operandos[0] or comparar.operandos != (registro, '0') or lee_banderas(siguiente):
+        return None
+    saltos = SALTO_FALSO if saltar.operacion == 'je' else SALTO_VERDADERO
+    return [asignar, extender, Instruccion(saltos[asignar.operacion], saltar.operandos, saltar.comentario), siguiente]
+
+def clave(linea):
+    # Operacion de una Instruccion, o el tipo de cualquier otra linea (Etiqueta, texto)
+    return linea.operacion if type(linea) is Instruccion else type(linea)
+
+class Peephole:
+    def __init__(self, reglas=None):
+        self.reglas = REGLAS if reglas is None else reglas
+        self.eliminadas = {funcion.__name__: 0 for funcion in self.reglas}  # Instrucciones quitadas por regla
+        # Operacion (o Etiqueta) de la ultima y de la penultima linea -> reglas a probar
+        self.por_ultima, self.por_penultima = {}, {}
+        for funcion in self.reglas:
+            tabla = self.por_ultima if funcion.posicion == -1 else self.por_penultima
+            for disparador in funcion.disparadores:
+                tabla.setdefault(disparador, []).append(funcion)
+
+    def optimizar(self, lineas):
+        salida = []
+        por_ultima, por_penultima = self.por_ultima, self.por_penultima
+        ultima = None
+        for linea in lineas:
+            # La clave de la penultima es la que tenia la ultima en la vuelta anterior
+            penultima, ultima = ultima, (linea.operacion if type(linea) is Instruccion else type(linea))
+            salida.append(linea)
+            while True:
+                reglas = por_ultima.get(ultima)
+                if reglas is None or not self.aplicar(salida, reglas):
+                    reglas = por_penultima.get(penultima)
+                    if reglas is None or not self.aplicar(salida, reglas):
+                        break
+                # Un reemplazo cambia el final de la salida: se vuelve a probar con las lineas que quedan
+                ultima = clave(salida[-1]) if salida else None
+                penultima = clave(salida[-2]) if len(salida) > 1 else None
+        return salida
+
+    def aplicar(self, salida, reglas):
+        # Prueba las reglas sobre el final de la salida; True si una la reemplazo
+        for funcion in reglas:
+            tamano = funcion.tamano
+            if len(salida) < tamano:
+                continue
+            ventana = salida[-tamano:]
+            reemplazo = funcion(ventana)
+            if reemplazo is None:
+                continue
+            del salida[-tamano:]
+            salida.extend(reemplazo)
+            self.eliminadas[funcion.__name__] += contar_instrucciones(ventana) - contar_instrucciones(reemplazo)
+            return True
+        return False
+
+    def informe(self):
+        total = sum(self.eliminadas.values())
+        detalle = ", ".join(f"{nombre}: {n}" for nombre, n in self.eliminadas.items())
+        return f"Peephole: {total} instrucciones eliminadas ({detalle})"
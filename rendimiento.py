@@ -0,0 +1,340 @@
+"""
+Mediciones de rendimiento del compilador sobre fuentes grandes generadas.
+Uso: python rendimiento.py [numero_de_funciones]
+"""
+import os
+import sys
+import time
+import tempfile
+import pickle
+import json
+import tracemalloc
+from analizador import *
+from automata import LexerDFA
+from arena import ArenaAST
+from ast_binario import escribir_ast, LectorAST
+from peephole import Peephole
+from x86 import Emisor, texto_x86
+
+def generar_fuente(n_funciones):
+    # Programa sintetico: n funciones con bucles, condicionales y expresiones, y un main al final
+    partes = ["#include <stdio.h>\n"]
+    for i in range(n_funciones):
+        partes.append(
+            f"int f{i}(int x) {{\n"
+            f"    int a{i} = x + {i} * 2 - 3;\n"
+            f"    float r = 3.5f;\n"
+            f"    while (a{i} > 0) {{\n"
+            f"        a{i} = a{i} - 1;\n"
+            f"    }}\n"
+            f"    for (int i = 0; i <= 10; i++) {{\n"
+            f"        a{i} = a{i} + 1;\n"
+            f"    }}\n"
+            f"    if (x == 1) {{\n"
+            f"        return 1;\n"
+            f"    }} else if (x != 2) {{\n"
+            f"        return a{i};\n"
+            f"    }} else {{\n"
+            f"        return 0;\n"
+            f"    }}\n"
+            f"}}\n"
+        )
+    partes.append("int main() {\n    int valor = 5;\n    printf(\"%d\", valor);\n    return 0;\n}\n")
+    return "".join(partes)
+
+def generar_cuerpo_grande(n_sentencias):
+    # Un solo main con n sentencias variadas: mide el despacho de cuerpo()
+    sentencias = (
+        "    int v{i} = {i} + 1;\n",
+        "    v{i} = v{i} * 2;\n",
+        "    const float c{i} = 1.5f;\n",
+        "    if (v{i} > 0) {{ v{i} = 0; }}\n",
+        "    while (v{i} < 3) {{ v{i} = v{i} + 1; }}\n",
+        "    f(v{i});\n",
+    )
+    partes = ["int main() {\n"]
+    for i in range(n_sentencias):
+        partes.append(sentencias[i % len(sentencias)].format(i=i - i % len(sentencias)))
+    partes.append("    return 0;\n}\n")
+    return "".join(partes)
+
+def generar_expresion_larga(n_terminos):
+    # main con una sola expresion de n terminos que mezcla precedencias
+    terminos = " + ".join(f"x{i} * {i % 7 + 1} - {i % 3}" for i in range(n_terminos // 3))
+    return f"int main() {{\n    int total = {terminos};\n    return 0;\n}}\n"
+
+def generar_anidado(profundidad, n_sentencias):
+    # main con bucles y condicionales anidados a la profundidad dada y n sentencias en cada nivel
+    sentencias = "".join(f"    x = x + {i};\n" for i in range(n_sentencias))
+    aperturas = ("while (x < 3) {\n", "if (x == 1) {\n", "for (int i = 0; i < 3; i++) {\n")
+    partes = ["int main() {\n    int x = 0;\n"]
+    for nivel in range(profundidad):
+        partes.append(aperturas[nivel % len(aperturas)])
+        partes.append(sentencias)
+    partes.append("}\n" * profundidad)
+    partes.append("    return 0;\n}\n")
+    return "".join(partes)
+
+def medir_tiempo(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+def medir_memoria(funcion, *args):
+    # Bytes que sigue ocupando el resultado y pico durante la llamada
+    tracemalloc.start()
+    resultado = funcion(*args)
+    retenido, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, retenido, pico
+
+def comparar_tokens(fuente):
+    """
+    Lista de tuplas (tipo, valor) frente a FlujoTokens: tiempo de lexeo,
+    memoria retenida y tiempo del analisis sintactico sobre cada una.
+    """
+    print(f"Fuente: {len(fuente)} caracteres")
+    for nombre, lexear in (("lista de tuplas", identificar_tokens), ("FlujoTokens", flujo_tokens)):
+        tokens, segundos = medir_tiempo(lexear, fuente)
+        _, retenido, pico = medir_memoria(lexear, fuente)
+        _, segundos_parser = medir_tiempo(lambda: Parser(tokens).parsear())
+        print(f"  {nombre:16} {len(tokens)} tokens  lexeo {segundos:.3f} s  "
+              f"memoria {retenido / 2**20:.1f} MiB ({retenido / len(tokens):.1f} B/token, pico {pico / 2**20:.1f} MiB)  "
+              f"parser {segundos_parser:.3f} s")
+
+def medir_parser(fuente):
+    # Rendimiento del analizador sintactico en tokens por segundo
+    tokens = flujo_tokens(fuente)
+    _, segundos = medir_tiempo(lambda: Parser(tokens).parsear())
+    print(f"  parser: {len(tokens)} tokens en {segundos:.3f} s ({len(tokens) / segundos / 1e6:.2f} M tokens/s)")
+
+def medir_reanalisis(fuente):
+    # Latencia edicion -> AST: analisis completo frente a ParserIncremental.editar en una funcion del medio
+    _, segundos_completo = medir_tiempo(lambda: Parser(flujo_tokens(fuente)).parsear())
+    incremental = ParserIncremental(flujo_tokens(fuente))
+    inicio = fuente.index("return 1;", len(fuente) // 2) + len("return ")
+    _, segundos_edicion = medir_tiempo(incremental.editar, inicio, 1, "7")
+    print(f"  reanalisis: completo {segundos_completo * 1000:.1f} ms  incremental {segundos_edicion * 1000:.2f} ms "
+          f"({incremental.reanalizadas} de {len(incremental.funciones)} funciones analizadas)")
+
+def medir_cache_ast(fuente):
+    # Compilacion en frio (lexer + parser + guardar) frente a una en caliente (cargar de la cache)
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheAST(directorio)
+        def en_frio():
+            programa = Parser(flujo_tokens(fuente)).parsear()
+            cache.guardar(fuente, programa)
+            return programa
+        _, segundos_frio = medir_tiempo(en_frio)
+        _, segundos_caliente = medir_tiempo(cache.cargar, fuente)
+        print(f"  cache AST: en frio {segundos_frio * 1000:.1f} ms  en caliente {segundos_caliente * 1000:.1f} ms")
+
+def medir_paralelo(fuente, procesos=None):
+    # Analisis serie frente a parsear_en_paralelo sobre el mismo flujo de tokens
+    tokens = flujo_tokens(fuente)
+    _, segundos_serie = medir_tiempo(lambda: Parser(tokens).parsear())
+    _, segundos_paralelo = medir_tiempo(parsear_en_paralelo, tokens, procesos)
+    print(f"  parser en paralelo ({procesos or procesos_disponibles()} procesos): serie {segundos_serie:.3f} s  "
+          f"paralelo {segundos_paralelo:.3f} s")
+
+def medir_flujo(fuente):
+    # Pico de memoria: programa completo (AST + ensamblador entero) frente a compilar_en_flujo
+    tokens = flujo_tokens(fuente)
+    with tempfile.TemporaryDirectory() as directorio:
+        def completo():
+            programa = Parser(tokens).parsear()
+            with open(os.path.join(directorio, "completo.s"), "w") as archivo:
+                archivo.write(ENCABEZADO_MINGW + adaptar_mingw(programa.generar_codigo()))
+            try:
+                AnalizadorSemantico().analizar(programa)
+            except Exception:
+                pass
+        def en_flujo():
+            compilar_en_flujo(tokens, os.path.join(directorio, "flujo.s"))
+        for nombre, compilar in (("completo", completo), ("en flujo", en_flujo)):
+            _, segundos = medir_tiempo(compilar)
+            _, _, pico = medir_memoria(compilar)
+            print(f"  compilacion {nombre:8} {segundos:.3f} s  pico {pico / 2**20:.2f} MiB")
+
+def comprobar_memoria_flujo(tamanos=(500, 8000), margen=1.5):
+    """
+    Pico de memoria de compilar_en_flujo con programas de distinto tamano.
+    En flujo solo deben vivir unas pocas funciones a la vez: si el pico del
+    programa mas grande supera margen veces el del mas pequeno, algo retiene
+    las funciones ya escritas y se lanza AssertionError. Devuelve los picos.
+    """
+    picos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for n_funciones in tamanos:
+            tokens = flujo_tokens(generar_fuente(n_funciones))
+            _, _, pico = medir_memoria(compilar_en_flujo, tokens, os.path.join(directorio, "flujo.s"))
+            picos.append(pico)
+            print(f"  compilacion en flujo, {n_funciones} funciones: pico {pico / 2**20:.2f} MiB")
+    if max(picos) > min(picos) * margen:
+        raise AssertionError(f"El pico de compilar_en_flujo crece con el tamano del programa: "
+                             f"{min(picos) / 2**20:.2f} -> {max(picos) / 2**20:.2f} MiB")
+    return picos
+
+def contar_nodos(programa):
+    """
+    Nodos del AST (contando cada aparicion de un nodo compartido) y bytes
+    de los objetos nodo distintos, con una pila explicita (sin limite de
+    recursion). Devuelve (total, bytes, distintos).
+    """
+    total = 0
+    tamano = 0
+    vistos = set()
+    pendientes = [programa]
+    while pendientes:
+        elemento = pendientes.pop()
+        if isinstance(elemento, NodoAST):
+            total += 1
+            if id(elemento) not in vistos:
+                vistos.add(id(elemento))
+                tamano += sys.getsizeof(elemento)
+                if hasattr(elemento, '__dict__'):
+                    tamano += sys.getsizeof(elemento.__dict__)
+            pendientes.extend(getattr(elemento, campo) for clase in type(elemento).__mro__
+                              for campo in getattr(clase, '__slots__', ()))
+        elif isinstance(elemento, (list, tuple)):
+            pendientes.extend(elemento)
+    return total, tamano, len(vistos)
+
+def medir_memoria_ast(fuente):
+    # Memoria retenida por el AST (sin contar los tokens) y bytes por nodo
+    tokens = flujo_tokens(fuente)
+    programa, retenido, _ = medir_memoria(lambda: Parser(tokens).parsear())
+    nodos, tamano_nodos, distintos = contar_nodos(programa)
+    print(f"  AST: {nodos} nodos ({distintos} distintos tras el internado)  total {retenido / 2**20:.1f} MiB "
+          f"({retenido / nodos:.1f} B/nodo con tuplas de token y listas)  solo nodos {tamano_nodos / distintos:.1f} B/nodo")
+
+def medir_arena(fuente):
+    # AST de objetos frente a ArenaAST: memoria retenida, conversion y pickle de ida y vuelta
+    tokens = flujo_tokens(fuente)
+    programa, retenido_objetos, _ = medir_memoria(lambda: Parser(tokens).parsear())
+    arena, retenido_arena, _ = medir_memoria(ArenaAST.desde_nodos, programa)
+    _, segundos_aplanar = medir_tiempo(ArenaAST.desde_nodos, programa)
+    _, segundos_reconstruir = medir_tiempo(arena.a_nodos)
+    print(f"  arena: {len(arena)} entradas  {retenido_arena / 2**20:.1f} MiB frente a {retenido_objetos / 2**20:.1f} MiB "
+          f"en objetos  (aplanar {segundos_aplanar:.3f} s, reconstruir {segundos_reconstruir:.3f} s)")
+    for nombre, arbol in (("objetos", programa), ("arena", arena)):
+        datos, segundos_dump = medir_tiempo(pickle.dumps, arbol, pickle.HIGHEST_PROTOCOL)
+        _, segundos_load = medir_tiempo(pickle.loads, datos)
+        print(f"    pickle {nombre:8} {len(datos) / 2**20:.1f} MiB  dumps {segundos_dump:.3f} s  loads {segundos_load:.3f} s")
+
+def medir_visitantes(fuente, expresion):
+    # Coste por nodo de los recorridos sobre Visitante: impresion del AST y optimizador de expresiones
+    programa = Parser(flujo_tokens(fuente)).parsear()
+    nodos, _, _ = contar_nodos(programa)
+    _, segundos = medir_tiempo(imprimir_ast, programa)
+    print(f"  imprimir_ast: {nodos} nodos en {segundos:.3f} s ({segundos / nodos * 1e9:.0f} ns/nodo)")
+    asignacion = Parser(flujo_tokens(expresion)).parsear().funciones[0].cuerpo[0]
+    nodos, _, _ = contar_nodos(asignacion.expresion)
+    _, segundos = medir_tiempo(asignacion.expresion.optimizar)
+    print(f"  optimizador: {nodos} nodos en {segundos:.3f} s ({segundos / nodos * 1e9:.0f} ns/nodo)")
+
+def medir_volcado_json(fuente):
+    # json.dumps(imprimir_ast(...)) frente a volcar_ast escribiendo en flujo: tiempo y pico de memoria
+    programa = Parser(flujo_tokens(fuente)).parsear()
+    def en_memoria(archivo):
+        archivo.write(json.dumps(imprimir_ast(programa), indent=1))
+    def en_flujo(archivo):
+        volcar_ast(programa, archivo)
+    with open(os.devnull, "w") as archivo:
+        for nombre, volcar in (("json.dumps", en_memoria), ("en flujo", en_flujo)):
+            _, segundos = medir_tiempo(volcar, archivo)
+            _, _, pico = medir_memoria(volcar, archivo)
+            print(f"  volcado JSON {nombre:10} {segundos:.3f} s  pico {pico / 2**20:.2f} MiB")
+
+def medir_ast_binario(fuente):
+    # Volcado JSON frente al formato binario, y carga de una sola funcion frente a todo el programa
+    programa = Parser(flujo_tokens(fuente)).parsear()
+    texto, segundos_json = medir_tiempo(lambda: json.dumps(imprimir_ast(programa), indent=1))
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "programa.astb")
+        _, segundos_escribir = medir_tiempo(escribir_ast, programa, ruta)
+        print(f"  JSON {len(texto) / 2**20:.1f} MiB en {segundos_json:.3f} s  binario "
+              f"{os.path.getsize(ruta) / 2**20:.1f} MiB en {segundos_escribir:.3f} s")
+        with LectorAST(ruta) as lector:
+            nombre = programa.funciones[len(programa.funciones) // 2].nombre
+            _, segundos_una = medir_tiempo(lector.funcion, nombre)
+            _, segundos_todo = medir_tiempo(lector.programa)
+        print(f"    carga: una funcion {segundos_una * 1000:.2f} ms  programa completo {segundos_todo:.3f} s")
+
+def medir_codegen(fuente):
+    # Generacion de codigo en dos etapas: AST -> representacion intermedia -> x86 (texto completo y a un archivo)
+    programa = Parser(flujo_tokens(fuente)).parsear()
+    programa_ir, segundos_ir = medir_tiempo(programa.generar_ir)
+    codigo, segundos = medir_tiempo(texto_x86, programa_ir)
+    with open(os.devnull, "w") as archivo:
+        emisor = Emisor(archivo)
+        _, segundos_stream = medir_tiempo(lambda: (emisor.emitir(programa_ir), emisor.vaciar()))
+    bloques = sum(len(funcion.bloques) for funcion in programa_ir.funciones)
+    instrucciones = [linea.split(None, 1)[0] for linea in codigo.split('\n') if linea.startswith('    ')]
+    pila = sum(1 for operacion in instrucciones if operacion in ('push', 'pop'))
+    print(f"  codegen: representacion intermedia en {segundos_ir:.3f} s ({bloques} bloques basicos); "
+          f"{len(codigo) / 2**20:.1f} MiB de ensamblador en {segundos:.3f} s (a un stream {segundos_stream:.3f} s); "
+          f"{len(instrucciones)} instrucciones, {pila} push/pop")
+
+def medir_cache_codigo(fuente):
+    # Recompilar tras editar una funcion: generar_codigo completo frente a CacheCodigo
+    incremental = ParserIncremental(flujo_tokens(fuente))
+    cache = CacheCodigo()
+    _, segundos_frio = medir_tiempo(cache.generar_codigo, incremental.programa)
+    inicio = fuente.index("return 1;", len(fuente) // 2) + len("return ")
+    programa = incremental.editar(inicio, 1, "7")
+    _, segundos_completo = medir_tiempo(programa.generar_codigo)
+    _, segundos_cache = medir_tiempo(cache.generar_codigo, programa)
+    _, segundos_reanalisis = medir_tiempo(cache.generar_codigo, Parser(flujo_tokens(fuente)).parsear())
+    print(f"  cache de codigo: en frio {segundos_frio:.3f} s  tras editar una funcion: completo "
+          f"{segundos_completo:.3f} s  con cache {segundos_cache:.3f} s ({cache.regeneradas} regeneradas)  "
+          f"AST nuevo (huellas) {segundos_reanalisis:.3f} s")
+
+def medir_peephole(fuente):
+    # Peephole sobre las lineas generadas: tiempo e instrucciones quitadas por regla
+    lineas = Parser(flujo_tokens(fuente)).parsear().generar_lineas()
+    peephole = Peephole()
+    optimizadas, segundos = medir_tiempo(peephole.optimizar, lineas)
+    print(f"  peephole: {len(lineas)} lineas en {segundos:.3f} s, quedan {len(optimizadas)}")
+    print(f"    {peephole.informe()}")
+
+def comparar_lexers(fuente):
+    """
+    Lexer con expresiones regulares (re) frente al DFA generado desde
+    token_patron, sobre str y sobre bytes; ambos deben dar el mismo flujo.
+    """
+    lexer_dfa = LexerDFA()
+    for entrada in (fuente, fuente.encode('utf-8')):
+        modo = "str" if isinstance(entrada, str) else "bytes"
+        _, segundos_generar = medir_tiempo(lexer_dfa.automata, not isinstance(entrada, str))
+        tokens_re, segundos_re = medir_tiempo(flujo_tokens, entrada)
+        tokens_dfa, segundos_dfa = medir_tiempo(lexer_dfa.flujo_tokens, entrada)
+        iguales = (tokens_re.tipos == tokens_dfa.tipos and tokens_re.inicios == tokens_dfa.inicios
+                   and tokens_re.fines == tokens_dfa.fines)
+        print(f"  {modo:5} re {segundos_re:.3f} s  DFA {segundos_dfa:.3f} s "
+              f"(generacion {segundos_generar * 1000:.1f} ms)  mismos tokens: {iguales}")
+
+if __name__ == "__main__":
+    n_funciones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    fuente = generar_fuente(n_funciones)
+    comparar_tokens(fuente)
+    medir_memoria_ast(fuente)
+    medir_arena(fuente)
+    medir_visitantes(fuente, generar_expresion_larga(10000))
+    medir_volcado_json(fuente)
+    medir_ast_binario(fuente)
+    comparar_lexers(fuente)
+    medir_reanalisis(fuente)
+    medir_cache_ast(fuente)
+    medir_paralelo(fuente)
+    medir_flujo(fuente)
+    comprobar_memoria_flujo()
+    medir_parser(generar_cuerpo_grande(n_funciones * 20))
+    for n_terminos in (10000, 100000):
+        medir_parser(generar_expresion_larga(n_terminos))
+    medir_codegen(fuente)
+    medir_cache_codigo(fuente)
+    for profundidad in (50, 150):
+        medir_codegen(generar_anidado(profundidad, 200))
+    medir_peephole(fuente)
+    medir_peephole(generar_anidado(50, 200))
@@ -0,0 +1,140 @@
+"""
+Interpretes minimos para las pruebas: ejecutan la representacion
+intermedia de una funcion (ir.py) o las lineas x86 del backend (x86.py)
+sobre un diccionario de variables enteras y devuelven el valor retornado.
+Solo cubren lo que generan las expresiones y el control de flujo, sin
+llamadas a funciones.
+"""
+from ir import Temporal, Variable, Constante
+from x86 import Etiqueta, BAJO
+
+def division_c(a, b):
+    # Division entera de C: se trunca hacia cero
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+OPERACIONES_C = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': division_c,
+    '>': lambda a, b: int(a > b),
+    '<': lambda a, b: int(a < b),
+    '>=': lambda a, b: int(a >= b),
+    '<=': lambda a, b: int(a <= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+}
+
+def ejecutar_ir(funcion, variables, limite=100000):
+    variables = dict(variables)
+    temporales = {}
+    pila = []
+
+    def valor(operando):
+        if type(operando) is Temporal:
+            return temporales[operando.numero]
+        if type(operando) is Variable:
+            return variables[operando.nombre]
+        return int(operando.valor)
+
+    bloque = funcion.bloques[0]
+    for _ in range(limite):
+        for instruccion in bloque.instrucciones:
+            operacion, destino, operandos = instruccion.operacion, instruccion.destino, instruccion.operandos
+            if operacion in ('declarar', 'constante'):
+                continue
+            if operacion == 'apilar':
+                pila.append(valor(operandos[0]))
+                continue
+            if operacion == 'desapilar':
+                resultado = pila.pop()
+            elif operacion == 'copiar':
+                resultado = valor(operandos[0])
+            else:
+                resultado = OPERACIONES_C[operacion](valor(operandos[0]), valor(operandos[1]))
+            if type(destino) is Temporal:
+                temporales[destino.numero] = resultado
+            else:
+                variables[destino.nombre] = resultado
+        terminador = bloque.terminador
+        if terminador.operacion == 'retornar':
+            assert not pila, "la pila debe quedar vacia"
+            return valor(terminador.operandos[0]) if terminador.operandos else None
+        if terminador.operacion == 'saltar':
+            bloque = terminador.operandos[0]
+        else:
+            condicion, verdadero, falso = terminador.operandos
+            bloque = verdadero if valor(condicion) else falso
+    raise RuntimeError("la funcion no termina")
+
+SALTOS = {'jmp': lambda d: True, 'je': lambda d: d == 0, 'jne': lambda d: d != 0, 'jg': lambda d: d > 0,
+          'jl': lambda d: d < 0, 'jge': lambda d: d >= 0, 'jle': lambda d: d <= 0}
+CONDICIONES = {'setg': lambda d: d > 0, 'setl': lambda d: d < 0, 'setge': lambda d: d >= 0,
+               'setle': lambda d: d <= 0, 'sete': lambda d: d == 0, 'setne': lambda d: d != 0}
+REGISTRO_DE_BYTE = {bajo: registro for registro, bajo in BAJO.items()}
+
+def con_signo(valor):
+    valor &= 0xffffffff
+    return valor - (1 << 32) if valor & 0x80000000 else valor
+
+def ejecutar_x86(lineas, variables, limite=100000):
+    """
+    Ejecuta las lineas de una funcion (Etiqueta, Instruccion o texto) y
+    devuelve eax en el ret. cmp guarda la diferencia con signo en lugar de
+    las banderas, y setcc y los saltos condicionales la leen; los
+    registros empiezan con basura.
+    """
+    lineas = [linea for linea in lineas if type(linea) is not str]
+    etiquetas = {linea.nombre: i for i, linea in enumerate(lineas) if type(linea) is Etiqueta}
+    registros = {registro: 0x5eed0000 + i for i, registro in enumerate(('eax', 'ecx', 'edx', 'ebx', 'esp', 'ebp'))}
+    memoria = dict(variables)
+    pila = []
+    diferencia = None
+
+    def leer(operando):
+        if operando in registros:
+            return registros[operando]
+        if operando in REGISTRO_DE_BYTE:
+            return registros[REGISTRO_DE_BYTE[operando]] & 0xff
+        if operando.startswith('['):
+            return memoria[operando[1:-1]]
+        return con_signo(int(operando))
+
+    def escribir(operando, valor):
+        if operando.startswith('['):
+            memoria[operando[1:-1]] = con_signo(valor)
+        else:
+            registros[operando] = con_signo(valor)
+
+    posicion = 0
+    for _ in range(limite):
+        linea = lineas[posicion]
+        posicion += 1
+        if type(linea) is Etiqueta:
+            continue
+        operacion, operandos = linea.operacion, linea.operandos
+        if operacion == 'mov' or operacion == 'movzx':
+            escribir(operandos[0], leer(operandos[1]))
+        elif operacion == 'add':
+            escribir(operandos[0], leer(operandos[0]) + leer(operandos[1]))
+        elif operacion == 'sub':
+            escribir(operandos[0], leer(operandos[0]) - leer(operandos[1]))
+        elif operacion == 'push':
+            pila.append(leer(operandos[0]))
+        elif operacion == 'pop':
+            escribir(operandos[0], pila.pop())
+        elif operacion == 'cmp':
+            diferencia = leer(operandos[0]) - leer(operandos[1])
+        elif operacion in CONDICIONES:
+            registro = REGISTRO_DE_BYTE[operandos[0]]
+            registros[registro] = con_signo((registros[registro] & ~0xff) | CONDICIONES[operacion](diferencia))
+        elif operacion in SALTOS:
+            if operacion == 'jmp' or SALTOS[operacion](diferencia):
+                posicion = etiquetas[operandos[0]]
+        elif operacion == 'ret':
+            assert not pila, "la pila debe quedar vacia"
+            return registros['eax']
+        else:
+            raise ValueError(f"instruccion no soportada: {linea.a_texto()}")
+    raise RuntimeError("la funcion no termina")
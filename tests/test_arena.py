@@ -0,0 +1,144 @@
+import pytest
+
+from analizador import flujo_tokens, Parser
+import nodos
+from arena import ArenaAST, CODIGO_NODO, comprobar_formato
+from ast_binario import escribir_ast, LectorAST, codificar_constantes, decodificar_constantes
+from nodos import (NodoAST, FabricaNodos, NodoPrograma, NodoFuncion, NodoAsignacion, NodoOperacion, NodoIdentificador,
+                   NodoNumero, NodoIncremento, NodoRetorno, huella_estructural)
+
+FUENTE = """#include <stdio.h>
+int suma(int a, int b) {
+    int c = a + b * 2;
+    c = a + b * 2;
+    if (c > 10) {
+        printf("grande %d", c);
+    } else if (c == 5) {
+        c = c + 1;
+    } else {
+        c = 0;
+    }
+    return c;
+}
+
+int main() {
+    int x = 5;
+    const float pi = 3.14f;
+    while (x > 0) {
+        x = x - 1;
+    }
+    for (int i = 0; i < 3; i++) {
+        x = x + i;
+    }
+    return x;
+}
+"""
+
+@pytest.fixture
+def programa():
+    return Parser(flujo_tokens(FUENTE)).parsear()
+
+def test_arena_ida_y_vuelta(programa):
+    reconstruido = ArenaAST.desde_nodos(programa).a_nodos()
+    assert huella_estructural(reconstruido) == huella_estructural(programa)
+
+def test_arena_subarbol(programa):
+    arena = ArenaAST.desde_nodos(programa)
+    funcion = next(i for i in arena.recorrer() if arena.tipos[i] == CODIGO_NODO[NodoFuncion]
+                   and arena.valor(arena.campo(i, 'nombre')) == 'main')
+    assert huella_estructural(arena.a_nodos(funcion)) == huella_estructural(programa.funciones[1])
+
+def test_arena_guarda_una_vez_los_nodos_compartidos():
+    fabrica = FabricaNodos()
+    def suma():
+        return fabrica.crear(NodoOperacion, fabrica.crear(NodoIdentificador, ('IDENTIFIER', 'a')), '+',
+                             fabrica.crear(NodoNumero, ('NUMBER', '1')))
+    cuerpo = [NodoAsignacion(('IDENTIFIER', 'x'), suma()), NodoAsignacion(('IDENTIFIER', 'y'), suma()),
+              NodoRetorno(suma())]
+    programa = NodoPrograma([NodoFuncion('main', [], cuerpo)])
+    arena = ArenaAST.desde_nodos(programa)
+    assert arena.contar_tipos()['NodoOperacion'] == 1
+    assert arena.contar_tipos()['NodoIdentificador'] == 1
+    reconstruido = arena.a_nodos()
+    assert huella_estructural(reconstruido) == huella_estructural(programa)
+    # La suma compartida vuelve como un solo objeto
+    asignacion_x, asignacion_y, retorno = reconstruido.funciones[0].cuerpo
+    assert asignacion_x.expresion is asignacion_y.expresion is retorno.expresion
+
+def test_arena_no_mezcla_constantes_de_distinto_tipo():
+    programa = NodoPrograma([NodoFuncion('main', [], [
+        NodoAsignacion(('IDENTIFIER', '5'), NodoNumero(('NUMBER', '5'))),
+        NodoAsignacion(('IDENTIFIER', 'n'), NodoIdentificador(('IDENTIFIER', '5'))),
+        NodoIncremento(1, NodoNumero(1.0), True),
+        NodoIncremento(True, NodoNumero(1), 1.0),
+    ])])
+    cuerpo = ArenaAST.desde_nodos(programa).a_nodos().funciones[0].cuerpo
+    assert type(cuerpo[1].expresion) is NodoIdentificador and cuerpo[1].expresion.nombre == ('IDENTIFIER', '5')
+    assert type(cuerpo[0].expresion) is NodoNumero and cuerpo[0].expresion.valor == ('NUMBER', '5')
+    for incremento, esperado in zip(cuerpo[2:], [(1, 1.0, True), (True, 1, 1.0)]):
+        obtenido = (incremento.variable, incremento.valor.valor, incremento.tipo)
+        assert obtenido == esperado
+        assert [type(v) for v in obtenido] == [type(v) for v in esperado]
+
+def test_binario_ida_y_vuelta(programa, tmp_path):
+    ruta = tmp_path / "programa.astb"
+    escribir_ast(programa, ruta)
+    with LectorAST(ruta) as lector:
+        assert len(lector) == 2
+        assert lector.nombres() == ('suma', 'main')
+        assert huella_estructural(lector.programa()) == huella_estructural(programa)
+        assert huella_estructural(lector.funcion('main')) == huella_estructural(programa.funciones[1])
+        assert huella_estructural(lector.funcion(0)) == huella_estructural(programa.funciones[0])
+
+def test_binario_rechaza_otro_formato(tmp_path):
+    ruta = tmp_path / "otro.astb"
+    ruta.write_bytes(b'ASTB\x00\x01' + bytes(16))
+    with pytest.raises(ValueError):
+        LectorAST(ruta)
+
+@pytest.mark.parametrize("version", [b'\x00\x01', b'\x00\x02'])
+def test_binario_rechaza_versiones_anteriores(programa, tmp_path, version):
+    # La version 2 tenia codigos de nodo segun el orden de nodos.py y constantes en marshal
+    ruta = tmp_path / "viejo.astb"
+    escribir_ast(programa, ruta)
+    datos = ruta.read_bytes()
+    ruta.write_bytes(b'ASTB' + version + datos[6:])
+    with pytest.raises(ValueError):
+        LectorAST(ruta)
+
+def test_constantes_ida_y_vuelta():
+    valores = [None, True, False, 0, 1, -7, 2 ** 70, 1.0, -0.5, 1e300, '', 'x', 'caf\u00e9 \u20ac',
+               ('NUMBER', '5'), ('IDENTIFIER', 'x'), (), (('a', 1), (None, (2.5, True)))]
+    obtenidos = decodificar_constantes(codificar_constantes(valores))
+    assert obtenidos == valores
+    # 1, 1.0 y True son iguales con ==: tambien tiene que conservarse el tipo
+    assert [type(v) for v in obtenidos] == [type(v) for v in valores]
+
+def test_constantes_con_bytes_fijos():
+    # El formato no depende de la version de Python: estos bytes no deben cambiar
+    assert codificar_constantes([None, True, 7, ('NUMBER', '5'), 1.5]) == (
+        b'\x05\x00\x00\x00' b'N' b'T' b'i\x01\x00\x00\x007'
+        b't\x02\x00\x00\x00s\x06\x00\x00\x00NUMBERs\x01\x00\x00\x005'
+        b'f\x00\x00\x00\x00\x00\x00\xf8?')
+
+def test_codigos_de_nodo_fijos():
+    # Los codigos son parte del formato guardado, no el orden de las clases en nodos.py
+    assert CODIGO_NODO[NodoFuncion] == 0
+    assert CODIGO_NODO[NodoOperacion] == 3
+    assert CODIGO_NODO[NodoPrograma] == 8
+    assert max(CODIGO_NODO.values()) == len(CODIGO_NODO) - 1
+
+def test_clase_nueva_sin_codigo_falla(monkeypatch):
+    class NodoNuevo(NodoAST):
+        __slots__ = ('valor',)
+    monkeypatch.setattr(nodos, 'NodoNuevo', NodoNuevo, raising=False)
+    with pytest.raises(TypeError, match='NodoNuevo'):
+        comprobar_formato()
+
+def test_campos_cambiados_fallan(monkeypatch):
+    # Un campo nuevo en NodoRetorno sin actualizar FORMATO_NODOS
+    cambiado = type('NodoRetorno', (NodoAST,), {'__slots__': ('valor', 'expresion')})
+    monkeypatch.setattr(nodos, 'NodoRetorno', cambiado)
+    monkeypatch.setitem(CODIGO_NODO, cambiado, CODIGO_NODO[NodoRetorno])
+    with pytest.raises(TypeError, match='NodoRetorno'):
+        comprobar_formato()
@@ -0,0 +1,83 @@
+import os
+import pickle
+
+from analizador import flujo_tokens, Parser, CacheAST, imprimir_ast
+from nodos import CacheCodigo
+
+FUENTE = "int main() {\n    int x = 1;\n    return x;\n}\n"
+
+def parsear(fuente):
+    return Parser(flujo_tokens(fuente)).parsear()
+
+def desalojar_al_leer(monkeypatch):
+    # Otro proceso borra la entrada justo despues de que se lee
+    cargar = pickle.load
+    def cargar_y_borrar(archivo):
+        valor = cargar(archivo)
+        os.remove(archivo.name)
+        return valor
+    monkeypatch.setattr(pickle, 'load', cargar_y_borrar)
+
+def test_entrada_desalojada_tras_leerla(tmp_path, monkeypatch):
+    cache = CacheAST(tmp_path)
+    cache.guardar(FUENTE, parsear(FUENTE))
+    codigo = CacheCodigo()
+    codigo.generar_codigo(parsear(FUENTE))
+    cache.guardar_codigo(codigo)
+    desalojar_al_leer(monkeypatch)
+    assert imprimir_ast(cache.cargar(FUENTE)) == imprimir_ast(parsear(FUENTE))
+    assert cache.cargar_codigo().codigos == codigo.codigos
+    assert os.listdir(tmp_path) == []
+
+OTRAS = [FUENTE.replace("1", str(i)) for i in (2, 3)]
+
+def test_acierto_y_fallo(tmp_path):
+    cache = CacheAST(tmp_path)
+    assert cache.cargar(FUENTE) is None
+    programa = parsear(FUENTE)
+    cache.guardar(FUENTE, programa)
+    assert imprimir_ast(cache.cargar(FUENTE)) == imprimir_ast(programa)
+    # La misma fuente en bytes (el camino del mmap) es la misma entrada
+    assert cache.cargar(FUENTE.encode('utf-8')) is not None
+    assert cache.cargar(OTRAS[0]) is None
+
+def test_otra_version_del_compilador_invalida(tmp_path):
+    cache = CacheAST(tmp_path)
+    cache.guardar(FUENTE, parsear(FUENTE))
+    otra = CacheAST(tmp_path)
+    otra.huella = bytes(16)  # Como si analizador.py o nodos.py hubieran cambiado
+    assert otra.ruta(FUENTE) != cache.ruta(FUENTE)
+    assert otra.cargar(FUENTE) is None
+
+def test_entrada_corrupta_se_descarta(tmp_path):
+    cache = CacheAST(tmp_path)
+    cache.guardar(FUENTE, parsear(FUENTE))
+    with open(cache.ruta(FUENTE), 'wb') as archivo:
+        archivo.write(b'no es un pickle')
+    assert cache.cargar(FUENTE) is None
+    assert not os.path.exists(cache.ruta(FUENTE))
+
+def test_acierto_renueva_la_fecha(tmp_path):
+    cache = CacheAST(tmp_path)
+    cache.guardar(FUENTE, parsear(FUENTE))
+    ruta = cache.ruta(FUENTE)
+    os.utime(ruta, (1000, 1000))
+    cache.cargar(FUENTE)
+    assert os.stat(ruta).st_mtime > 1000
+
+def test_desalojo_de_las_menos_usadas(tmp_path):
+    cache = CacheAST(tmp_path)
+    fuentes = [FUENTE] + OTRAS
+    for i, fuente in enumerate(fuentes):
+        cache.guardar(fuente, parsear(fuente))
+        os.utime(cache.ruta(fuente), (1000 * (i + 1), 1000 * (i + 1)))
+    # La mas vieja se usa de nuevo: la menos usada pasa a ser la segunda
+    cache.cargar(FUENTE)
+    tamanos = [os.stat(cache.ruta(fuente)).st_size for fuente in fuentes]
+    cache.limite = sum(tamanos) - 1
+    cache.desalojar()
+    assert [os.path.exists(cache.ruta(fuente)) for fuente in fuentes] == [True, False, True]
+    # Guardar por encima del limite desaloja al guardar
+    cache.limite = tamanos[1]
+    cache.guardar(OTRAS[0], parsear(OTRAS[0]))
+    assert os.listdir(tmp_path) == [os.path.basename(cache.ruta(OTRAS[0]))]
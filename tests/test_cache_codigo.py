@@ -0,0 +1,110 @@
+import re
+
+from analizador import flujo_tokens, Parser, CacheAST, generar_ensamblador
+from ir import ConstructorIR
+from nodos import CacheCodigo
+from peephole import Peephole
+from x86 import texto_lineas, lineas_x86
+
+CUENTA = """int cuenta(int a) {
+    while (a > 0) {
+        a = a - 1;
+    }
+    if (a == 0) {
+        a = 1;
+    }
+    return a;
+}
+"""
+
+OTRA = """int otra(int b) {
+    for (int i = 0; i < b; i++) {
+        b = b - 1;
+    }
+    while (b > 2) {
+        b = b - 2;
+    }
+    return b;
+}
+"""
+
+MAIN = """int main() {
+    int x = cuenta(3);
+    return x;
+}
+"""
+
+def parsear(fuente):
+    return Parser(flujo_tokens(fuente)).parsear()
+
+def codigo_de(texto, nombre):
+    # Lineas de la funcion nombre dentro del texto de un programa
+    return texto[texto.index(nombre + ':\n'):].split('\n\n\n')[0]
+
+def test_funcion_igual_en_otra_posicion_da_el_mismo_codigo():
+    cache = CacheCodigo()
+    primero = cache.generar_codigo(parsear(CUENTA + MAIN))
+    # Otra funcion con etiquetas delante: con un contador global cuenta empezaria en otro numero
+    segundo_programa = parsear(OTRA + CUENTA + MAIN)
+    segundo = cache.generar_codigo(segundo_programa)
+    assert cache.regeneradas == 1  # Solo otra; cuenta y main salen de la cache
+    assert segundo == segundo_programa.generar_codigo()
+    assert codigo_de(primero, 'cuenta') == codigo_de(segundo, 'cuenta')
+    for nombre in ('cuenta', 'otra'):
+        numeros = sorted({int(n) for n in re.findall(r'\.L(\d+)_', codigo_de(segundo, nombre))})
+        assert numeros == list(range(len(numeros))) and numeros[0] == 0
+
+def test_cache_descarta_funciones_que_ya_no_estan():
+    cache = CacheCodigo()
+    cache.generar_codigo(parsear(OTRA + CUENTA + MAIN))
+    cache.generar_codigo(parsear(CUENTA + MAIN))
+    assert len(cache.codigos) == 2
+    cache.generar_codigo(parsear(OTRA + CUENTA + MAIN))
+    assert cache.regeneradas == 1
+
+def test_cache_con_peephole_igual_que_el_programa_completo():
+    # El camino del driver: peephole por funcion da el mismo texto que sobre todo el programa
+    programa = parsear(OTRA + CUENTA + MAIN)
+    completo = texto_lineas(Peephole().optimizar(lineas_x86(programa.generar_ir())))
+    peephole = Peephole()
+    por_funcion = CacheCodigo().generar_codigo(
+        programa, lambda funcion: texto_lineas(peephole.optimizar(funcion.generar_lineas())))
+    assert por_funcion == completo
+
+def test_cache_de_codigo_en_disco(tmp_path):
+    programa = parsear(OTRA + CUENTA + MAIN)
+    cache_ast = CacheAST(tmp_path)
+    cache = cache_ast.cargar_codigo()
+    texto = cache.generar_codigo(programa)
+    assert cache.regeneradas == 3
+    cache_ast.guardar_codigo(cache)
+    # Otra ejecucion: un AST nuevo con las mismas funciones no genera nada
+    cache = cache_ast.cargar_codigo()
+    assert cache.generar_codigo(parsear(OTRA + CUENTA + MAIN)) == texto
+    assert cache.regeneradas == 0
+
+def test_funcion_sin_cambios_no_se_vuelve_a_bajar(tmp_path, monkeypatch):
+    # El camino del driver: la representacion intermedia se construye dentro de la cache
+    bajadas = []
+    abrir_funcion = ConstructorIR.abrir_funcion
+    def contar(constructor, nombre):
+        bajadas.append(nombre)
+        abrir_funcion(constructor, nombre)
+    monkeypatch.setattr(ConstructorIR, 'abrir_funcion', contar)
+
+    cache_ast = CacheAST(tmp_path)
+    mostradas = []
+    programa = parsear(CUENTA + MAIN)
+    cache = cache_ast.cargar_codigo()
+    texto = generar_ensamblador(programa, cache, Peephole(), mostradas.append)
+    assert bajadas == ['cuenta', 'main'] and [f.nombre for f in mostradas] == bajadas
+    assert texto == texto_lineas(Peephole().optimizar(lineas_x86(programa.generar_ir())))
+    cache_ast.guardar_codigo(cache)
+
+    # Otra ejecucion con una funcion nueva: solo esa se baja y se muestra
+    bajadas.clear()
+    mostradas.clear()
+    cache = cache_ast.cargar_codigo()
+    generar_ensamblador(parsear(OTRA + CUENTA + MAIN), cache, Peephole(), mostradas.append)
+    assert bajadas == ['otra'] and [f.nombre for f in mostradas] == ['otra']
+    assert cache.regeneradas == 1
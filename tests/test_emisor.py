@@ -0,0 +1,48 @@
+import io
+import re
+
+from analizador import flujo_tokens, Parser
+from rendimiento import generar_fuente
+from x86 import Emisor, texto_x86, lineas_x86, texto_lineas
+
+BUCLES = """int {nombre}(int a) {{
+    while (a > 0) {{
+        a = a - 1;
+    }}
+    if (a == 0) {{
+        a = 1;
+    }} else if (a < 0) {{
+        a = 2;
+    }} else {{
+        a = 3;
+    }}
+    return a;
+}}
+"""
+
+def programa_ir(fuente):
+    return Parser(flujo_tokens(fuente)).parsear().generar_ir()
+
+def funciones(texto):
+    # Texto de cada funcion del programa, por nombre
+    return dict(re.findall(r'^(\w+):\n(.*?)(?=^\w+:\n|\Z)', texto, re.M | re.S))
+
+def test_etiquetas_numeradas_por_funcion():
+    fuente = BUCLES.format(nombre='uno') + BUCLES.format(nombre='dos') + "int main() {\n    return 0;\n}\n"
+    texto = texto_x86(programa_ir(fuente))
+    uno, dos = funciones(texto)['uno'], funciones(texto)['dos']
+    # Cada funcion vuelve a empezar desde 0: las dos quedan iguales
+    assert uno == dos
+    assert sorted(set(re.findall(r'\.L(\d+)_', uno))) == ['0', '1']
+    assert re.findall(r'^(\.L\d+_\w+):', uno, re.M) == ['.L0_start', '.L0_end', '.L1_next', '.L1_next_0', '.L1_end']
+
+def test_emisor_en_flujo_igual_que_en_memoria():
+    ir = programa_ir(generar_fuente(30))
+    texto = texto_x86(ir)
+    salida = io.StringIO()
+    emisor = Emisor(salida)
+    emisor.LIMITE_BUFFER = 16  # Varias escrituras a mitad del programa
+    emisor.emitir(ir)
+    emisor.vaciar()
+    assert salida.getvalue() == texto
+    assert texto_lineas(lineas_x86(ir)) == texto
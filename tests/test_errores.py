@@ -0,0 +1,100 @@
+import pytest
+
+from analizador import flujo_tokens, Parser, IndiceLineas, FlujoTokens
+
+def error_sintactico(fuente, **opciones):
+    with pytest.raises(SyntaxError) as error:
+        Parser(flujo_tokens(fuente), **opciones).parsear()
+    return error.value
+
+@pytest.mark.parametrize("fuente, linea, columna", [
+    ("int main() {\n    int x = 1;\n    x = ;\n}\n", 3, 9),
+    ("int main() {\n\tint x = 1;\n\twhile (x <) {\n\t}\n}\n", 3, 12),  # Un tabulador es una columna
+    ("int main() {\n    int x = 1;\n    5 5;\n}\n", 3, 7),
+    ("#include <stdio.h>\nint main() {\n    int = 1;\n}\n", 3, 9),
+])
+def test_error_con_linea_y_columna(fuente, linea, columna):
+    for entrada in (fuente, fuente.encode('utf-8')):
+        error = error_sintactico(entrada)
+        assert (error.linea, error.columna) == (linea, columna)
+        assert str(error).endswith(f"(linea {linea}, columna {columna})")
+
+def test_error_al_final_del_archivo():
+    # Sin token que senalar, la posicion es el final de la fuente
+    fuente = "int main() {\n    int x = 1;\n"
+    error = error_sintactico(fuente)
+    assert (error.linea, error.columna) == (3, 1)
+
+def test_error_sin_posicion():
+    # Tokens sueltos (no vienen de un archivo) y errores sobre todo el programa no llevan posicion
+    with pytest.raises(SyntaxError) as error:
+        Parser([('KEYWORD', 'int'), ('DELIMITER', '(')]).parsear()
+    assert not hasattr(error.value, 'linea') and 'linea' not in str(error.value)
+    error = error_sintactico("int f() {\n    return 1;\n}\n")
+    assert str(error) == "Error sintactico: Debe existir una funcion 'main' en el codigo."
+
+def test_indice_de_lineas():
+    fuente = "ab\n\ncd\ne"
+    indice = IndiceLineas(fuente)
+    posiciones = [indice.posicion(i) for i in range(len(fuente) + 1)]
+    assert posiciones == [(1, 1), (1, 2), (1, 3), (2, 1), (3, 1), (3, 2), (3, 3), (4, 1), (4, 2)]
+    assert list(IndiceLineas(fuente.encode()).inicios) == list(indice.inicios)
+
+# Recuperacion en modo panico
+
+CON_ERRORES = """int g( {
+}
+int main() {
+    x = ;
+    int y = 2;
+    y + ;
+    while (y <) {
+        y = 1;
+    }
+    if (y > 0) {
+        y = ;
+    } else {
+        y = 3;
+    }
+    return y;
+}
+"""
+
+def recuperar(fuente):
+    parser = Parser(flujo_tokens(fuente), recuperar=True)
+    return parser.parsear(), parser.errores
+
+def test_recuperacion_informa_todos_los_errores():
+    programa, errores = recuperar(CON_ERRORES)
+    assert [(e.linea, e.columna) for e in errores] == [(1, 8), (4, 9), (6, 5), (7, 15), (11, 13)]
+    # El primer error es el mismo que sin recuperacion
+    assert str(error_sintactico(CON_ERRORES)) == str(errores[0])
+
+def test_recuperacion_conserva_las_sentencias_validas():
+    # La funcion rota se descarta entera; de main quedan las sentencias sin error
+    programa, _ = recuperar(CON_ERRORES)
+    assert [f.nombre for f in programa.funciones] == ['main']
+    cuerpo = programa.funciones[0].cuerpo
+    assert [type(s).__name__ for s in cuerpo] == ['NodoAsignacion', 'NodoIf', 'NodoRetorno']
+    # El if con un error dentro sigue con su else
+    assert cuerpo[1].cuerpo_if == [] and len(cuerpo[1].cuerpo_else) == 1
+
+def test_recuperacion_salta_bloques_enteros():
+    # Un error en la cabecera de un bloque descarta el bloque completo, con sus else
+    fuente = ("int main() {\n    while (1 <) {\n        int a = 1;\n    }\n"
+              "    if (x <) {\n        a = 1;\n    } else {\n        a = ;\n    }\n    return 0;\n}\n")
+    programa, errores = recuperar(fuente)
+    assert [(e.linea, e.columna) for e in errores] == [(2, 15), (5, 12)]
+    assert [type(s).__name__ for s in programa.funciones[0].cuerpo] == ['NodoRetorno']
+
+def test_recuperacion_sin_main():
+    programa, errores = recuperar("int f() {\n    x = ;\n}\n")
+    assert [str(e) for e in errores] == [
+        "Error sintactico: Termino no valido ('DELIMITER', ';') (linea 2, columna 9)",
+        "Error sintactico: Debe existir una funcion 'main' en el codigo."]
+    assert [f.nombre for f in programa.funciones] == ['f']
+
+def test_fuente_sin_errores_no_cambia():
+    fuente = "int main() {\n    int x = 1;\n    return x;\n}\n"
+    programa, errores = recuperar(fuente)
+    assert errores == [] and len(programa.funciones[0].cuerpo) == 2
@@ -0,0 +1,15 @@
+from analizador import flujo_tokens, Parser
+from rendimiento import generar_fuente, comprobar_memoria_flujo
+
+def test_fabrica_por_funcion():
+    parser = Parser(flujo_tokens(generar_fuente(20)))
+    for funcion in parser.iter_funciones(por_funcion=True):
+        assert not parser.fabrica.internados
+
+def test_fabrica_compartida_en_el_programa_completo():
+    parser = Parser(flujo_tokens(generar_fuente(20)))
+    parser.parsear()
+    assert parser.fabrica.internados
+
+def test_memoria_del_flujo_no_crece():
+    comprobar_memoria_flujo((400, 3200))
@@ -0,0 +1,136 @@
+import json
+import random
+
+import pytest
+
+from analizador import flujo_tokens, relexear, Parser, ParserIncremental, imprimir_ast
+
+FUENTE = """#include <stdio.h>
+int doble(int x) {
+    int y = x + x;
+    printf("doble: %d", y);
+    return y;
+}
+
+int signo(int x) {
+    if (x > 0) {
+        return 1;
+    } else {
+        return 0;
+    }
+}
+
+int main() {
+    int valor = doble(3);
+    while (valor > 0) {
+        valor = valor - 1;
+    }
+    int resultado = signo(valor);
+    return resultado;
+}
+"""
+
+def editar_texto(fuente, inicio, borrados, insertado):
+    return fuente[:inicio] + insertado + fuente[inicio + borrados:]
+
+def mismos_tokens(flujo, esperado):
+    assert flujo.fuente == esperado.fuente
+    assert list(flujo.tipos) == list(esperado.tipos)
+    assert list(flujo.inicios) == list(esperado.inicios)
+    assert list(flujo.fines) == list(esperado.fines)
+
+def mismo_arbol(programa, esperado):
+    assert json.dumps(imprimir_ast(programa)) == json.dumps(imprimir_ast(esperado))
+
+# (descripcion, texto antes del que se edita, caracteres borrados, texto insertado)
+EDICIONES = [
+    ("insertar una linea", "    return y;", 0, "    y = y + 1;\n"),
+    ("borrar a traves de tokens", "x + x;", len("x + x"), "x"),
+    ("unir dos tokens", "valor - 1", len("valor - "), "valor1"),
+    ("editar dentro de un string", "%d\", y", 0, "valor "),
+    ("partir un string en dos", "%d\", y", 0, "\", \""),
+    ("unir dos funciones", "}\n\nint signo", len("}\n\nint signo(int x) {\n"), ""),
+    ("sintaxis rota", "}\n\nint signo", 2, ""),
+    ("partir una funcion en dos", "    } else {", 0, "    }\n}\nint otra(int z) {\n    if (z > 1) {\n"),
+    ("borrar todo un cuerpo", "    int y = x + x;", len("    int y = x + x;\n    printf(\"doble: %d\", y);\n"), ""),
+]
+
+@pytest.mark.parametrize("descripcion, ancla, borrados, insertado", EDICIONES, ids=[e[0] for e in EDICIONES])
+def test_relexear_igual_que_lexear_de_nuevo(descripcion, ancla, borrados, insertado):
+    inicio = FUENTE.index(ancla)
+    editada = editar_texto(FUENTE, inicio, borrados, insertado)
+    mismos_tokens(relexear(flujo_tokens(FUENTE), inicio, borrados, insertado), flujo_tokens(editada))
+
+@pytest.mark.parametrize("descripcion, ancla, borrados, insertado", EDICIONES, ids=[e[0] for e in EDICIONES])
+def test_relexear_sobre_bytes(descripcion, ancla, borrados, insertado):
+    inicio = FUENTE.index(ancla)
+    editada = editar_texto(FUENTE, inicio, borrados, insertado)
+    mismos_tokens(relexear(flujo_tokens(FUENTE.encode()), inicio, borrados, insertado), flujo_tokens(editada.encode()))
+
+@pytest.mark.parametrize("descripcion, ancla, borrados, insertado", EDICIONES, ids=[e[0] for e in EDICIONES])
+def test_reanalisis_igual_que_analisis_completo(descripcion, ancla, borrados, insertado):
+    inicio = FUENTE.index(ancla)
+    editada = editar_texto(FUENTE, inicio, borrados, insertado)
+    incremental = ParserIncremental(flujo_tokens(FUENTE))
+    try:
+        esperado = Parser(flujo_tokens(editada)).parsear()
+    except SyntaxError:
+        with pytest.raises(SyntaxError):
+            incremental.editar(inicio, borrados, insertado)
+        return
+    mismo_arbol(incremental.editar(inicio, borrados, insertado), esperado)
+
+def test_reanalisis_reutiliza_las_funciones_no_tocadas():
+    incremental = ParserIncremental(flujo_tokens(FUENTE))
+    antes = incremental.programa.funciones
+    inicio = FUENTE.index("return 1;") + len("return ")
+    despues = incremental.editar(inicio, 1, "7").funciones
+    assert incremental.reanalizadas == 1
+    assert despues[0] is antes[0] and despues[2] is antes[2]
+    assert despues[1] is not antes[1]
+
+def test_ediciones_encadenadas():
+    incremental = ParserIncremental(flujo_tokens(FUENTE))
+    fuente = FUENTE
+    for ancla, borrados, insertado in (("int y", 0, "int z = 1;\n    "), ("valor - 1", 9, "valor - 2"),
+                                       ("int resultado", 0, "valor = 0;\n    ")):
+        inicio = fuente.index(ancla)
+        fuente = editar_texto(fuente, inicio, borrados, insertado)
+        programa = incremental.editar(inicio, borrados, insertado)
+        mismo_arbol(programa, Parser(flujo_tokens(fuente)).parsear())
+
+def test_reanalisis_tras_un_error_vuelve_a_analizar_todo():
+    incremental = ParserIncremental(flujo_tokens(FUENTE))
+    inicio = FUENTE.index("int y")
+    with pytest.raises(SyntaxError):
+        incremental.editar(inicio, 0, "{")
+    fuente = editar_texto(FUENTE, inicio, 0, "{")
+    arreglada = editar_texto(fuente, inicio, 1, "")
+    mismo_arbol(incremental.editar(inicio, 1, ""), Parser(flujo_tokens(arreglada)).parsear())
+
+def ediciones_aleatorias(n, semilla=0):
+    # Borrados e inserciones en posiciones al azar con trozos de la misma fuente
+    aleatorio = random.Random(semilla)
+    for _ in range(n):
+        inicio = aleatorio.randrange(len(FUENTE))
+        borrados = aleatorio.randrange(min(12, len(FUENTE) - inicio) + 1)
+        desde = aleatorio.randrange(len(FUENTE))
+        yield inicio, borrados, FUENTE[desde:desde + aleatorio.randrange(10)]
+
+def test_relexear_ediciones_aleatorias():
+    flujo = flujo_tokens(FUENTE)
+    for inicio, borrados, insertado in ediciones_aleatorias(500):
+        editada = editar_texto(FUENTE, inicio, borrados, insertado)
+        mismos_tokens(relexear(flujo, inicio, borrados, insertado), flujo_tokens(editada))
+
+def test_reanalisis_ediciones_aleatorias():
+    for inicio, borrados, insertado in ediciones_aleatorias(300, semilla=1):
+        editada = editar_texto(FUENTE, inicio, borrados, insertado)
+        incremental = ParserIncremental(flujo_tokens(FUENTE))
+        try:
+            esperado = Parser(flujo_tokens(editada)).parsear()
+        except SyntaxError:
+            with pytest.raises(SyntaxError):
+                incremental.editar(inicio, borrados, insertado)
+            continue
+        mismo_arbol(incremental.editar(inicio, borrados, insertado), esperado)
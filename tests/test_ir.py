@@ -0,0 +1,316 @@
+import pytest
+
+from analizador import flujo_tokens, Parser
+from ir import ConstructorIR, FuncionIR, BloqueBasico, InstruccionIR, Temporal, Variable, Constante
+from nodos import NodoIncremento, NodoOperacion, NodoIdentificador, NodoNumero
+from x86 import REGISTROS, asignar_registros, lineas_x86, texto_x86, Instruccion
+from maquina import ejecutar_ir, ejecutar_x86, OPERACIONES_C
+
+def funcion(fuente):
+    return Parser(flujo_tokens(fuente)).parsear().funciones[-1]
+
+def ejecutar(nodo):
+    # Valor retornado segun la representacion intermedia y segun el x86; deben coincidir
+    valor = ejecutar_ir(nodo.generar_ir(), {})
+    assert ejecutar_x86(nodo.generar_lineas(), {}) == valor
+    return valor
+
+@pytest.mark.parametrize("operador", ['<', '>', '<=', '>=', '==', '!='])
+@pytest.mark.parametrize("a, b", [(3, 5), (5, 3), (4, 4), (-2, 1)])
+def test_comparacion_dentro_de_una_expresion(operador, a, b):
+    # Una comparacion asignada o retornada vale 1 o 0; antes de la representacion intermedia daba el operando derecho
+    fuente = f"""int main() {{
+    int a = {a};
+    int b = {b};
+    int r = a {operador} b;
+    return r;
+}}
+"""
+    assert ejecutar(funcion(fuente)) == OPERACIONES_C[operador](a, b)
+
+def test_comparacion_con_operaciones_a_los_lados():
+    fuente = """int main() {
+    int a = 2;
+    int b = 6;
+    int r = b < a + 5;
+    int s = b - 4 == a;
+    int t = r + s;
+    return t;
+}
+"""
+    assert ejecutar(funcion(fuente)) == 2
+
+# Bajada de cada tipo de nodo a la representacion intermedia
+
+def texto_ir(cuerpo):
+    fuente = "int main() {\n    " + "\n    ".join(cuerpo) + "\n}\n"
+    return funcion(fuente).generar_ir().a_texto()
+
+def bloques(*lineas):
+    return "\n".join(("funcion main",) + lineas)
+
+def test_ir_asignacion_y_operaciones():
+    # El operando derecho directo (variable o entero) no se carga en un temporal
+    assert texto_ir(["int x = a + 2 * b;"]) == bloques(
+        "  main:",
+        "    t0 = a",
+        "    t1 = 2",
+        "    t2 = t1 * b",
+        "    t3 = t0 + t2",
+        "    x = t3",
+        "    retornar")
+
+def test_ir_retorno():
+    assert texto_ir(["return a - b;"]) == bloques(
+        "  main:",
+        "    t0 = a",
+        "    t1 = t0 - b",
+        "    retornar t1")
+
+def test_ir_llamadas():
+    # Argumentos de derecha a izquierda; una llamada como sentencia no tiene destino
+    assert texto_ir(["int r = suma(a, 3);", "pedir();"]) == bloques(
+        "  main:",
+        "    t1 = 3",
+        "    param t1",
+        "    t2 = a",
+        "    param t2",
+        "    t0 = llamar suma, 2",
+        "    r = t0",
+        "    llamar pedir, 0",
+        "    retornar")
+
+def test_ir_cadena():
+    texto = texto_ir(['printf("hola %d", x);'])
+    assert '    t1 = "hola %d"' in texto and "    llamar printf, 2" in texto
+    constante = funcion('int main() {\n    printf("hola");\n}\n').generar_ir().bloques[0].instrucciones[0].operandos[0]
+    assert constante.tipo == 'cadena'
+
+def test_ir_declaraciones_y_flotantes():
+    funcion_ir = funcion("int main() {\n    int x;\n    const float pi = 3.14f;\n    float y = 2.5f;\n}\n").generar_ir()
+    declarar, constante, copiar, asignar = funcion_ir.bloques[0].instrucciones
+    assert (declarar.operacion, declarar.operandos) == ('declarar', ('int', 'x'))
+    assert (constante.operacion, constante.operandos) == ('constante', ('float', 'pi', '3.14f'))
+    assert copiar.operandos[0].tipo == 'flotante' and asignar.destino.nombre == 'y'
+
+def test_ir_while():
+    assert texto_ir(["while (x < 3) {", "    x = x + 1;", "}"]) == bloques(
+        "  main:",
+        "    saltar .L0_start",
+        "  .L0_start:  ; desde main, B2",
+        "    t0 = x",
+        "    t1 = t0 < 3",
+        "    ramificar t1 B2 .L0_end",
+        "  B2:  ; desde .L0_start",
+        "    t2 = x",
+        "    t3 = t2 + 1",
+        "    x = t3",
+        "    saltar .L0_start",
+        "  .L0_end:  ; desde .L0_start",
+        "    retornar")
+
+def test_ir_for():
+    assert texto_ir(["for (int i = 0; i < 3; i++) {", "    x = x + i;", "}"]) == bloques(
+        "  main:",
+        "    t0 = 0",
+        "    i = t0",
+        "    saltar .L0_start",
+        "  .L0_start:  ; desde main, B2",
+        "    t1 = i",
+        "    t2 = t1 < 3",
+        "    ramificar t2 B2 .L0_end",
+        "  B2:  ; desde .L0_start",
+        "    t3 = x",
+        "    t4 = t3 + i",
+        "    x = t4",
+        "    t5 = i",
+        "    t6 = t5 + 1",
+        "    i = t6",
+        "    saltar .L0_start",
+        "  .L0_end:  ; desde .L0_start",
+        "    retornar")
+
+def test_ir_if_sin_else():
+    # Una condicion falsa va directo al final
+    assert texto_ir(["if (x > 0) {", "    x = 1;", "}"]) == bloques(
+        "  main:",
+        "    t0 = x",
+        "    t1 = t0 > 0",
+        "    ramificar t1 B2 .L0_end",
+        "  B2:  ; desde main",
+        "    t2 = 1",
+        "    x = t2",
+        "    saltar .L0_end",
+        "  .L0_end:  ; desde main, B2",
+        "    retornar")
+
+def test_ir_if_else_if_else():
+    assert texto_ir(["if (x > 0) {", "    x = 1;", "} else if (x < 0) {", "    x = 2;", "} else {", "    x = 3;", "}"]) == bloques(
+        "  main:",
+        "    t0 = x",
+        "    t1 = t0 > 0",
+        "    ramificar t1 B3 .L0_next",
+        "  B3:  ; desde main",
+        "    t2 = 1",
+        "    x = t2",
+        "    saltar .L0_end",
+        "  .L0_next:  ; desde main",
+        "    t3 = x",
+        "    t4 = t3 < 0",
+        "    ramificar t4 B5 .L0_next_0",
+        "  B5:  ; desde .L0_next",
+        "    t5 = 2",
+        "    x = t5",
+        "    saltar .L0_end",
+        "  .L0_next_0:  ; desde .L0_next",
+        "    t6 = 3",
+        "    x = t6",
+        "    saltar .L0_end",
+        "  .L0_end:  ; desde B3, B5, .L0_next_0",
+        "    retornar")
+
+@pytest.mark.parametrize("x", [-4, 0, 9])
+def test_if_else_if_else_en_ejecucion(x):
+    fuente = f"""int main() {{
+    int x = {x};
+    int r = 0;
+    if (x > 0) {{
+        r = 1;
+    }} else if (x < 0) {{
+        r = 2;
+    }} else {{
+        r = 3;
+    }}
+    return r;
+}}
+"""
+    assert ejecutar(funcion(fuente)) == (1 if x > 0 else 2 if x < 0 else 3)
+
+@pytest.mark.parametrize("incremento, esperado", [
+    (NodoIncremento('i'), 8), (NodoIncremento('i', tipo='--'), 6),
+    (NodoIncremento('i', NodoOperacion(NodoIdentificador(('IDENTIFIER', 'i')), '+', NodoNumero(('NUMBER', '5'))), '='), 12),
+])
+def test_ir_incremento(incremento, esperado):
+    constructor = ConstructorIR(len(REGISTROS))
+    constructor.abrir_funcion('main')
+    constructor.emitir('copiar', Variable('i'), Constante('7', 'entero'))
+    incremento.a_ir(constructor)
+    constructor.retornar(constructor.evaluar(NodoIdentificador(('IDENTIFIER', 'i'))))
+    funcion_ir = constructor.cerrar_funcion()
+    assert ejecutar_ir(funcion_ir, {}) == esperado
+    assert ejecutar_x86(lineas_x86(funcion_ir), {}) == esperado
+
+def test_ir_programa():
+    programa = Parser(flujo_tokens("int uno() {\n    return 1;\n}\nint main() {\n    int x = 2;\n    return x;\n}\n")).parsear()
+    programa_ir = programa.generar_ir()
+    assert [f.nombre for f in programa_ir.funciones] == ['uno', 'main']
+    # Cada funcion numera sus temporales desde 0
+    assert programa_ir.a_texto() == ("funcion uno\n  uno:\n    t0 = 1\n    retornar t0\n\n"
+                                     "funcion main\n  main:\n    t0 = 2\n    x = t0\n    t1 = x\n    retornar t1")
+
+# Asignacion de registros
+
+def bloque_con(*instrucciones, retorno=None):
+    bloque = BloqueBasico(0, 'main')
+    bloque.instrucciones = [InstruccionIR(operacion, destino, operandos) for operacion, destino, *operandos in instrucciones]
+    bloque.terminador = InstruccionIR('retornar', None, () if retorno is None else (retorno,))
+    return bloque
+
+def sumar_todos(temporales):
+    # t_n = t0 + v0; t_n+1 = t_n + t1; ... mantiene vivos a todos hasta su suma
+    instrucciones = [('copiar', t, Variable(f"v{i}")) for i, t in enumerate(temporales)]
+    acumulado = temporales[0]
+    for temporal in temporales[1:]:
+        siguiente = Temporal(len(temporales) + temporal.numero)
+        instrucciones.append(('+', siguiente, acumulado, temporal))
+        acumulado = siguiente
+    return instrucciones, acumulado
+
+def test_registros_agotados():
+    temporales = [Temporal(i) for i in range(len(REGISTROS) + 1)]
+    instrucciones, resultado = sumar_todos(temporales)
+    with pytest.raises(RuntimeError, match="No quedan registros libres"):
+        asignar_registros([bloque_con(*instrucciones, retorno=resultado)])
+
+def test_registros_justos():
+    temporales = [Temporal(i) for i in range(len(REGISTROS))]
+    instrucciones, resultado = sumar_todos(temporales)
+    registro = asignar_registros([bloque_con(*instrucciones, retorno=resultado)])
+    assert sorted(registro[t] for t in temporales) == sorted(REGISTROS)
+
+def test_registro_liberado_se_reutiliza():
+    # Con los cuatro ocupados, t4 solo cabe en el registro de t2, que muere antes
+    t0, t1, t2, t3, t4, t5, t6, t7 = (Temporal(i) for i in range(8))
+    bloque = bloque_con(
+        ('copiar', t0, Variable('a')), ('copiar', t1, Variable('b')),
+        ('copiar', t2, Variable('c')), ('copiar', t3, Variable('d')),
+        ('copiar', Variable('x'), t2),
+        ('copiar', t4, Variable('e')),
+        ('+', t5, t0, t1), ('+', t6, t5, t3), ('+', t7, t6, t4),
+        retorno=t7)
+    registro = asignar_registros([bloque])
+    assert registro[t4] == registro[t2]
+    assert len({registro[t] for t in (t0, t1, t3, t4)}) == 4
+
+def test_destino_hereda_el_registro_del_operando_que_muere():
+    t0, t1, t2 = Temporal(0), Temporal(1), Temporal(2)
+    bloque = bloque_con(('copiar', t0, Variable('a')), ('copiar', t1, Variable('b')),
+                        ('+', t2, t1, t0), ('copiar', Variable('x'), t2))
+    registro = asignar_registros([bloque])
+    assert registro[t2] == registro[t1] != registro[t0]
+
+# Limpieza del grafo de flujo en el backend
+
+def texto_instrucciones(lineas):
+    return [" ".join((linea.operacion,) + linea.operandos) for linea in lineas if type(linea) is Instruccion]
+
+def test_codigo_tras_return_no_se_emite():
+    funcion_ir = funcion("int main() {\n    return a;\n    a = 5;\n}\n").generar_ir()
+    assert len(funcion_ir.bloques) == 2 and funcion_ir.alcanzables() == funcion_ir.bloques[:1]
+    assert not any("5" in linea for linea in texto_instrucciones(lineas_x86(funcion_ir)))
+
+def test_final_inalcanzable_de_un_if_que_siempre_retorna():
+    fuente = "int main() {\n    if (a > 0) {\n        return 1;\n    } else {\n        return 2;\n    }\n}\n"
+    funcion_ir = funcion(fuente).generar_ir()
+    final = [bloque for bloque in funcion_ir.bloques if bloque.etiqueta() == '.L0_end']
+    assert final and final[0] not in funcion_ir.alcanzables()
+    assert '.L0_end' not in texto_x86(funcion_ir)
+    assert ejecutar_x86(lineas_x86(funcion_ir), {'a': 3}) == 1
+    assert ejecutar_x86(lineas_x86(funcion_ir), {'a': -3}) == 2
+
+def test_sin_salto_al_bloque_siguiente():
+    # En el while solo queda el salto de vuelta al inicio; la entrada cae al inicio y el cuerpo sigue al ramificar
+    funcion_ir = funcion("int main() {\n    while (x < 3) {\n        x = x + 1;\n    }\n}\n").generar_ir()
+    saltos = [linea for linea in texto_instrucciones(lineas_x86(funcion_ir)) if linea.startswith('j')]
+    assert saltos == ['je .L0_end', 'jmp .L0_start']
+
+def funcion_ramificada(orden):
+    # main ramifica a 'si', que retorna 1, o a 'no', que salta a 'otro', que retorna 2; orden fija como se escriben tras main
+    constructor = ConstructorIR(len(REGISTROS))
+    constructor.abrir_funcion('main')
+    condicion = constructor.temporal()
+    constructor.emitir('copiar', condicion, Variable('c'))
+    si, no, otro = constructor.nuevo_bloque(), constructor.nuevo_bloque(), constructor.nuevo_bloque()
+    constructor.ramificar(condicion, si, no)
+    for bloque in orden(si, no, otro):
+        constructor.empezar(bloque)
+        if bloque is no:
+            constructor.emitir('copiar', Variable('c'), Constante('7', 'entero'))
+            constructor.saltar(otro)
+        else:
+            valor = constructor.temporal()
+            constructor.emitir('copiar', valor, Constante('1' if bloque is si else '2', 'entero'))
+            constructor.retornar(valor)
+    return constructor.cerrar_funcion()
+
+@pytest.mark.parametrize("orden, saltos", [
+    (lambda si, no, otro: (si, no, otro), ['je .B2']),  # El verdadero es el siguiente
+    (lambda si, no, otro: (no, otro, si), ['jne .B1']),  # El falso es el siguiente
+    (lambda si, no, otro: (otro, si, no), ['je .B2', 'jmp .B1', 'jmp .B3']),  # Ninguno lo es
+])
+def test_ramificar_segun_el_bloque_siguiente(orden, saltos):
+    funcion_ir = funcion_ramificada(orden)
+    lineas = lineas_x86(funcion_ir)
+    assert [linea for linea in texto_instrucciones(lineas) if linea.startswith('j')] == saltos
+    assert ejecutar_x86(lineas, {'c': 1}) == 1
+    assert ejecutar_x86(lineas, {'c': 0}) == 2
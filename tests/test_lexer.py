@@ -0,0 +1,74 @@
+import os
+import random
+
+import pytest
+
+from analizador import flujo_tokens, Lexer
+from automata import LexerDFA
+
+def tokens_texto_y_bytes(fuente):
+    # (tipo, valor) de cada token lexeando el str y sus bytes UTF-8 (el camino del mmap)
+    return list(flujo_tokens(fuente)), list(flujo_tokens(fuente.encode('utf-8')))
+
+@pytest.mark.parametrize("fuente", [
+    "int café = 1;",
+    "int naïve_x = 2;\nint x_ñ = 3;",
+    "float π = 3.14f;",
+    "int n = ٣ + 1;",  # Digito no ASCII
+    "int\u00a0x = 1;",  # Espacio no ASCII
+    "int x€ = 1;",
+    'printf("año %d", x);',
+    "inté iféé 5é é5 #includeé <stdio.h>",
+])
+def test_texto_y_bytes_dan_los_mismos_tokens(fuente):
+    texto, binario = tokens_texto_y_bytes(fuente)
+    assert texto == binario
+
+def test_caracter_no_ascii_no_es_de_palabra():
+    # Como en bytes: la letra no ASCII corta el identificador y se ignora
+    texto, binario = tokens_texto_y_bytes("int café = 1;")
+    assert texto == [('KEYWORD', 'int'), ('IDENTIFIER', 'caf'), ('OPERATOR', '='), ('NUMBER', '1'), ('DELIMITER', ';')]
+
+# Lexer dirigido por tabla (automata.py) frente al de expresiones regulares
+
+CODIGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'codigo.txt')
+
+# Piezas del corpus aleatorio: operadores compuestos, palabras reservadas pegadas a letras o
+# digitos (intx, if1), numeros con punto y sufijo f, strings, #include y caracteres no ASCII
+PIEZAS = ['a', 'b', '_', '1', '2', '.', 'f', 'x', 'int', 'if', 'else', 'while', 'printf', 'print',
+          '#include', '<stdio.h>', 'intx', 'if1', 'x.h', '==', '!=', '<=', '>=', '++', '--', '+=', '-=',
+          '*=', '/=', '&&', '||', '<', '>', '=', '!', '+', '-', '*', '/', '&', '%', '(', ')', '{', '}',
+          ';', ',', '"', ' ', '\n', '\t', '\x1c', '\u00e9', '\u0663', '\u00a0', '\u20ac']
+
+def corpus(semilla, cantidad=3000):
+    aleatorio = random.Random(semilla)
+    return [''.join(aleatorio.choice(PIEZAS) for _ in range(aleatorio.randint(0, 30))) for _ in range(cantidad)]
+
+def mismos_tokens(lexer_dfa, fuente):
+    esperado = list(Lexer().iter_tokens(fuente))
+    texto = lexer_dfa.flujo_tokens(fuente)
+    binario = lexer_dfa.flujo_tokens(fuente.encode('utf-8'))
+    return list(texto) == esperado and list(binario) == esperado
+
+def test_dfa_igual_que_regex_en_codigo_txt():
+    with open(CODIGO, encoding='utf-8') as archivo:
+        fuente = archivo.read()
+    assert mismos_tokens(LexerDFA(), fuente)
+
+@pytest.mark.parametrize("fuente, esperado", [
+    ("intx if1 int x", [('IDENTIFIER', 'intx'), ('IDENTIFIER', 'if1'), ('KEYWORD', 'int'), ('IDENTIFIER', 'x')]),
+    ("a<=b!=c++", [('IDENTIFIER', 'a'), ('OPERATOR', '<='), ('IDENTIFIER', 'b'), ('OPERATOR', '!='),
+                   ('IDENTIFIER', 'c'), ('OPERATOR', '++')]),
+    ("1.5f 2. x&&y", [('NUMBER', '1.5f'), ('NUMBER', '2'), ('IDENTIFIER', 'x'), ('OPERATOR', '&&'), ('IDENTIFIER', 'y')]),
+    ("printfx printf", [('IDENTIFIER', 'printfx'), ('LIB_FUNCTION', 'printf')]),
+])
+def test_dfa_bordes(fuente, esperado):
+    lexer_dfa = LexerDFA()
+    assert list(Lexer().iter_tokens(fuente)) == esperado
+    assert mismos_tokens(lexer_dfa, fuente)
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_dfa_igual_que_regex_en_corpus_aleatorio(semilla):
+    lexer_dfa = LexerDFA()
+    for fuente in corpus(semilla):
+        assert mismos_tokens(lexer_dfa, fuente), fuente
@@ -0,0 +1,96 @@
+import random
+import sys
+
+import pytest
+
+from analizador import flujo_tokens, Parser
+from nodos import NodoOperacion, NodoNumero, NodoIdentificador
+
+VARIABLES = {'x': 7, 'y': -3, 'z': 0}
+
+def expresion(texto):
+    fuente = f"int main() {{\n    int r = {texto};\n    return 0;\n}}\n"
+    return Parser(flujo_tokens(fuente)).parsear().funciones[0].cuerpo[0].expresion
+
+def division_c(a, b):
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+def evaluar(nodo):
+    # Valor entero de la expresion con la aritmetica de C
+    if isinstance(nodo, NodoNumero):
+        return int(nodo.valor[1])
+    if isinstance(nodo, NodoIdentificador):
+        return VARIABLES[nodo.nombre[1]]
+    a, b = evaluar(nodo.izquierda), evaluar(nodo.derecha)
+    return {'+': a + b, '-': a - b, '*': a * b}[nodo.operador] if nodo.operador != '/' else division_c(a, b)
+
+def forma(nodo):
+    if isinstance(nodo, NodoNumero):
+        return nodo.valor
+    if isinstance(nodo, NodoIdentificador):
+        return nodo.nombre[1]
+    return (forma(nodo.izquierda), nodo.operador, forma(nodo.derecha))
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("2 + 3 * 4", ('NUMBER', '14')),
+    ("7 / 2", ('NUMBER', '3')),
+    ("-7 / 2", ('NUMBER', '-3')),
+    ("2 - 5", ('NUMBER', '-3')),
+    ("x * 1", 'x'),
+    ("1 * x", 'x'),
+    ("0 + x", 'x'),
+    ("x - 0", 'x'),
+    ("x * 0", ('NUMBER', '0')),
+    ("x - x", ('NUMBER', '0')),
+    ("x / 1", 'x'),
+    ("0 / x", ('NUMBER', '0')),
+    ("x + -3", ('x', '-', ('NUMBER', '3'))),
+    ("x - -3", ('x', '+', ('NUMBER', '3'))),
+    ("x * 2 * 3", (('x', '*', ('NUMBER', '2')), '*', ('NUMBER', '3'))),
+    ("2 * 3 * x", ('x', '*', ('NUMBER', '6'))),
+])
+def test_optimizador_pliega(texto, esperado):
+    assert forma(expresion(texto).optimizar()) == esperado
+
+@pytest.mark.parametrize("texto", ["5 - x", "0 - x", "10 / x", "1 / x", "x - y"])
+def test_optimizador_respeta_operaciones_no_conmutativas(texto):
+    nodo = expresion(texto)
+    assert forma(nodo.optimizar()) == forma(nodo)
+
+def test_optimizador_no_pliega_flotantes():
+    nodo = expresion("1.5 + 2")
+    assert forma(nodo.optimizar()) == forma(nodo)
+    assert forma(expresion("x * 1.0").optimizar()) == ('x', '*', ('NUMBER', '1.0'))
+
+def test_optimizador_division_por_cero():
+    with pytest.raises(ValueError):
+        expresion("x / 0").optimizar()
+
+def test_optimizador_sin_cambios_devuelve_el_mismo_nodo():
+    nodo = expresion("x + y * z")
+    assert nodo.optimizar() is nodo
+
+def test_optimizador_conserva_el_valor():
+    # Expresiones al azar: el valor antes y despues de optimizar es el mismo
+    azar = random.Random(17)
+    def operando():
+        return azar.choice(['x', 'y', 'z', str(azar.randint(0, 3)), str(-azar.randint(1, 3))])
+    probadas = 0
+    while probadas < 500:
+        texto = operando()
+        for _ in range(azar.randint(1, 6)):
+            texto += f" {azar.choice('+-*/')} {operando()}"
+        nodo = expresion(texto)
+        try:
+            esperado = evaluar(nodo)
+        except ZeroDivisionError:
+            continue
+        assert evaluar(nodo.optimizar()) == esperado
+        probadas += 1
+
+def test_optimizador_expresion_profunda():
+    # Mas niveles que el limite de recursion: el recorrido usa una pila explicita
+    terminos = sys.getrecursionlimit() * 3
+    nodo = expresion("x" + " + 0" * terminos)
+    assert forma(nodo.optimizar()) == 'x'
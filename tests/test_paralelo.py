@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+import analizador
+from analizador import flujo_tokens, Parser, parsear_en_paralelo, imprimir_ast
+
+def fuente(n_funciones, cuerpo="    int a = x + 1;\n    return a;\n"):
+    funciones = "".join(f"int f{i}(int x) {{\n{cuerpo}}}\n" for i in range(n_funciones))
+    return "#include <stdio.h>\n" + funciones + "int main() {\n    return 0;\n}\n"
+
+@pytest.fixture
+def sin_minimo(monkeypatch):
+    # Que tambien un programa pequeno se reparta entre procesos
+    monkeypatch.setattr(analizador, "MINIMO_PARALELO", 0)
+
+def test_paralelo_igual_que_en_serie(sin_minimo):
+    tokens = flujo_tokens(fuente(40))
+    esperado = Parser(tokens).parsear()
+    programa = parsear_en_paralelo(tokens, procesos=2)
+    assert json.dumps(imprimir_ast(programa)) == json.dumps(imprimir_ast(esperado))
+
+def test_paralelo_da_el_mismo_error_que_en_serie(sin_minimo):
+    tokens = flujo_tokens(fuente(40).replace("int f7(int x) {\n    int a = x + 1;", "int f7(int x) {\n    int a = x + ;"))
+    with pytest.raises(SyntaxError) as serie:
+        Parser(tokens).parsear()
+    with pytest.raises(SyntaxError) as paralelo:
+        parsear_en_paralelo(tokens, procesos=2)
+    assert str(paralelo.value) == str(serie.value)
@@ -0,0 +1,149 @@
+import pytest
+
+from analizador import flujo_tokens, Parser
+from peephole import Peephole
+from x86 import Instruccion, Etiqueta, texto_lineas
+from maquina import ejecutar_ir, ejecutar_x86
+
+def i(operacion, *operandos):
+    return Instruccion(operacion, operandos)
+
+def optimizar(lineas):
+    peephole = Peephole()
+    return texto_lineas(peephole.optimizar(lineas)), peephole.eliminadas
+
+def sin_cambios(lineas):
+    texto, eliminadas = optimizar(lineas)
+    assert texto == texto_lineas(lineas)
+    assert not any(eliminadas.values())
+
+# push_seguido_de_pop
+
+def test_push_pop_a_otro_registro():
+    texto, eliminadas = optimizar([i('push', 'eax'), i('pop', 'ecx')])
+    assert texto == "    mov ecx, eax\n"
+    assert eliminadas['push_seguido_de_pop'] == 1
+
+def test_push_pop_al_mismo_registro():
+    assert optimizar([i('push', 'eax'), i('pop', 'eax')])[0] == ""
+
+def test_push_pop_con_etiqueta_en_medio():
+    sin_cambios([i('push', 'eax'), Etiqueta('.L0_start'), i('pop', 'ecx')])
+
+def test_push_pop_de_memoria_a_memoria():
+    sin_cambios([i('push', '[a]'), i('pop', '[b]')])
+
+# recarga_tras_guardar
+
+def test_recarga_en_otro_registro():
+    texto, _ = optimizar([i('mov', '[x]', 'eax'), i('mov', 'ecx', '[x]')])
+    assert texto == "    mov [x], eax\n    mov ecx, eax\n"
+
+def test_recarga_en_el_mismo_registro():
+    texto, eliminadas = optimizar([i('mov', '[x]', 'eax'), i('mov', 'eax', '[x]')])
+    assert texto == "    mov [x], eax\n"
+    assert eliminadas['recarga_tras_guardar'] == 1
+
+def test_recarga_con_etiqueta_en_medio():
+    sin_cambios([i('mov', '[x]', 'eax'), Etiqueta('.L0_start'), i('mov', 'ecx', '[x]')])
+
+def test_recarga_de_otra_variable():
+    sin_cambios([i('mov', '[x]', 'eax'), i('mov', 'ecx', '[y]')])
+
+def test_recarga_tras_copia_entre_registros():
+    sin_cambios([i('mov', 'ecx', 'eax'), i('mov', 'edx', 'ecx')])
+
+# salto_a_siguiente
+
+def test_salto_a_la_etiqueta_siguiente():
+    texto, _ = optimizar([i('jmp', '.L0_end'), Etiqueta('.L0_end')])
+    assert texto == ".L0_end:\n"
+
+def test_salto_a_otra_etiqueta():
+    sin_cambios([i('jmp', '.L0_start'), Etiqueta('.L0_end')])
+
+def test_salto_con_instruccion_en_medio():
+    sin_cambios([i('jmp', '.L0_end'), i('mov', 'eax', '1'), Etiqueta('.L0_end')])
+
+# cmp_tras_movzx
+
+def condicion(setcc='setg', registro='eax', byte='al', comparado='eax', cero='0'):
+    return [i('cmp', registro, '[b]'), i(setcc, 'al'), i('movzx', registro, byte), i('cmp', comparado, cero)]
+
+@pytest.mark.parametrize("setcc, salto, esperado", [
+    ('setg', 'je', 'jle'), ('setg', 'jne', 'jg'), ('setl', 'je', 'jge'),
+    ('sete', 'je', 'jne'), ('setne', 'jne', 'jne'), ('setle', 'je', 'jg'),
+])
+def test_salto_con_las_banderas_del_cmp(setcc, salto, esperado):
+    lineas = condicion(setcc) + [i(salto, '.L0_end'), i('mov', 'ecx', '1')]
+    texto, eliminadas = optimizar(lineas)
+    assert texto == ("    cmp eax, [b]\n"
+                     f"    {setcc} al\n"
+                     "    movzx eax, al\n"
+                     f"    {esperado} .L0_end\n"
+                     "    mov ecx, 1\n")
+    assert eliminadas['cmp_tras_movzx'] == 1
+
+def test_salto_seguido_de_etiqueta():
+    texto, _ = optimizar(condicion() + [i('je', '.L0_end'), Etiqueta('.L0_start')])
+    assert "jle .L0_end" in texto and "cmp eax, 0" not in texto
+
+def test_salto_con_etiqueta_en_medio():
+    lineas = condicion()
+    sin_cambios(lineas[:2] + [Etiqueta('.L0_start')] + lineas[2:] + [i('je', '.L0_end'), i('mov', 'ecx', '1')])
+
+def test_salto_tras_comparar_otro_registro():
+    sin_cambios(condicion(comparado='ecx') + [i('je', '.L0_end'), i('mov', 'ecx', '1')])
+
+def test_salto_tras_extender_otro_byte():
+    sin_cambios(condicion(byte='cl') + [i('je', '.L0_end'), i('mov', 'ecx', '1')])
+
+def test_salto_tras_comparar_con_otro_valor():
+    sin_cambios(condicion(cero='1') + [i('je', '.L0_end'), i('mov', 'ecx', '1')])
+
+@pytest.mark.parametrize("siguiente", [i('jl', '.L0_start'), i('setg', 'cl'), i('jne', '.L0_start'),
+                                       i('cmovl', 'ecx', 'edx'), i('adc', 'ecx', '0')])
+def test_banderas_leidas_despues_del_salto(siguiente):
+    # Tras el reemplazo las banderas serian las del primer cmp, no las de 'cmp eax, 0'
+    sin_cambios(condicion() + [i('je', '.L0_end'), siguiente])
+
+def test_salto_al_final_de_las_lineas():
+    # Sin la linea siguiente no se sabe si lee las banderas
+    sin_cambios(condicion() + [i('je', '.L0_end')])
+
+# Programas completos: el peephole no cambia el valor que se calcula
+
+PROGRAMA = """int main() {{
+    int x = {inicio};
+    int y = 10;
+    int total = 0;
+    while (x {op1} y) {{
+        if (x {op2} 3) {{
+            total = total + x;
+        }} else if (y {op3} 7) {{
+            total = total - y;
+        }} else {{
+            total = total + 1;
+        }}
+        for (int i = 0; i < 2; i++) {{
+            total = total + i;
+        }}
+        x = x + 1;
+        y = y - 1;
+    }}
+    return total;
+}}
+"""
+
+@pytest.mark.parametrize("op1, op2, op3", [('<', '==', '>'), ('<=', '!=', '<='), ('<=', '>=', '=='), ('<', '<', '!=')])
+@pytest.mark.parametrize("inicio", [0, 4, 12])
+def test_peephole_conserva_el_resultado(op1, op2, op3, inicio):
+    funcion = Parser(flujo_tokens(PROGRAMA.format(inicio=inicio, op1=op1, op2=op2, op3=op3))).parsear().funciones[0]
+    funcion_ir = funcion.generar_ir()
+    lineas = funcion.generar_lineas()
+    peephole = Peephole()
+    optimizadas = peephole.optimizar(lineas)
+    assert peephole.eliminadas['cmp_tras_movzx'] > 0
+    esperado = ejecutar_ir(funcion_ir, {})
+    assert ejecutar_x86(lineas, {}) == esperado
+    assert ejecutar_x86(optimizadas, {}) == esperado
@@ -0,0 +1,58 @@
+import sys
+
+import pytest
+
+from analizador import flujo_tokens, Parser, imprimir_ast, compilar_en_flujo
+from semantico import AnalizadorSemantico
+
+def parsear(fuente):
+    return Parser(flujo_tokens(fuente)).parsear()
+
+def suma_larga(terminos, ultimo="x"):
+    return "int main() {\n    int x = 1;\n    int r = x" + " + x" * (terminos - 2) + f" + {ultimo};\n}}\n"
+
+def error_semantico(fuente):
+    with pytest.raises(Exception) as error:
+        AnalizadorSemantico().analizar(parsear(fuente))
+    return str(error.value)
+
+def test_semantico_expresion_profunda():
+    # Mas niveles que el limite de recursion: las expresiones se recorren con una pila explicita
+    analizador = AnalizadorSemantico()
+    analizador.analizar(parsear(suma_larga(sys.getrecursionlimit() * 3)))
+    assert analizador.tabla_simbolos.obtener_tipo_variable('r') == 'int'
+
+def test_semantico_error_en_lo_mas_profundo():
+    fuente = suma_larga(sys.getrecursionlimit() * 3, "2.5")
+    assert error_semantico(fuente) == "Error semantico: tipos incompatibles en operacion int + float"
+
+def test_semantico_primer_error_de_izquierda_a_derecha():
+    # El mismo orden que el recorrido recursivo: el operando izquierdo se analiza antes
+    fuente = "int main() {\n    int r = a + 1 * b;\n    return r;\n}\n"
+    assert error_semantico(fuente) == "Error semantico: la variable a no esta declarada"
+    fuente = "int main() {\n    int a = 1;\n    if (a < b) {\n        a = 2;\n    }\n}\n"
+    assert error_semantico(fuente) == "Error semantico: la variable b no esta declarada"
+    fuente = "int main() {\n    int a = 1;\n    if (a < 2.5) {\n        a = 2;\n    }\n}\n"
+    assert error_semantico(fuente) == "Error semantico: tipos incompatibles en comparacion int < float"
+
+def test_impresor_expresion_profunda():
+    terminos = sys.getrecursionlimit() * 3
+    expresion = imprimir_ast(parsear(suma_larga(terminos)))["Programa"][0]["Cuerpo"][1]["Expresion"]
+    niveles = 0
+    while "Operacion" in expresion:
+        assert expresion["Derecha"] == {"Identificador": ("IDENTIFIER", "x")}
+        expresion = expresion["Izquierda"]
+        niveles += 1
+    assert niveles == terminos - 1 and expresion == {"Identificador": ("IDENTIFIER", "x")}
+
+def test_flujo_no_informa_recursion_como_error_semantico(tmp_path, monkeypatch):
+    tokens = flujo_tokens(suma_larga(sys.getrecursionlimit() * 3))
+    analizador, error = compilar_en_flujo(tokens, str(tmp_path / "programa.s"))
+    assert error is None
+
+    def desbordar(self, nodo):
+        raise RecursionError("maximum recursion depth exceeded")
+    monkeypatch.setattr(AnalizadorSemantico, 'analizar', desbordar)
+    with pytest.raises(RecursionError):
+        compilar_en_flujo(flujo_tokens(suma_larga(3)), str(tmp_path / "otro.s"))
+    assert not (tmp_path / "otro.s").exists()
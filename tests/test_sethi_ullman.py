@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+from ir import ConstructorIR
+from nodos import NodoFuncion, NodoRetorno, NodoOperacion, NodoIdentificador, NodoNumero
+from x86 import REGISTROS, lineas_x86
+from maquina import ejecutar_ir, ejecutar_x86, OPERACIONES_C
+
+VARIABLES = {f'v{i}': (i * 37 % 53 + 1) * (-1) ** i for i in range(64)}
+
+def hoja(i):
+    # Cada hoja de un arbol equilibrado es una variable distinta: ningun subarbol vale 0 por construccion
+    return NodoIdentificador(('IDENTIFIER', f'v{i % 64}'))
+
+def equilibrado(profundidad, operadores, inicio=0):
+    # Arbol completo: a la profundidad 4 necesita 4 registros, a la 5 necesita 5
+    if profundidad == 0:
+        return hoja(inicio)
+    mitad = 2 ** (profundidad - 1)
+    operador = operadores[(profundidad + inicio) % len(operadores)]
+    return NodoOperacion(equilibrado(profundidad - 1, operadores, inicio),
+                         operador, equilibrado(profundidad - 1, operadores, inicio + mitad))
+
+def cargado_a_la_derecha(profundidad, operador):
+    # x - (arbol equilibrado): el hijo derecho necesita mas registros y se evalua primero
+    return NodoOperacion(hoja(7), operador, equilibrado(profundidad, '-+', 1))
+
+def evaluar(nodo, operaciones, variables=VARIABLES):
+    if isinstance(nodo, NodoIdentificador):
+        return variables[nodo.nombre[1]]
+    if isinstance(nodo, NodoNumero):
+        return int(nodo.valor[1])
+    return operaciones[nodo.operador](evaluar(nodo.izquierda, operaciones, variables),
+                                      evaluar(nodo.derecha, operaciones, variables))
+
+def variables_para(expresion):
+    # Valores con los que ninguna division de la expresion es por cero
+    azar = random.Random(7)
+    for _ in range(1000):
+        variables = {nombre: azar.choice([-1, 1]) * azar.randint(1, 60) for nombre in VARIABLES}
+        try:
+            evaluar(expresion, OPERACIONES_C, variables)
+        except ZeroDivisionError:
+            continue
+        return variables
+    raise AssertionError("no hay valores sin division por cero")
+
+def comprobar(expresion, funcion):
+    # La representacion intermedia y el x86 dan el mismo valor que el arbol
+    variables = variables_para(expresion)
+    assert ejecutar_ir(funcion, variables) == evaluar(expresion, OPERACIONES_C, variables)
+    assert ejecutar_x86(lineas_x86(funcion), variables) == evaluar(expresion, OPERACIONES_X86, variables)
+
+# El backend todavia no emite '*' ni '/': el resultado es su operando derecho
+OPERACIONES_X86 = {**OPERACIONES_C, '*': lambda a, b: b, '/': lambda a, b: b}
+
+def funcion_ir(expresion):
+    constructor = ConstructorIR(len(REGISTROS))
+    return NodoFuncion('main', [], [NodoRetorno(expresion)]).a_ir(constructor)
+
+def operaciones_ir(funcion):
+    return [instruccion.operacion for bloque in funcion.bloques for instruccion in bloque.instrucciones]
+
+@pytest.mark.parametrize("operadores", ['-', '-/', '/-', '+-*/'])
+@pytest.mark.parametrize("profundidad", [3, 4, 5, 6])
+def test_arbol_equilibrado_conserva_el_valor(profundidad, operadores):
+    expresion = equilibrado(profundidad, operadores)
+    funcion = funcion_ir(expresion)
+    assert ('apilar' in operaciones_ir(funcion)) == (profundidad >= 5)
+    comprobar(expresion, funcion)
+
+@pytest.mark.parametrize("operador", ['-', '/'])
+@pytest.mark.parametrize("profundidad", [2, 4, 5])
+def test_derecha_primero_conserva_el_orden_de_los_operandos(operador, profundidad):
+    # La derecha se calcula antes que la izquierda, pero la operacion sigue siendo izquierda - derecha
+    expresion = cargado_a_la_derecha(profundidad, operador)
+    funcion = funcion_ir(expresion)
+    primera = funcion.bloques[0].instrucciones[0]
+    assert primera.operandos[0].nombre != 'v7'  # La hoja izquierda no se carga primero
+    comprobar(expresion, funcion)
+
+@pytest.mark.parametrize("operador", ['-', '/'])
+def test_desbordamiento_a_la_derecha(operador):
+    # Los dos hijos necesitan todos los registros: el primero espera en la pila y vuelve como operando izquierdo
+    izquierda = equilibrado(5, '-+')
+    derecha = equilibrado(5, '+-', 3)
+    expresion = NodoOperacion(izquierda, operador, derecha)
+    funcion = funcion_ir(expresion)
+    operaciones = operaciones_ir(funcion)
+    assert operaciones.count('apilar') == operaciones.count('desapilar') > 0
+    comprobar(expresion, funcion)
+
+def test_expresiones_al_azar():
+    azar = random.Random(23)
+    def generar(profundidad):
+        if profundidad == 0 or azar.random() < 0.15:
+            if azar.random() < 0.8:
+                return hoja(azar.randrange(64))
+            return NodoNumero(('NUMBER', str(azar.randint(1, 9))))
+        return NodoOperacion(generar(profundidad - 1), azar.choice('+--/*'), generar(profundidad - 1))
+    desbordadas = 0
+    for _ in range(300):
+        expresion = generar(azar.randint(3, 8))
+        try:
+            esperado = evaluar(expresion, OPERACIONES_C)
+        except ZeroDivisionError:
+            continue
+        funcion = funcion_ir(expresion)
+        desbordadas += 'apilar' in operaciones_ir(funcion)
+        assert ejecutar_ir(funcion, VARIABLES) == esperado
+        assert ejecutar_x86(lineas_x86(funcion), VARIABLES) == evaluar(expresion, OPERACIONES_X86)
+    assert desbordadas > 10
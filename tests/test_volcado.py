@@ -0,0 +1,68 @@
+import io
+import json
+import os
+import sys
+
+from analizador import flujo_tokens, Parser, imprimir_ast, volcar_ast, EscritorJSON
+from rendimiento import generar_fuente
+
+CODIGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'codigo.txt')
+
+def parsear(fuente):
+    return Parser(flujo_tokens(fuente)).parsear()
+
+def suma_larga(terminos):
+    # Expresion cargada a la izquierda: cada termino es un nivel mas de anidamiento
+    return "int main() {\n    int x = 1;\n    int r = x" + " + x" * (terminos - 1) + ";\n    return r;\n}\n"
+
+def volcado(programa, indent=1):
+    salida = io.StringIO()
+    volcar_ast(programa, salida, indent)
+    return salida.getvalue()
+
+def test_volcado_igual_que_json_dumps():
+    with open(CODIGO, encoding='utf-8') as archivo:
+        fuentes = [archivo.read(), generar_fuente(5), suma_larga(60)]
+    for fuente in fuentes:
+        programa = parsear(fuente)
+        for indent in (1, 4, '\t'):
+            assert volcado(programa, indent) == json.dumps(imprimir_ast(programa), indent=indent)
+
+def test_volcado_vacios_y_escapes():
+    # Listas vacias, None y cadenas con caracteres fuera de ASCII o comillas
+    programa = parsear('void f() {\n}\nint main() {\n    printf("año \\"x\\"");\n    return 0;\n}\n')
+    assert volcado(programa) == json.dumps(imprimir_ast(programa), indent=1)
+
+def test_volcado_expresion_profunda():
+    # Mas niveles que el limite de recursion: el escritor usa una pila explicita
+    terminos = sys.getrecursionlimit() * 2
+    texto = volcado(parsear(suma_larga(terminos)))
+    assert texto.count('"Operacion": "+"') == terminos - 1
+    assert texto.count('{') == texto.count('}') and texto.count('[') == texto.count(']')
+    # Cada operacion anida su izquierda un nivel mas; la expresion empieza en el nivel 6
+    assert '\n' + ' ' * (terminos + 5) + '"Identificador"' in texto
+    assert texto.endswith('\n   ]\n  }\n ]\n}')
+
+class Escrituras(io.StringIO):
+    # Cuenta las llamadas a write
+    def __init__(self):
+        super().__init__()
+        self.escrituras = 0
+
+    def write(self, texto):
+        self.escrituras += 1
+        return super().write(texto)
+
+def test_volcado_por_tramos(tmp_path):
+    # Con un buffer pequeno el JSON llega al stream en muchos tramos, y un archivo queda byte a byte igual
+    programa = parsear(generar_fuente(20))
+    esperado = json.dumps(imprimir_ast(programa), indent=1)
+    salida = Escrituras()
+    escritor = EscritorJSON(salida)
+    escritor.LIMITE_BUFFER = 8
+    escritor.escribir(programa)
+    assert salida.getvalue() == esperado and salida.escrituras > 100
+    ruta = tmp_path / "ast.json"
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        volcar_ast(programa, archivo)
+    assert ruta.read_bytes() == esperado.encode("utf-8")
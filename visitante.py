@@ -0,0 +1,37 @@
+class Visitante:
+    """
+    Clase base para recorrer un AST con despacho por tipo de nodo.
+    Cada subclase define metodos visitar_<Clase> (por ejemplo
+    visitar_NodoOperacion); el metodo de cada tipo se busca una sola vez,
+    la primera vez que aparece ese tipo, y queda en una tabla por subclase
+    indexada por type(nodo). Elegir el metodo cuesta un acceso a
+    diccionario, sin importar cuantos tipos de nodo haya.
+    """
+    despacho = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.despacho = {}  # Tabla propia de cada subclase: tipo de nodo -> funcion
+
+    def visitar(self, nodo):
+        try:
+            metodo = self.despacho[type(nodo)]
+        except KeyError:
+            metodo = self.resolver(type(nodo))
+        return metodo(self, nodo)
+
+    @classmethod
+    def resolver(cls, tipo):
+        # visitar_<Clase> del tipo o de la clase mas cercana en su MRO; si no hay, visitar_otro
+        for clase in tipo.__mro__:
+            metodo = getattr(cls, 'visitar_' + clase.__name__, None)
+            if metodo is not None:
+                break
+        else:
+            metodo = cls.visitar_otro
+        cls.despacho[tipo] = metodo
+        return metodo
+
+    def visitar_otro(self, nodo):
+        # Tipos sin metodo propio (incluido None)
+        return None
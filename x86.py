@@ -0,0 +1,294 @@
+"""
+Backend x86 de 32 bits (sintaxis NASM) para la representacion intermedia
+de ir.py. Por cada funcion:
+
+    1. toma los bloques a los que se llega desde la entrada, en su orden;
+    2. asigna registros a los temporales con linear scan sobre sus
+       intervalos de vida (asignar_registros);
+    3. traduce cada InstruccionIR a una o pocas Instruccion con registros
+       reales; los saltos al bloque que sigue no se escriben.
+
+El resultado son lineas (Etiqueta, Instruccion o texto tal cual) que el
+Emisor pasa a texto o entrega tal cual para pases como el peephole.
+"""
+from ir import Temporal, Variable, Constante, ProgramaIR
+
+REGISTROS = ('eax', 'ecx', 'edx', 'ebx')  # Registros libres para temporales; ebx (callee-saved) queda para el final
+BAJO = {'eax': 'al', 'ecx': 'cl', 'edx': 'dl', 'ebx': 'bl'}  # Byte bajo de cada registro, para setcc y movzx
+INSTRUCCION_COMPARACION = {'>': 'setg', '<': 'setl', '>=': 'setge', '<=': 'setle', '==': 'sete', '!=': 'setne'}
+INSTRUCCION_ARITMETICA = {'+': 'add', '-': 'sub'}
+FUNCIONES_C = ('printf', 'scanf')  # Se llaman con el prefijo _ de MinGW
+
+class Etiqueta:
+    __slots__ = ('nombre', 'comentario')
+    def __init__(self, nombre, comentario=None):
+        self.nombre = nombre
+        self.comentario = comentario
+
+    def a_texto(self):
+        return f"{self.nombre}: ; {self.comentario}" if self.comentario else f"{self.nombre}:"
+
+class Instruccion:
+    __slots__ = ('operacion', 'operandos', 'comentario')
+    def __init__(self, operacion, operandos, comentario=None):
+        self.operacion = operacion
+        self.operandos = operandos  # Tupla de textos: registros, [variable] o inmediatos
+        self.comentario = comentario
+
+    def a_texto(self):
+        texto = f"    {self.operacion} {', '.join(self.operandos)}" if self.operandos else f"    {self.operacion}"
+        return f"{texto} ; {self.comentario}" if self.comentario else texto
+
+def texto_lineas(lineas):
+    # Texto de una lista de lineas (Etiqueta, Instruccion o texto tal cual)
+    return ''.join((linea if type(linea) is str else linea.a_texto()) + '\n' for linea in lineas)
+
+def asignar_registros(bloques):
+    """
+    Registro de cada Temporal de los bloques, con linear scan sobre las
+    posiciones de sus instrucciones en ese orden (valido porque ningun
+    temporal pasa de un bloque a otro). El destino de una copia o de una
+    operacion hereda el registro de su primer operando si este muere en
+    esa instruccion, asi 't2 = t1 + x' queda en un solo add. El valor de
+    retorno y el de una llamada prefieren eax.
+    """
+    inicio, fin, preferido, hereda = {}, {}, {}, {}
+    posicion = 0
+    for bloque in bloques:
+        for instruccion in bloque.instrucciones:
+            operandos = instruccion.operandos
+            for operando in operandos:
+                if type(operando) is Temporal:
+                    fin[operando] = posicion
+            destino = instruccion.destino
+            if type(destino) is Temporal:
+                inicio[destino] = fin[destino] = posicion
+                operacion = instruccion.operacion
+                if operacion == 'llamar':
+                    preferido[destino] = 'eax'
+                elif operacion != 'desapilar' and type(operandos[0]) is Temporal:
+                    hereda[destino] = operandos[0]
+            posicion += 1
+        # El terminador solo usa, como mucho, la condicion o el valor de retorno
+        terminador = bloque.terminador
+        if terminador.operandos and type(terminador.operandos[0]) is Temporal:
+            fin[terminador.operandos[0]] = posicion
+            if terminador.operacion == 'retornar':
+                preferido[terminador.operandos[0]] = 'eax'
+        posicion += 1
+    # La preferencia de un destino pasa al operando del que hereda el registro
+    for destino in reversed(list(hereda)):
+        origen = hereda[destino]
+        if destino in preferido and fin[origen] == inicio[destino]:
+            preferido.setdefault(origen, preferido[destino])
+
+    registro = {}
+    libres = list(REGISTROS)
+    activos = []
+    for temporal, comienzo in inicio.items():  # En orden de definicion, que es el de inicio
+        if activos:
+            for activo in [a for a in activos if fin[a] < comienzo]:
+                activos.remove(activo)
+                libres.append(registro[activo])
+        origen = hereda.get(temporal)
+        if origen is not None and fin[origen] == comienzo:
+            activos.remove(origen)
+            registro[temporal] = registro[origen]
+            activos.append(temporal)
+            continue
+        if not libres:
+            # ConstructorIR manda a la pila lo que no cabe en REGISTROS
+            raise RuntimeError("No quedan registros libres para los temporales")
+        libre = preferido.get(temporal)
+        if libre not in libres:
+            libre = min(libres, key=REGISTROS.index)
+        libres.remove(libre)
+        registro[temporal] = libre
+        activos.append(temporal)
+    return registro
+
+class Emisor:
+    """
+    Destino del codigo ensamblador: recibe la representacion intermedia de
+    un programa o de una funcion y escribe sus lineas una sola vez. Se
+    acumulan en una lista que se une al final o, con un stream de salida,
+    van al stream cada LIMITE_BUFFER lineas. Con estructurado=True guarda
+    las lineas sin pasarlas a texto.
+    """
+    LIMITE_BUFFER = 4096
+
+    def __init__(self, salida=None, estructurado=False):
+        self.salida = salida
+        self.estructurado = estructurado
+        self.partes = []
+        self.lineas = []  # Lineas de la funcion en curso
+        self.registro = {}
+        self.metodos = {operacion: getattr(self, 'emitir_' + metodo) for operacion, metodo in OPERACIONES.items()}
+
+    def emitir(self, ir):
+        if isinstance(ir, ProgramaIR):
+            for funcion in ir.funciones:
+                self.funcion(funcion)
+                self.partes.append('')
+                self.partes.append('')
+        else:
+            self.funcion(ir)
+
+    def funcion(self, funcion):
+        bloques = funcion.alcanzables()
+        self.registro = asignar_registros(bloques)
+        self.lineas = []
+        # Bloques a los que algun salto escrito llega: los que no tienen nombre necesitan una etiqueta
+        siguientes = bloques[1:] + [None]
+        destinos = set()
+        for bloque, siguiente in zip(bloques, siguientes):
+            destinos.update(b.numero for b in bloque.sucesores() if b is not siguiente)
+        metodos, aritmetica = self.metodos, self.emitir_aritmetica
+        for bloque, siguiente in zip(bloques, siguientes):
+            if bloque is bloques[0]:
+                if funcion.nombre is not None:
+                    self.etiqueta(funcion.nombre)
+                    self.instruccion('push', 'ebp')
+                    self.instruccion('mov', 'ebp', 'esp')
+            elif bloque.nombre is not None or bloque.numero in destinos:
+                self.etiqueta(self.nombre_bloque(bloque), bloque.comentario)
+            for instruccion in bloque.instrucciones:
+                metodos.get(instruccion.operacion, aritmetica)(instruccion)
+            self.terminador(funcion, bloque.terminador, siguiente)
+        self.cerrar_funcion()
+
+    def cerrar_funcion(self):
+        partes = self.partes
+        if self.estructurado:
+            partes.extend(self.lineas)
+        else:
+            partes.extend(linea if type(linea) is str else linea.a_texto() for linea in self.lineas)
+        self.lineas = []
+        if self.salida is not None and len(partes) >= self.LIMITE_BUFFER:
+            self.vaciar()
+
+    def nombre_bloque(self, bloque):
+        return bloque.nombre if bloque.nombre is not None else f".B{bloque.numero}"
+
+    def linea(self, texto):
+        self.lineas.append(texto)
+
+    def etiqueta(self, nombre, comentario=None):
+        self.lineas.append(Etiqueta(nombre, comentario))
+
+    def instruccion(self, operacion, *operandos, comentario=None):
+        self.lineas.append(Instruccion(operacion, operandos, comentario))
+
+    def operando(self, valor):
+        if type(valor) is Temporal:
+            return self.registro[valor]
+        if type(valor) is Variable:
+            return f"[{valor.nombre}]"
+        return valor.valor
+
+    def copiar(self, destino, origen, comentario=None):
+        # mov entre registros, omitido si ya es el mismo
+        if destino != origen:
+            self.instruccion('mov', destino, origen, comentario=comentario)
+
+    def emitir_copiar(self, instruccion):
+        destino, (origen,) = instruccion.destino, instruccion.operandos
+        if type(origen) is Constante and origen.tipo == 'flotante':
+            # El flotante queda en xmm0; el temporal no recibe valor
+            self.instruccion('movss', 'xmm0', f"[{origen.valor}]", comentario=instruccion.comentario)
+            return
+        self.copiar(self.operando(destino), self.operando(origen), instruccion.comentario)
+
+    def emitir_aritmetica(self, instruccion):
+        izquierda, derecha = instruccion.operandos
+        destino = self.registro[instruccion.destino]
+        operacion = INSTRUCCION_ARITMETICA.get(instruccion.operacion)
+        if operacion is None:
+            # '*', '/' y los operadores logicos todavia no generan instrucciones: el resultado es el operando derecho
+            self.copiar(destino, self.operando(derecha), instruccion.comentario)
+            return
+        self.copiar(destino, self.registro[izquierda])
+        self.instruccion(operacion, destino, self.operando(derecha), comentario=instruccion.comentario)
+
+    def emitir_comparacion(self, instruccion):
+        izquierda, derecha = instruccion.operandos
+        destino = self.registro[instruccion.destino]
+        self.copiar(destino, self.registro[izquierda])
+        self.instruccion('cmp', destino, self.operando(derecha), comentario=instruccion.comentario)
+        # setcc escribe un byte y movzx lo extiende: se usa el byte bajo del registro
+        self.instruccion(INSTRUCCION_COMPARACION[instruccion.operacion], BAJO[destino])
+        self.instruccion('movzx', destino, BAJO[destino])
+
+    def emitir_param(self, instruccion):
+        self.instruccion('push', self.operando(instruccion.operandos[0]), comentario=instruccion.comentario)
+
+    def emitir_llamar(self, instruccion):
+        nombre, n_argumentos = instruccion.operandos
+        self.instruccion('call', f"_{nombre}" if nombre in FUNCIONES_C else nombre, comentario=instruccion.comentario)
+        # Limpiar la pila
+        if n_argumentos:
+            self.instruccion('add', 'esp', str(4 * n_argumentos))
+        if instruccion.destino is not None:
+            self.copiar(self.registro[instruccion.destino], 'eax')
+
+    def emitir_apilar(self, instruccion):
+        self.instruccion('push', self.operando(instruccion.operandos[0]))
+
+    def emitir_desapilar(self, instruccion):
+        self.instruccion('pop', self.registro[instruccion.destino])
+
+    def emitir_declarar(self, instruccion):
+        tipo, nombre = instruccion.operandos
+        self.linea(f"; Declaracion de variable: {tipo} {nombre}")
+
+    def emitir_constante(self, instruccion):
+        tipo, nombre, valor = instruccion.operandos
+        self.linea(f"    {nombre} dd {valor} ; constante {tipo}")
+
+    def terminador(self, funcion, terminador, siguiente):
+        operacion, operandos = terminador.operacion, terminador.operandos
+        if operacion == 'saltar':
+            if operandos[0] is not siguiente:
+                self.instruccion('jmp', self.nombre_bloque(operandos[0]), comentario=terminador.comentario)
+        elif operacion == 'ramificar':
+            condicion, verdadero, falso = operandos
+            self.instruccion('cmp', self.registro[condicion], '0')
+            if verdadero is siguiente:
+                self.instruccion('je', self.nombre_bloque(falso), comentario=terminador.comentario)
+            elif falso is siguiente:
+                self.instruccion('jne', self.nombre_bloque(verdadero), comentario=terminador.comentario)
+            else:
+                self.instruccion('je', self.nombre_bloque(falso), comentario=terminador.comentario)
+                self.instruccion('jmp', self.nombre_bloque(verdadero))
+        else:
+            if operandos:
+                self.copiar('eax', self.registro[operandos[0]])
+            if funcion.nombre is not None:
+                self.instruccion('mov', 'esp', 'ebp')
+                self.instruccion('pop', 'ebp')
+                self.instruccion('ret', comentario=terminador.comentario)
+
+    def vaciar(self):
+        if self.salida is not None and self.partes:
+            self.salida.write('\n'.join(self.partes) + '\n')
+            self.partes.clear()
+
+    def texto(self):
+        return '\n'.join(self.partes) + '\n' if self.partes else ''
+
+    def resueltas(self):
+        return self.partes
+
+# Metodo emitir_<...> de cada operacion de la representacion intermedia; los demas operadores son aritmeticos
+OPERACIONES = {**{operacion: operacion for operacion in ('copiar', 'param', 'llamar', 'apilar', 'desapilar', 'declarar', 'constante')},
+               **{operador: 'comparacion' for operador in INSTRUCCION_COMPARACION}}
+
+def texto_x86(ir):
+    emisor = Emisor()
+    emisor.emitir(ir)
+    return emisor.texto()
+
+def lineas_x86(ir):
+    emisor = Emisor(estructurado=True)
+    emisor.emitir(ir)
+    return emisor.resueltas()